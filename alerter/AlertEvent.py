@@ -0,0 +1,37 @@
+# Everything the alert message of a row is rendered from, emitted by the detection and rendered later.
+# Slots keep the events small and cheap to create, small enough to pass between processes as well.
+# The arrays are copies, they stay valid while the next ticks update the history.
+class AlertEvent:
+    __slots__ = (
+        "row",
+        "symbol",
+        "price",
+        "changes",
+        "changes_last",
+        "outliers",
+        "volume",
+        "volume_changes",
+        "z_scores",
+    )
+
+    def __init__(
+        self,
+        row,
+        symbol,
+        price,
+        changes,
+        changes_last,
+        outliers,
+        volume=None,
+        volume_changes=None,
+        z_scores=None,
+    ):
+        self.row = row
+        self.symbol = symbol
+        self.price = price
+        self.changes = changes
+        self.changes_last = changes_last
+        self.outliers = outliers
+        self.volume = volume
+        self.volume_changes = volume_changes
+        self.z_scores = z_scores
@@ -0,0 +1,8 @@
+# A monitored symbol and its row in the history and change arrays of its market.
+# Only created on demand when iterating the registry, e.g. for reports, the arrays are indexed by row directly.
+class Asset:
+    __slots__ = ("symbol", "row")
+
+    def __init__(self, symbol, row):
+        self.symbol = symbol
+        self.row = row
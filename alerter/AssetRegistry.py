@@ -0,0 +1,30 @@
+from .Asset import Asset
+
+
+# Monitored symbols of a market in the order of their rows, with an index from symbol to row.
+# The state of every symbol lives in the arrays of the market by row, the registry only maps symbols and rows.
+class AssetRegistry:
+    def __init__(self):
+        self.symbols = []
+        self.rows = {}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __iter__(self):
+        return (Asset(symbol, row) for row, symbol in enumerate(self.symbols))
+
+    def __getitem__(self, row):
+        return Asset(self.symbols[row], row)
+
+    def __contains__(self, symbol):
+        return symbol in self.rows
+
+    def row(self, symbol):
+        return self.rows.get(symbol)
+
+    def add(self, symbol):
+        row = len(self.symbols)
+        self.symbols.append(symbol)
+        self.rows[symbol] = row
+        return row
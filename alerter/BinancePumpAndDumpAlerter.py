@@ -1,24 +1,24 @@
 import logging
-import requests
+import numpy as np
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+from metrics import Metrics
+from reporter import AlertRenderer
 from time import sleep
-from utils import ConversionUtils
+from utils import ConversionUtils, TickScheduler
+
+from .TickerColumns import TickerColumns
 
 
 class BinancePumpAndDumpAlerter:
     def __init__(
         self,
-        api_url,
-        watchlist,
-        blacklist,
-        pairs_of_interest,
+        markets,
         chart_intervals,
-        outlier_intervals,
         top_report_intervals,
         extract_interval,
-        retry_interval,
-        reset_interval,
         top_pump_enabled,
         top_dump_enabled,
         additional_statistics_enabled,
@@ -28,15 +28,15 @@ class BinancePumpAndDumpAlerter:
         top_report_nearest_hour,
         telegram,
         report_generator,
+        fetcher,
+        history_snapshot=None,
+        history_backfill=None,
+        tick_recorder=None,
+        metrics=None,
+        shard_pool=None,
     ):
-        self.api_url = api_url
-        self.watchlist = watchlist
-        self.blacklist = blacklist
-        self.pairs_of_interest = pairs_of_interest
-        self.outlier_intervals = outlier_intervals
+        self.markets = markets
         self.extract_interval = extract_interval
-        self.retry_interval = retry_interval
-        self.reset_interval = reset_interval
         self.top_pump_enabled = top_pump_enabled
         self.top_dump_enabled = top_dump_enabled
         self.additional_statistics_enabled = additional_statistics_enabled
@@ -45,269 +45,421 @@ class BinancePumpAndDumpAlerter:
         self.check_new_listing_enabled = check_new_listing_enabled
         self.telegram = telegram
         self.report_generator = report_generator
+        self.fetcher = fetcher
+        self.history_snapshot = history_snapshot
+        self.history_backfill = history_backfill
+        self.tick_recorder = tick_recorder
+        self.shard_pool = shard_pool
+        # Stages are always timed, the metrics are only served if enabled
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics.add_collector(self.collect_metrics)
+
+        # Markets are fetched concurrently so all of them share the same tick
+        self.market_executor = ThreadPoolExecutor(
+            max_workers=max(1, len(markets)), thread_name_prefix="market-fetcher"
+        )
 
         self.logger = logging.getLogger("pump-and-dump-alerter")
 
         self.initial_time = int(time.time())
+        self.last_loop_time = self.initial_time
         nearest_hour = self.initial_time - (self.initial_time % 3600) + 3600
         self.logger.info(
             "Nearest hour is %i seconds away", nearest_hour - self.initial_time
         )
 
-        self.chart_intervals = {}
-        for interval in chart_intervals:
-            self.chart_intervals[interval] = {}
-            self.chart_intervals[interval][
-                "value"
-            ] = ConversionUtils.duration_to_seconds(interval)
+        self.chart_intervals = self.create_chart_intervals(chart_intervals)
 
-        self.top_report_intervals = {}
-        for interval in top_report_intervals:
-            self.top_report_intervals[interval] = {}
+        # Alerts are rendered and handed to the sender off the tick loop
+        self.alert_renderer = AlertRenderer(
+            self.report_generator, self.telegram, self.metrics
+        )
 
-            # Determine initial start time for TPD. Should conveniently solve original 0% issue together.
-            if top_report_nearest_hour:
-                self.top_report_intervals[interval]["start"] = nearest_hour
-            else:
-                self.top_report_intervals[interval]["start"] = self.initial_time
+        # Settings of a reloaded config, applied by the tick loop before the next tick
+        self.pending_settings = None
+        self.settings_lock = threading.Lock()
+
+        # With shards the history is kept by the shard workers only
+        if self.shard_pool is not None:
+            self.shard_pool.start(
+                self.markets,
+                self.chart_intervals,
+                self.extract_interval,
+                self.dump_enabled,
+            )
+        else:
+            for market in self.markets:
+                if self.history_snapshot is not None:
+                    self.history_snapshot.prepare(market)
+                market.create_history(
+                    self.chart_intervals, self.extract_interval, self.history_snapshot
+                )
 
-            self.top_report_intervals[interval][
-                "value"
-            ] = ConversionUtils.duration_to_seconds(interval)
+        self.top_report_intervals = self.create_top_report_intervals(
+            top_report_intervals, top_report_nearest_hour, self.initial_time
+        )
 
     @staticmethod
-    def extract_ticker_data(symbol, assets):
-        for asset in assets:
-            if asset["symbol"] == symbol:
-                return asset
+    def create_chart_intervals(chart_intervals):
+        return {
+            interval: {"value": ConversionUtils.duration_to_seconds(interval)}
+            for interval in chart_intervals
+        }
 
     @staticmethod
-    def create_new_asset(symbol, chart_intervals):
-        asset = {"symbol": symbol, "price": [], "volume": []}
+    def create_top_report_intervals(
+        top_report_intervals, top_report_nearest_hour, current_time, previous=None
+    ):
+        if previous is None:
+            previous = {}
 
-        for interval in chart_intervals:
-            asset[interval] = {}
-            asset[interval]["change_current"] = 0
-            asset[interval]["change_last"] = 0
-            asset[interval]["change_volume"] = 0
+        nearest_hour = current_time - (current_time % 3600) + 3600
 
-        return asset
+        created_intervals = {}
+        for interval in top_report_intervals:
+            # Intervals kept from a previous config keep their schedule
+            if interval in previous:
+                created_intervals[interval] = previous[interval]
+                continue
 
-    def retrieve_exchange_assets(self, api_url):
-        try:
-            self.logger.debug(
-                "Retrieving price information from the ticker. ApiUrl: %s.", api_url
+            # Determine initial start time for TPD. Should conveniently solve original 0% issue together.
+            created_intervals[interval] = {
+                "start": nearest_hour if top_report_nearest_hour else current_time,
+                "value": ConversionUtils.duration_to_seconds(interval),
+            }
+        return created_intervals
+
+    def reconfigure(
+        self,
+        markets,
+        chart_intervals,
+        top_report_intervals,
+        top_pump_enabled,
+        top_dump_enabled,
+        additional_statistics_enabled,
+        no_of_reported_coins,
+        dump_enabled,
+        check_new_listing_enabled,
+        top_report_nearest_hour,
+    ):
+        # Called from any thread with the settings of a reloaded config, markets in the same order.
+        # The latest settings win if several reloads come in before the next tick.
+        with self.settings_lock:
+            self.pending_settings = {
+                "markets": markets,
+                "chart_intervals": chart_intervals,
+                "top_report_intervals": top_report_intervals,
+                "top_pump_enabled": top_pump_enabled,
+                "top_dump_enabled": top_dump_enabled,
+                "additional_statistics_enabled": additional_statistics_enabled,
+                "no_of_reported_coins": no_of_reported_coins,
+                "dump_enabled": dump_enabled,
+                "check_new_listing_enabled": check_new_listing_enabled,
+                "top_report_nearest_hour": top_report_nearest_hour,
+            }
+
+    def apply_pending_settings(self, current_time):
+        with self.settings_lock:
+            settings = self.pending_settings
+            self.pending_settings = None
+
+        if settings is None:
+            return
+
+        self.top_pump_enabled = settings["top_pump_enabled"]
+        self.top_dump_enabled = settings["top_dump_enabled"]
+        self.additional_statistics_enabled = settings["additional_statistics_enabled"]
+        self.no_of_reported_coins = settings["no_of_reported_coins"]
+        self.dump_enabled = settings["dump_enabled"]
+        self.check_new_listing_enabled = settings["check_new_listing_enabled"]
+        self.top_report_intervals = self.create_top_report_intervals(
+            settings["top_report_intervals"],
+            settings["top_report_nearest_hour"],
+            int(current_time),
+            self.top_report_intervals,
+        )
+
+        # Histories are kept and only resized if the longest interval of a tier changed
+        self.chart_intervals = self.create_chart_intervals(settings["chart_intervals"])
+        for market, configured_market in zip(self.markets, settings["markets"]):
+            market.configure(
+                configured_market, self.chart_intervals, self.extract_interval
             )
-            return requests.get(api_url).json()
-        except Exception as e:
-            self.logger.error(
-                "Issue occurred while getting prices. Error: %s.",
-                e,
-                exc_info=True,
+            self.apply_symbol_filter(market)
+        if self.shard_pool is not None:
+            self.shard_pool.configure(self.chart_intervals, self.dump_enabled)
+
+        self.logger.info("Applied the reloaded config.")
+
+    def apply_symbol_filter(self, market):
+        # Symbols the filter does not allow anymore are muted, symbols it allows now are added
+        muted_rows = market.muted_rows
+        added_symbols = market.filter_symbols()
+
+        for symbol in added_symbols:
+            market.add_asset(symbol)
+
+        if market.muted_rows != muted_rows or len(added_symbols) > 0:
+            self.logger.info(
+                "Monitoring %i symbols of %s after the reload, %i added and %i muted.",
+                len(market.filtered_assets) - len(market.muted_rows),
+                market.name,
+                len(added_symbols),
+                len(market.muted_rows),
+            )
+
+    def collect_metrics(self, metrics):
+        metrics.set_gauge("alert_queue_depth", self.alert_renderer.queue_depth())
+        for market in self.markets:
+            metrics.set_gauge(
+                "monitored_symbols", len(market.filtered_assets), market=market.name
+            )
+            metrics.set_gauge(
+                "known_symbols", len(market.known_symbols), market=market.name
             )
-            sleep(5)  # Sleep 5s and try again
-            return self.retrieve_exchange_assets(api_url)
-
-    def is_symbol_valid(self, symbol, watchlist, blacklist, pairs_of_interest):
-        # Filter symbols in watchlist if set - This disables the pairsOfInterest feature
-        if len(watchlist) > 0:
-            if symbol not in watchlist:
-                self.logger.debug("Ignoring symbol not in watchlist: %s.", symbol)
-                return False
-            return True
-
-        # Filter symbols in blacklist if set - This DOES NOT IMPACT the pairsOfInterest feature
-        if len(blacklist) > 0:
-            if symbol in blacklist:
-                self.logger.info(
-                    "Ignoring symbol found in blacklist: %s.", symbol)
-                return False
-
-        # Filter pairsOfInterest to reduce the noise. E.g. BUSD, USDT, ETH, BTC
-        is_in_pairs_of_interest = False
-        for pair in pairs_of_interest:
-            if symbol.endswith(pair):
-                is_in_pairs_of_interest = True
-                break
-
-        if not is_in_pairs_of_interest:
-            self.logger.debug("Ignoring symbol not in pairsOfInterests: %s.", symbol)
-            return False
-
-        # Filter leverage symbols
-        for pair in pairs_of_interest:
-            coin = symbol.replace(pair, "")
-            if (
-                coin.endswith("UP")
-                or coin.endswith("DOWN")
-                or coin.endswith("BULL")
-                or coin.endswith("BEAR")
-            ):
-                self.logger.debug("Ignoring leverage symbol: %s.", symbol)
-                return False
 
-        return True
+        statistics = self.telegram.get_statistics()
+        if "pending_messages" in statistics:
+            metrics.set_gauge(
+                "notification_pending_messages", statistics["pending_messages"]
+            )
+        for sink, sink_statistics in statistics.get("sinks", {}).items():
+            for name, value in sink_statistics.items():
+                metrics.set_gauge("notification_" + name, value, sink=sink)
 
-    def filter_and_convert_assets(
-        self, exchange_assets, watchlist, blacklist, pairs_of_interest, chart_intervals
-    ):
-        filtered_assets = []
+        if self.fetcher is not None:
+            for host, weight_budget in self.fetcher.weight_budgets.items():
+                for name, value in weight_budget.get_statistics().items():
+                    metrics.set_gauge("request_" + name, value, host=host)
+
+    @staticmethod
+    def index_exchange_assets(exchange_assets):
+        # Build the symbol lookup once per tick instead of scanning the ticker list per asset
+        return {
+            exchange_asset["symbol"]: exchange_asset for exchange_asset in exchange_assets
+        }
+
+    @staticmethod
+    def extract_ticker_data(symbol, exchange_assets_by_symbol):
+        return exchange_assets_by_symbol.get(symbol)
 
+    def retrieve_exchange_assets(self, api_url, weight, decode=None, paced=False):
+        self.logger.debug(
+            "Retrieving price information from the ticker. ApiUrl: %s.", api_url
+        )
+        # Returns None once all retries failed or a paced request was skipped, the caller decides how to continue
+        return self.fetcher.fetch(api_url, decode=decode, weight=weight, paced=paced)
+
+    def retrieve_latest_assets(self, market):
+        # In streaming mode the latest stream prices are sampled at the extract interval
+        if market.stream is not None:
+            if market.stream.is_available():
+                return market.stream.snapshot()
+
+            # Polled while the stream is down, the stream continues from these prices once it is back
+            exchange_assets = self.retrieve_exchange_assets(
+                market.ticker_url, market.ticker_weight, paced=True
+            )
+            if exchange_assets is not None:
+                market.stream.seed(exchange_assets)
+            return exchange_assets
+
+        # Ticks slow down while the request weight budget is low rather than risk a ban
+        if market.ticker_decoder is not None:
+            return self.retrieve_exchange_assets(
+                market.ticker_url,
+                market.ticker_weight,
+                decode=market.ticker_decoder.decode,
+                paced=True,
+            )
+
+        return self.retrieve_exchange_assets(
+            market.ticker_url, market.ticker_weight, paced=True
+        )
+
+    def retrieve_initial_assets(self, market):
+        # Streams only push changed symbols, the full snapshot always comes from the ticker
+        return self.retrieve_exchange_assets(market.ticker_url, market.ticker_weight)
+
+    def retrieve_all_markets(self, markets, retrieve):
+        return list(self.market_executor.map(retrieve, markets))
+
+    def filter_and_convert_assets(self, exchange_assets, symbol_filter, market):
         for exchange_asset in exchange_assets:
             symbol = exchange_asset["symbol"]
 
-            if self.is_symbol_valid(symbol, watchlist, blacklist, pairs_of_interest):
-                filtered_assets.append(self.create_new_asset(symbol, chart_intervals))
+            if symbol_filter.is_symbol_valid(symbol):
+                market.add_asset(symbol)
                 self.logger.info("Adding symbol: %s.", symbol)
 
-        return filtered_assets
+        return market.filtered_assets
 
     def update_all_monitored_assets_and_send_news_messages(
         self,
-        monitored_assets,
-        exchange_assets,
+        market,
+        exchange_assets_by_symbol,
         current_time,
         dump_enabled,
-        chart_intervals,
-        extract_interval,
-        outlier_intervals,
     ):
-        for asset in monitored_assets:
-            exchange_asset = self.extract_ticker_data(asset["symbol"], exchange_assets)
-            asset["price"].append(float(exchange_asset["price"]))
-
-            self.calculate_asset_change(
-                asset,
-                chart_intervals,
-                extract_interval,
-            )
+        start = time.perf_counter()
 
-            self.report_generator.send_pump_dump_message(
-                asset,
-                chart_intervals,
-                outlier_intervals,
-                current_time,
-                dump_enabled,
-            )
+        prices = np.empty(market.rows)
+        volumes = np.empty(market.rows) if market.volume_enabled else None
+        for row, symbol in enumerate(market.filtered_assets.symbols):
+            exchange_asset = self.extract_ticker_data(symbol, exchange_assets_by_symbol)
 
-    def calculate_asset_change(
-        self,
-        asset,
-        chart_intervals,
-        extract_interval,
-    ):
-        asset_length = len(asset["price"])
-
-        for interval in chart_intervals:
-            data_points = chart_intervals[interval]["value"] // extract_interval
-
-            # If data is not enough yet after restart for interval, stop here.
-            if data_points >= asset_length:
+            # Symbol might have been delisted or is missing in this ticker response
+            if exchange_asset is None:
                 self.logger.debug(
-                    "Not enough datapoints (%s/%s) for interval: %s",
-                    asset_length,
-                    data_points,
-                    interval,
-                )
-                break
-
-            # Gets change in % from last alert trigger.
-            current_price = asset["price"][-1]
-            if current_price == 0:
-                self.logger.warning(
-                    "Received zero price for asset %s, skipping calculation",
-                    asset["symbol"]
+                    "No ticker data for symbol: %s. Reusing last price.", symbol
                 )
-                change = 0
+                prices[row] = np.nan
+                if volumes is not None:
+                    volumes[row] = np.nan
             else:
-                price_delta = current_price - asset["price"][-1 - data_points]
-                change = price_delta / current_price
-
-            self.logger.debug(
-                "Calculated asset: %s for interval: %s with change: %s",
-                asset["symbol"],
-                interval,
-                change,
+                prices[row] = float(exchange_asset[market.price_key])
+                if volumes is not None:
+                    volumes[row] = (
+                        float(exchange_asset["quoteVolume"])
+                        if "quoteVolume" in exchange_asset
+                        else np.nan
+                    )
+
+        self.metrics.observe_stage("prices", time.perf_counter() - start, market.name)
+
+        self.update_monitored_prices_and_send_news_messages(
+            market, prices, volumes, current_time, dump_enabled
+        )
+
+    @staticmethod
+    def symbol_positions(filtered_assets, symbols):
+        # Position of every monitored row in the symbols, -1 if the symbol is missing
+        positions = {symbol: position for position, symbol in enumerate(symbols)}
+        return np.array(
+            [positions.get(symbol, -1) for symbol in filtered_assets.symbols],
+            dtype=np.int64,
+        )
+
+    @staticmethod
+    def select_rows(values, positions):
+        row_values = np.full(len(positions), np.nan)
+        is_present = positions >= 0
+        row_values[is_present] = values[positions[is_present]]
+        return row_values
+
+    def index_ticker_columns(self, market, columns):
+        # Symbols of the ticker only change on listings and delistings, positions are kept until then
+        if (
+            columns.symbols != market.ticker_symbols
+            or len(market.ticker_positions) != len(market.filtered_assets)
+        ):
+            if self.check_new_listing_enabled:
+                with self.metrics.time_stage("listing", market.name):
+                    self.add_new_asset_listings(market, dict.fromkeys(columns.symbols))
+
+            market.ticker_symbols = columns.symbols
+            market.ticker_positions = self.symbol_positions(
+                market.filtered_assets, columns.symbols
             )
 
-            # Set last change for next interval iteration
-            asset[interval]["change_last"] = asset[interval]["change_current"]
+        return market.ticker_positions
 
-            # Stores change for the current interval into asset dict.
-            asset[interval]["change_current"] = change
+    def update_all_monitored_columns_and_send_news_messages(
+        self, market, columns, current_time, dump_enabled
+    ):
+        positions = self.index_ticker_columns(market, columns)
+
+        start = time.perf_counter()
+        prices = self.select_rows(columns.prices, positions)
+        volumes = (
+            self.select_rows(columns.volumes, positions)
+            if market.volume_enabled
+            else None
+        )
+        self.metrics.observe_stage("prices", time.perf_counter() - start, market.name)
 
-        return asset
+        self.update_monitored_prices_and_send_news_messages(
+            market, prices, volumes, current_time, dump_enabled
+        )
 
-    def reset_prices_data_when_due(
-        self,
-        initial_time,
-        current_time,
-        reset_interval,
-        extract_interval,
-        assets,
-        chart_intervals,
+    def update_monitored_prices_and_send_news_messages(
+        self, market, prices, volumes, current_time, dump_enabled
     ):
-        if current_time - initial_time > reset_interval:
+        # Prices and volumes are aligned with the rows of the market, NaN where no data was retrieved.
+        # Shard workers update their rows once the prices of all markets are published.
+        if self.shard_pool is not None:
+            self.shard_pool.publish(market, prices, volumes)
+            return
+
+        start = time.perf_counter()
+
+        outliers = market.update(prices, volumes, current_time, dump_enabled)
+        # Only symbols with at least one outlier interval go on to message building
+        events = [
+            market.alert_event(row, outliers)
+            for row in np.flatnonzero(outliers.any(axis=1))
+            if row not in market.muted_rows
+        ]
 
-            message = "Emptying price data to prevent memory errors."
-            self.logger.debug(message)
-            self.telegram.send_generic_message(message, is_alert_chat=True)
+        self.metrics.observe_stage("change", time.perf_counter() - start, market.name)
+        self.metrics.increment("outlier_symbols_total", len(events), market=market.name)
 
-            # Do not delete everything, only elements older than the last monitored interval
-            lastInterval = "1s"
-            for interval in chart_intervals:
-                lastInterval = interval
+        self.alert_renderer.put(
+            market, events, list(self.chart_intervals), current_time
+        )
 
-            data_points = chart_intervals[lastInterval]["value"] // extract_interval
+    def update_shards_and_send_news_messages(self, current_time):
+        start = time.perf_counter()
 
-            for asset in assets:
-                asset["price"] = asset["price"][-1 - data_points :]
+        all_events = self.shard_pool.run_tick(current_time)
+        self.metrics.observe_stage("shards", time.perf_counter() - start)
 
-            initial_time = current_time
+        for market, events in zip(self.markets, all_events):
+            if len(market.muted_rows) > 0:
+                events = [
+                    event for event in events if event.row not in market.muted_rows
+                ]
 
-        return initial_time
+            self.metrics.increment(
+                "outlier_symbols_total", len(events), market=market.name
+            )
+            self.alert_renderer.put(
+                market, events, list(self.chart_intervals), current_time
+            )
 
-    def add_new_asset_listings(
-        self,
-        initial_assets,
-        filtered_assets,
-        exchange_assets,
-        watchlist,
-        blacklist,
-        pairs_of_interest,
-        chart_intervals,
-    ):
+    def add_new_asset_listings(self, market, exchange_assets_by_symbol):
 
-        if len(initial_assets) >= len(exchange_assets):
-            # If initial_assets has more than assets we just ignore it
+        # Set difference on the dict keys, nearly free when nothing was listed
+        new_symbols = exchange_assets_by_symbol.keys() - market.known_symbols
+        if len(new_symbols) == 0:
             self.logger.debug("No new listing found.")
-            return filtered_assets
+            return market.filtered_assets
 
-        init_symbols = [asset["symbol"] for asset in initial_assets]
+        market.known_symbols |= new_symbols
+
+        # Keep the exchange order for the report
         retrieved_symbols_to_add = [
-            exchange_asset["symbol"]
-            for exchange_asset in exchange_assets
-            if exchange_asset["symbol"] not in init_symbols
+            symbol for symbol in exchange_assets_by_symbol if symbol in new_symbols
         ]
 
         self.logger.debug("New listings found: %s.", retrieved_symbols_to_add)
 
         filtered_symbols_to_add = []
         for symbol in retrieved_symbols_to_add:
-            if self.is_symbol_valid(symbol, watchlist, blacklist, pairs_of_interest):
+            if market.symbol_filter.is_symbol_valid(symbol):
                 filtered_symbols_to_add.append(symbol)
-                filtered_assets.append(self.create_new_asset(symbol, chart_intervals))
+                market.add_asset(symbol)
 
         self.logger.debug("Filtered new listings found: %s.", filtered_symbols_to_add)
 
         if len(filtered_symbols_to_add) > 0:
-            self.report_generator.send_new_listings(filtered_symbols_to_add)
+            self.report_generator.send_new_listings(market, filtered_symbols_to_add)
 
-        return filtered_assets
+        return market.filtered_assets
 
     def check_and_send_top_pump_dump_statistics_report(
         self,
-        assets,
+        markets,
         current_time,
         top_report_intervals,
         top_pump_enabled,
@@ -316,6 +468,7 @@ class BinancePumpAndDumpAlerter:
         no_of_reported_coins,
     ):
 
+        due_intervals = []
         for interval in top_report_intervals:
 
             if (
@@ -331,96 +484,206 @@ class BinancePumpAndDumpAlerter:
                 self.logger.debug(
                     "Sending out top pump dump report. Interval: %s.", interval
                 )
-
-                self.report_generator.send_top_pump_dump_statistics_report(
-                    assets,
-                    interval,
-                    top_pump_enabled,
-                    top_dump_enabled,
-                    additional_stats_enabled,
+                due_intervals.append(interval)
+
+        if len(due_intervals) == 0:
+            return
+
+        # One report scheduler for all markets, each market gets its own reports.
+        # Intervals due on the same tick are evaluated in one pass over the changes.
+        if self.shard_pool is not None:
+            summaries = self.shard_pool.summarize(due_intervals, no_of_reported_coins)
+        else:
+            summaries = [
+                self.report_generator.summarize_top_changes(
+                    market.filtered_assets,
+                    market.change_calculator.intervals_changes(
+                        due_intervals, len(market.filtered_assets)
+                    ),
                     no_of_reported_coins,
+                    excluded_rows=market.muted_rows,
                 )
+                for market in markets
+            ]
+
+        for market, summary in zip(markets, summaries):
+            self.report_generator.send_top_pump_dump_statistics_reports(
+                market,
+                summary,
+                due_intervals,
+                top_pump_enabled,
+                top_dump_enabled,
+                additional_stats_enabled,
+                no_of_reported_coins,
+            )
 
     def run(self):
 
-        initial_assets = self.retrieve_exchange_assets(self.api_url)
+        all_initial_assets = self.retrieve_all_markets(
+            self.markets, self.retrieve_initial_assets
+        )
 
-        filtered_assets = self.filter_and_convert_assets(
-            initial_assets,
-            self.watchlist,
-            self.blacklist,
-            self.pairs_of_interest,
-            self.chart_intervals,
+        for market, initial_assets in zip(self.markets, all_initial_assets):
+            while initial_assets is None:
+                self.logger.error(
+                    "Could not retrieve initial prices for %s. Trying again.",
+                    market.name,
+                )
+                sleep(self.extract_interval)
+                initial_assets = self.retrieve_initial_assets(market)
+
+            market.known_symbols = {asset["symbol"] for asset in initial_assets}
+            market.filtered_assets = self.filter_and_convert_assets(
+                initial_assets,
+                market.symbol_filter,
+                market,
+            )
+
+            if self.history_snapshot is not None:
+                self.history_snapshot.restore(
+                    market, time.time(), self.extract_interval
+                )
+
+            # Long intervals and top reports have data right away instead of after hours
+            if self.history_backfill is not None:
+                self.history_backfill.backfill(
+                    market, time.time(), self.extract_interval
+                )
+
+            if market.stream is not None:
+                market.stream.seed(initial_assets)
+                market.stream.start()
+
+        # Shard workers restore and backfill their own symbols
+        if self.shard_pool is not None:
+            self.shard_pool.prepare(time.time())
+
+        no_of_filtered_assets = sum(
+            len(market.filtered_assets) for market in self.markets
         )
 
         message = "*Bot has started.* Following _{0}_ pairs."
-        self.telegram.send_generic_message(message, len(filtered_assets))
+        self.telegram.send_generic_message(message, no_of_filtered_assets)
         if self.telegram.is_alert_chat_enabled():
             self.telegram.send_generic_message(
                 message,
-                len(filtered_assets),
+                no_of_filtered_assets,
                 is_alert_chat=True,
             )
 
+        try:
+            self.run_loop()
+        finally:
+            # Keep the latest ticks on shutdown as well, not only the ones of the last periodic snapshot
+            if self.history_snapshot is not None:
+                self.history_snapshot.save(
+                    self.markets, self.last_loop_time, self.extract_interval
+                )
+            if self.shard_pool is not None:
+                self.shard_pool.stop()
+            # Alerts already detected still go out
+            self.alert_renderer.close()
+
+    def run_loop(self):
+        # Ticks are stamped with the time of their slot, evenly spaced for the lookup of the windows by time
+        scheduler = TickScheduler(self.extract_interval)
         while True:
-            start_loop_time = time.time()
+            start_loop_time = scheduler.tick_time
             loop_time = int(start_loop_time)
 
-            exchange_assets = self.retrieve_exchange_assets(self.api_url)
+            self.apply_pending_settings(start_loop_time)
 
-            if self.check_new_listing_enabled:
-                filtered_assets = self.add_new_asset_listings(
-                    initial_assets,
-                    filtered_assets,
-                    exchange_assets,
-                    self.watchlist,
-                    self.blacklist,
-                    self.pairs_of_interest,
-                    self.chart_intervals,
+            all_exchange_assets = self.retrieve_all_markets(
+                self.markets, self.retrieve_latest_assets
+            )
+
+            for market, exchange_assets in zip(self.markets, all_exchange_assets):
+                if exchange_assets is None:
+                    self.logger.warning(
+                        "No price information retrieved for %s. Skipping tick.",
+                        market.name,
+                    )
+                    continue
+
+                # Decoded tickers skip the symbol index, rows are looked up by position
+                if isinstance(exchange_assets, TickerColumns):
+                    if self.tick_recorder is not None:
+                        self.tick_recorder.record_columns(
+                            market,
+                            start_loop_time,
+                            exchange_assets.symbols,
+                            exchange_assets.prices,
+                            exchange_assets.volumes,
+                        )
+
+                    self.update_all_monitored_columns_and_send_news_messages(
+                        market, exchange_assets, start_loop_time, self.dump_enabled
+                    )
+                    continue
+
+                if self.tick_recorder is not None:
+                    self.tick_recorder.record(market, start_loop_time, exchange_assets)
+
+                # Symbol index is shared by the listing check and the price update
+                exchange_assets_by_symbol = self.index_exchange_assets(exchange_assets)
+
+                if self.check_new_listing_enabled:
+                    with self.metrics.time_stage("listing", market.name):
+                        self.add_new_asset_listings(market, exchange_assets_by_symbol)
+
+                self.update_all_monitored_assets_and_send_news_messages(
+                    market,
+                    exchange_assets_by_symbol,
+                    start_loop_time,
+                    self.dump_enabled,
                 )
-                # Reset initial exchange asset
-                initial_assets = exchange_assets
 
-            self.update_all_monitored_assets_and_send_news_messages(
-                filtered_assets,
-                exchange_assets,
-                loop_time,
-                self.dump_enabled,
-                self.chart_intervals,
-                self.extract_interval,
-                self.outlier_intervals,
-            )
+            if self.shard_pool is not None:
+                self.update_shards_and_send_news_messages(start_loop_time)
 
-            self.check_and_send_top_pump_dump_statistics_report(
-                filtered_assets,
-                loop_time,
-                self.top_report_intervals,
-                self.top_pump_enabled,
-                self.top_dump_enabled,
-                self.additional_statistics_enabled,
-                self.no_of_reported_coins,
-            )
+            # Hand over all alerts of this tick at once, once they are rendered
+            self.alert_renderer.flush()
 
-            self.initial_time = self.reset_prices_data_when_due(
-                self.initial_time,
-                loop_time,
-                self.reset_interval,
-                self.extract_interval,
-                filtered_assets,
-                self.chart_intervals,
-            )
+            self.last_loop_time = start_loop_time
+            if self.history_snapshot is not None:
+                self.history_snapshot.save_when_due(
+                    self.markets, start_loop_time, self.extract_interval
+                )
 
-            # Sleeps for the remainder of 1s, or loops through if extraction takes longer
-            end_loop_time = time.time()
+            with self.metrics.time_stage("top_report"):
+                self.check_and_send_top_pump_dump_statistics_report(
+                    self.markets,
+                    loop_time,
+                    self.top_report_intervals,
+                    self.top_pump_enabled,
+                    self.top_dump_enabled,
+                    self.additional_statistics_enabled,
+                    self.no_of_reported_coins,
+                )
 
-            self.logger.info(
-                "Extracting loop started at %d and finished at %d. Taking %f seconds.",
-                start_loop_time,
-                end_loop_time,
-                end_loop_time - start_loop_time,
-            )
+            self.sleep_until_next_tick(scheduler, start_loop_time)
 
-            if end_loop_time < start_loop_time + self.extract_interval:
-                sleep_time = start_loop_time + self.extract_interval - end_loop_time
-                self.logger.debug("Now sleeping %f seconds.", sleep_time)
-                sleep(sleep_time)
+    def sleep_until_next_tick(self, scheduler, start_loop_time):
+        # Sleeps until the slot of the next tick, or skips the slots already over if extraction takes longer
+        loop_duration = scheduler.elapsed()
+
+        self.logger.info(
+            "Extracting loop started at %d and finished at %d. Taking %f seconds.",
+            start_loop_time,
+            start_loop_time + loop_duration,
+            loop_duration,
+        )
+
+        self.metrics.observe_stage("tick", loop_duration)
+        self.metrics.increment("ticks_total")
+        if loop_duration > self.extract_interval:
+            self.metrics.increment("tick_overruns_total")
+
+        missed_ticks = scheduler.wait_for_next_tick()
+        if missed_ticks > 0:
+            self.logger.warning(
+                "Extracting took %f seconds. Missed %i ticks.",
+                loop_duration,
+                missed_ticks,
+            )
+            self.metrics.increment("missed_ticks_total", missed_ticks)
@@ -0,0 +1,144 @@
+import numpy as np
+
+
+# Computes the price change of all symbols for all chart intervals at once.
+# Changes are kept in symbols x intervals matrices aligned with the PriceHistory rows.
+# Windows are found by the time of the ticks, an interval compares with the latest tick at least its length ago.
+class ChangeCalculator:
+    # Missed ticks may stretch a window by this share of the interval, longer gaps keep the previous change
+    MAX_WINDOW_STRETCH = 0.1
+    # Tick times are derived from the same start, rounding must not miss the tick right at the window start
+    TIME_TOLERANCE = 0.001
+
+    def __init__(
+        self,
+        chart_intervals,
+        outlier_intervals,
+        default_threshold=np.inf,
+        statistics=None,
+        z_score_threshold=None,
+    ):
+        self.intervals = list(chart_intervals)
+        self.columns = {interval: i for i, interval in enumerate(self.intervals)}
+
+        self.seconds = np.array(
+            [chart_intervals[interval]["value"] for interval in self.intervals],
+            dtype=np.float64,
+        )
+
+        # Intervals without an outlier value never trigger an alert by default
+        self.thresholds = np.array(
+            [
+                outlier_intervals.get(interval, default_threshold)
+                for interval in self.intervals
+            ]
+        )
+
+        # Optional RollingStatistics, outliers then need an unusual change for their symbol as well
+        self.statistics = statistics
+        self.z_score_threshold = z_score_threshold
+
+        self.change_current = np.zeros((0, len(self.intervals)))
+        self.change_last = np.zeros((0, len(self.intervals)))
+
+    def grow(self, rows):
+        if rows <= len(self.change_current):
+            return
+
+        capacity = max(rows, 2 * len(self.change_current))
+        for name in ("change_current", "change_last"):
+            changes = np.zeros((capacity, len(self.intervals)))
+            changes[: len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, changes)
+
+    def carry_over(self, previous):
+        # Takes the changes of the intervals kept from a previous configuration, new intervals start at zero
+        rows = len(previous.change_current)
+        self.grow(rows)
+
+        columns = [
+            (column, previous.columns[interval])
+            for interval, column in self.columns.items()
+            if interval in previous.columns
+        ]
+        for column, previous_column in columns:
+            self.change_current[:rows, column] = previous.change_current[
+                :, previous_column
+            ]
+            self.change_last[:rows, column] = previous.change_last[:, previous_column]
+
+        if self.statistics is not None and previous.statistics is not None:
+            self.statistics.carry_over(previous.statistics, columns)
+
+    def calculate(self, price_history):
+        rows = price_history.rows
+        self.grow(rows)
+
+        latest_tier = price_history.tiers[0]
+        current_column = (latest_tier.cursor - 1) % latest_tier.size
+        current_time = latest_tier.times[current_column]
+        current_prices = latest_tier.prices[:rows, current_column]
+
+        past_prices = np.empty((rows, len(self.intervals)))
+        is_valid = np.empty((rows, len(self.intervals)), dtype=bool)
+
+        # Every tier looks up the windows of its intervals, rollups are up to one bucket older than the window start
+        for tier, interval_columns in price_history.tier_intervals(self.seconds):
+            seconds = self.seconds[interval_columns]
+            window_starts = current_time - seconds
+            past_columns, past_times = tier.columns_at(
+                window_starts + self.TIME_TOLERANCE
+            )
+            past_prices[:, interval_columns] = tier.prices[:rows][:, past_columns]
+
+            # If data is not enough yet after restart for an interval, keep the previous change.
+            # Same if ticks were missed around the window start, the change would cover a longer time.
+            ticks_back = ((tier.cursor - 1) - past_columns) % tier.size
+            earliest_starts = (
+                window_starts - seconds * self.MAX_WINDOW_STRETCH - self.TIME_TOLERANCE
+            )
+            is_valid[:, interval_columns] = (
+                tier.counts[:rows, None] > ticks_back[None, :]
+            ) & (past_times >= earliest_starts)[None, :]
+
+        # Windows starting at a tick without a price, e.g. left empty by the backfill, keep the previous change
+        is_valid &= ~np.isnan(past_prices)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = (current_prices[:, None] - past_prices) / current_prices[:, None]
+
+        # Zero or missing prices do not produce a change
+        changes[~np.isfinite(changes)] = 0
+
+        change_current = self.change_current[:rows]
+        change_last = self.change_last[:rows]
+
+        # Set last change for next interval iteration
+        np.copyto(change_last, change_current, where=is_valid)
+        np.copyto(change_current, changes, where=is_valid)
+
+        if self.statistics is not None:
+            self.statistics.update(change_current, is_valid)
+
+        return change_current
+
+    def find_outliers(self, rows, dump_enabled):
+        change_current = self.change_current[:rows]
+
+        outliers = np.abs(change_current) >= self.thresholds
+        if not dump_enabled:
+            outliers &= change_current > 0
+        if self.statistics is not None:
+            outliers &= self.statistics.is_unusual(rows, self.z_score_threshold)
+
+        return outliers
+
+    def find_spikes(self, rows):
+        # Only increases count, used to confirm outliers with a volume spike
+        return self.change_current[:rows] >= self.thresholds
+
+    def interval_changes(self, interval, rows):
+        return self.change_current[:rows, self.columns[interval]]
+
+    def intervals_changes(self, intervals, rows):
+        return self.change_current[:rows, [self.columns[i] for i in intervals]]
@@ -0,0 +1,181 @@
+import logging
+import math
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from utils import TokenBucket
+
+
+# Fills the empty part of every price history tier from the klines endpoint before the first tick.
+# One request per symbol and kline interval, concurrent, and paced by the request weight budget of each market.
+class HistoryBackfill:
+    # Kline intervals supported by Spot and Futures in seconds, finest first
+    KLINE_INTERVALS = (
+        ("1m", 60),
+        ("3m", 180),
+        ("5m", 300),
+        ("15m", 900),
+        ("30m", 1800),
+        ("1h", 3600),
+        ("2h", 7200),
+        ("4h", 14400),
+        ("6h", 21600),
+        ("12h", 43200),
+        ("1d", 86400),
+    )
+    MAX_LIMIT = 1000
+
+    def __init__(self, fetcher, max_workers=50):
+        self.fetcher = fetcher
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="history-backfill"
+        )
+        self.weight_buckets = {}
+
+        self.logger = logging.getLogger("history-backfill")
+
+    @classmethod
+    def select_kline_interval(cls, window):
+        # Finest kline interval covering the window with a single request.
+        # Two more klines for the one the window starts in and the one still open.
+        for kline_interval, seconds in cls.KLINE_INTERVALS:
+            limit = math.ceil(window / seconds) + 2
+            if limit <= cls.MAX_LIMIT:
+                return kline_interval, seconds, limit
+
+        kline_interval, seconds = cls.KLINE_INTERVALS[-1]
+        return kline_interval, seconds, cls.MAX_LIMIT
+
+    @staticmethod
+    def request_weight(limit):
+        # Futures weights, Spot charges less or the same for every limit
+        if limit < 100:
+            return 1
+        if limit < 500:
+            return 2
+        if limit <= 1000:
+            return 5
+        return 10
+
+    def get_weight_bucket(self, market):
+        if market.name not in self.weight_buckets:
+            self.weight_buckets[market.name] = TokenBucket(
+                market.backfill_weight_per_minute / 60,
+                market.backfill_weight_per_minute,
+            )
+        return self.weight_buckets[market.name]
+
+    def fetch_klines(self, market, symbol, kline_interval, limit):
+        # Paced by the share of the backfill, the budget of the host keeps room for everything else
+        weight = self.request_weight(limit)
+        self.get_weight_bucket(market).acquire(weight)
+        return self.fetcher.fetch(
+            market.klines_url,
+            params={"symbol": symbol, "interval": kline_interval, "limit": limit},
+            weight=weight,
+        )
+
+    @staticmethod
+    def kline_open_times(tick_times, seconds):
+        # Open time of the last kline closed at or before every tick, never a price from after the tick.
+        # Klines close 1ms before the next one opens. Many ticks share a kline, so they are looked up once.
+        open_times = (np.floor((tick_times + 0.001) / seconds) - 1) * seconds
+        return np.unique(open_times, return_inverse=True)
+
+    @staticmethod
+    def step_fill(klines, open_times, tick_kline_indexes):
+        kline_open_times = np.array([kline[0] for kline in klines], dtype=np.float64)
+        closes = np.array([kline[4] for kline in klines], dtype=np.float64)
+
+        # Missing klines, e.g. during a trading halt, are filled with the previous close
+        indexes = np.searchsorted(kline_open_times / 1000, open_times, side="right") - 1
+        prices = closes[np.maximum(indexes, 0)]
+        # Symbol was not listed yet
+        prices[indexes < 0] = np.nan
+
+        return prices[tick_kline_indexes]
+
+    @staticmethod
+    def recent_ticks(tick_times, current_time, seconds):
+        # Ticks within one kline of the next append stay empty and fill up from the live ticks.
+        # Their close may be a whole kline older than the tick, short windows would compare with a stale price.
+        return tick_times > current_time - seconds - 0.001
+
+    @staticmethod
+    def tier_tick_times(tier, current_time, extract_interval):
+        # Ticks before the next append, oldest first. The next append is the tick at current_time.
+        ticks = np.arange(tier.size - 1, 0, -1)
+        if tier.resolution == extract_interval:
+            return current_time - extract_interval * ticks
+        # Rollups hold the start of every bucket before the current one
+        return (current_time // tier.resolution - ticks) * tier.resolution
+
+    def backfill(self, market, current_time, extract_interval):
+        if len(market.filtered_assets) == 0:
+            return
+
+        # Tiers sharing a kline interval are filled from the same request
+        tier_fills = []
+        kline_limits = {}
+        for tier in market.price_history.tiers:
+            tick_times = self.tier_tick_times(tier, current_time, extract_interval)
+            if len(tick_times) == 0:
+                continue
+
+            kline_interval, seconds, limit = self.select_kline_interval(
+                current_time - tick_times[0]
+            )
+            tier.fill_past_times(tick_times)
+            tier_fills.append(
+                (
+                    tier,
+                    kline_interval,
+                    self.kline_open_times(tick_times, seconds),
+                    self.recent_ticks(tick_times, current_time, seconds),
+                )
+            )
+            kline_limits[kline_interval] = max(
+                kline_limits.get(kline_interval, 0), limit
+            )
+
+        if len(tier_fills) == 0:
+            return
+
+        self.logger.info(
+            "Backfilling %i symbols of %s from %s klines.",
+            len(market.filtered_assets),
+            market.name,
+            ", ".join(
+                "{0} (limit: {1})".format(kline_interval, limit)
+                for kline_interval, limit in kline_limits.items()
+            ),
+        )
+
+        all_klines = self.executor.map(
+            lambda asset: {
+                kline_interval: self.fetch_klines(
+                    market, asset.symbol, kline_interval, limit
+                )
+                for kline_interval, limit in kline_limits.items()
+            },
+            market.filtered_assets,
+        )
+
+        backfilled_symbols = 0
+        for asset, klines in zip(market.filtered_assets, all_klines):
+            if not all(klines.values()):
+                self.logger.warning("No klines for symbol: %s.", asset.symbol)
+                continue
+
+            for tier, kline_interval, kline_indexes, recent_ticks in tier_fills:
+                prices = self.step_fill(klines[kline_interval], *kline_indexes)
+                prices[recent_ticks] = np.nan
+                tier.fill_past(asset.row, prices)
+            backfilled_symbols += 1
+
+        self.logger.info(
+            "Backfilled %i of %i symbols of %s.",
+            backfilled_symbols,
+            len(market.filtered_assets),
+            market.name,
+        )
@@ -0,0 +1,193 @@
+import glob
+import json
+import logging
+import numpy as np
+import os
+import re
+
+from .PriceHistory import PriceHistory
+
+
+# Keeps the price history of every market in memory-mapped files for a warm restart.
+# Saving flushes the mapped prices of every tier and writes the row symbols, cursors and time of the last tick
+# next to them.
+# On startup the previous files are moved aside, mapped read only and copied into the new rows by symbol.
+# They are only removed once restored, a start failing before restores them on the next one.
+class HistorySnapshot:
+    def __init__(self, directory, interval):
+        self.directory = directory
+        self.interval = interval
+        self.last_save_time = 0
+        self.previous_metadata = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.logger = logging.getLogger("history-snapshot")
+
+    def file_path(self, market, suffix):
+        name = re.sub("[^a-z0-9]+", "-", market.name.lower()).strip("-")
+        return os.path.join(self.directory, name + suffix)
+
+    def history_path(self, market, name):
+        return self.file_path(market, "-{0}.npy".format(name))
+
+    def history_files(self, market, suffix=""):
+        # Every tier and the times of its ticks, e.g. binance-spot-prices-60s-times.npy
+        paths = []
+        for name in ("prices", "volumes"):
+            prefix = os.path.splitext(self.history_path(market, name))[0]
+            paths += glob.glob(glob.escape(prefix) + "*.npy" + suffix)
+        return paths
+
+    @staticmethod
+    def histories(market):
+        histories = []
+        for name, history in (
+            ("prices", market.price_history),
+            ("volumes", market.volume_history),
+        ):
+            if history is not None:
+                histories += history.named_tiers(name)
+        return histories
+
+    @staticmethod
+    def missed_times(history, snapshot_time, current_time, extract_interval):
+        # The snapshot was taken right after a tick, the next tick is the first one written after the restart.
+        # Every tick in between stays empty, the backfill can fill these gaps.
+        if history.resolution == extract_interval:
+            missed_ticks = max(
+                0, int(round((current_time - snapshot_time) / extract_interval)) - 1
+            )
+            return snapshot_time + extract_interval * np.arange(1, missed_ticks + 1)
+
+        # Rollups miss every bucket between the one of the snapshot and the current one
+        return history.resolution * np.arange(
+            snapshot_time // history.resolution + 1,
+            current_time // history.resolution,
+        )
+
+    def prepare(self, market):
+        # Must run before the history is created, the live history is mapped to the same files
+        metadata_path = self.file_path(market, ".json")
+        if os.path.isfile(metadata_path):
+            # Metadata last, a crash in between still finds it and moves the remaining files
+            for path in self.history_files(market):
+                os.replace(path, path + ".previous")
+            os.replace(metadata_path, metadata_path + ".previous")
+        elif not os.path.isfile(metadata_path + ".previous"):
+            return
+
+        with open(metadata_path + ".previous", "r", encoding="utf-8") as metadata_file:
+            self.previous_metadata[market.name] = json.load(metadata_file)
+
+    def restore(self, market, current_time, extract_interval):
+        metadata = self.previous_metadata.pop(market.name, None)
+        if metadata is None:
+            return
+
+        self.restore_histories(market, metadata, current_time, extract_interval)
+
+        for path in self.history_files(market, ".previous"):
+            os.remove(path)
+        os.remove(self.file_path(market, ".json.previous"))
+
+    def restore_histories(self, market, metadata, current_time, extract_interval):
+        if (
+            "histories" not in metadata
+            or metadata["extractInterval"] != extract_interval
+        ):
+            self.logger.warning(
+                "Snapshot of %s is of an older version or extractInterval. Starting empty.",
+                market.name,
+            )
+            return
+
+        previous_rows = {symbol: row for row, symbol in enumerate(metadata["symbols"])}
+        restored_symbols = sum(
+            symbol in previous_rows for symbol in market.filtered_assets.symbols
+        )
+
+        for name, history in self.histories(market):
+            previous = metadata["histories"].get(name)
+            path = history.path + ".previous"
+            if (
+                previous is None
+                or previous["size"] != history.size
+                or not os.path.isfile(path)
+            ):
+                self.logger.warning(
+                    "Snapshot of %s does not match chartIntervals for %s. Starting it empty.",
+                    market.name,
+                    name,
+                )
+                continue
+
+            missed_times = self.missed_times(
+                history, metadata["time"], current_time, extract_interval
+            )
+            if len(missed_times) >= history.size:
+                self.logger.info(
+                    "Snapshot of %s is older than the intervals of %s. Starting it empty.",
+                    market.name,
+                    name,
+                )
+                continue
+
+            previous_prices = np.load(path, mmap_mode="r")
+            previous_counts = previous["counts"]
+
+            for asset in market.filtered_assets:
+                previous_row = previous_rows.get(asset.symbol)
+                if previous_row is None:
+                    continue
+
+                history.prices[asset.row] = previous_prices[previous_row]
+                history.counts[asset.row] = previous_counts[previous_row]
+
+            del previous_prices
+
+            history.times[:] = np.load(
+                PriceHistory.times_path(history.path) + ".previous"
+            )
+            history.cursor = previous["cursor"]
+            history.skip(missed_times)
+
+        self.logger.info(
+            "Restored history of %i symbols for %s. Snapshot is %i seconds old.",
+            restored_symbols,
+            market.name,
+            current_time - metadata["time"],
+        )
+
+    def save_when_due(self, markets, current_time, extract_interval):
+        if current_time - self.last_save_time >= self.interval:
+            self.save(markets, current_time, extract_interval)
+
+    def save(self, markets, current_time, extract_interval):
+        for market in markets:
+            histories = self.histories(market)
+            for _, history in histories:
+                history.flush()
+
+            metadata = {
+                "time": current_time,
+                "extractInterval": extract_interval,
+                "symbols": list(market.filtered_assets.symbols),
+                "histories": {
+                    name: {
+                        "size": history.size,
+                        "cursor": history.cursor,
+                        "counts": history.counts[: history.rows].tolist(),
+                    }
+                    for name, history in histories
+                },
+            }
+
+            # Written aside and renamed, a crash while saving keeps the previous metadata intact
+            metadata_path = self.file_path(market, ".json")
+            with open(metadata_path + ".tmp", "w", encoding="utf-8") as metadata_file:
+                json.dump(metadata, metadata_file)
+            os.replace(metadata_path + ".tmp", metadata_path)
+
+        self.last_save_time = current_time
+        self.logger.debug("Saved history snapshot at %d.", current_time)
@@ -0,0 +1,239 @@
+import numpy as np
+
+from .AlertEvent import AlertEvent
+from .AssetRegistry import AssetRegistry
+from .ChangeCalculator import ChangeCalculator
+from .RollingStatistics import RollingStatistics
+from .SymbolFilter import SymbolFilter
+from .TickerDecoder import TickerDecoder
+from .TieredHistory import TieredHistory
+
+
+# A single price source, e.g. Binance Spot or Binance Futures.
+# Every market keeps its own symbols, thresholds and price history, the tick clock is shared.
+class Market:
+    def __init__(
+        self,
+        name,
+        api_url,
+        trade_url,
+        watchlist,
+        blacklist,
+        pairs_of_interest,
+        outlier_intervals,
+        stream=None,
+        volume_enabled=False,
+        volume_api_url=None,
+        volume_outlier_intervals=None,
+        klines_url=None,
+        backfill_weight_per_minute=1200,
+        fast_decode_enabled=False,
+        z_score_threshold=None,
+        z_score_window=86400,
+        z_score_warmup=3600,
+        weight_limit_per_minute=6000,
+        ticker_weight=1,
+    ):
+        self.name = name
+        self.api_url = api_url
+        self.trade_url = trade_url
+        self.watchlist = watchlist
+        self.blacklist = blacklist
+        self.pairs_of_interest = pairs_of_interest
+        self.symbol_filter = SymbolFilter(watchlist, blacklist, pairs_of_interest)
+        self.outlier_intervals = outlier_intervals
+        self.stream = stream
+        self.volume_enabled = volume_enabled
+        self.volume_outlier_intervals = volume_outlier_intervals or {}
+        self.klines_url = klines_url
+        # Share of the request weight limit per minute the startup backfill may use
+        self.backfill_weight_per_minute = backfill_weight_per_minute
+        # Outliers need a change this many standard deviations from the mean of their symbol, None to disable
+        self.z_score_threshold = z_score_threshold
+        self.z_score_window = z_score_window
+        self.z_score_warmup = z_score_warmup
+        # Request weight limit of the host per minute and IP, shared by all requests to it
+        self.weight_limit_per_minute = weight_limit_per_minute
+        # Request weight of the ticker of all symbols polled every tick
+        self.ticker_weight = ticker_weight
+
+        # With volume enabled the 24hr ticker replaces the price ticker, one request per tick for both.
+        # Streams carry the volume already and keep the price ticker for the startup snapshot.
+        if volume_enabled and stream is None:
+            self.ticker_url = volume_api_url
+            self.price_key = "lastPrice"
+        else:
+            self.ticker_url = api_url
+            self.price_key = "price"
+
+        # Polled tickers can be decoded into columns directly, stream messages are parsed by the stream
+        self.ticker_decoder = None
+        if fast_decode_enabled and stream is None:
+            self.ticker_decoder = TickerDecoder(
+                self.price_key, "quoteVolume" if volume_enabled else None
+            )
+        # Symbols of the last decoded ticker and the position of every monitored row in them
+        self.ticker_symbols = None
+        self.ticker_positions = None
+
+        # Every symbol seen on the exchange so far, valid or not
+        self.known_symbols = set()
+        self.filtered_assets = AssetRegistry()
+        # Monitored rows, counted even if the history is kept by shard workers
+        self.rows = 0
+        # Rows of symbols the symbol filter does not allow anymore, their history is kept
+        self.muted_rows = set()
+
+        self.price_history = None
+        self.change_calculator = None
+        self.volume_history = None
+        self.volume_calculator = None
+
+    def create_history(self, chart_intervals, extract_interval, snapshot=None):
+        self.price_history = TieredHistory(
+            chart_intervals,
+            extract_interval,
+            path=snapshot.history_path(self, "prices")
+            if snapshot is not None
+            else None,
+        )
+        if self.volume_enabled:
+            self.volume_history = TieredHistory(
+                chart_intervals,
+                extract_interval,
+                path=snapshot.history_path(self, "volumes")
+                if snapshot is not None
+                else None,
+            )
+
+        self.create_calculators(chart_intervals, extract_interval)
+
+    def create_calculators(self, chart_intervals, extract_interval):
+        self.change_calculator = ChangeCalculator(
+            chart_intervals,
+            self.outlier_intervals,
+            statistics=RollingStatistics(
+                len(chart_intervals),
+                extract_interval,
+                self.z_score_window,
+                self.z_score_warmup,
+            )
+            if self.z_score_threshold is not None
+            else None,
+            z_score_threshold=self.z_score_threshold,
+        )
+
+        if self.volume_enabled:
+            # Intervals without a volume threshold do not require a volume spike
+            self.volume_calculator = ChangeCalculator(
+                chart_intervals,
+                self.volume_outlier_intervals,
+                default_threshold=-np.inf,
+            )
+
+    def configure(self, market, chart_intervals, extract_interval):
+        # Takes the settings of a market created from a reloaded config, the history is kept.
+        # The source of the prices, e.g. the urls, the stream or the volume, only changes on restart.
+        self.trade_url = market.trade_url
+        self.watchlist = market.watchlist
+        self.blacklist = market.blacklist
+        self.pairs_of_interest = market.pairs_of_interest
+        self.symbol_filter = market.symbol_filter
+        self.outlier_intervals = market.outlier_intervals
+        self.volume_outlier_intervals = market.volume_outlier_intervals
+        self.z_score_threshold = market.z_score_threshold
+        self.z_score_window = market.z_score_window
+        self.z_score_warmup = market.z_score_warmup
+
+        # Histories are kept by the shard workers if there is none
+        if self.price_history is None:
+            return
+
+        self.price_history.resize(chart_intervals)
+        if self.volume_history is not None:
+            self.volume_history.resize(chart_intervals)
+
+        change_calculator = self.change_calculator
+        volume_calculator = self.volume_calculator
+        self.create_calculators(chart_intervals, extract_interval)
+        self.change_calculator.carry_over(change_calculator)
+        if volume_calculator is not None:
+            self.volume_calculator.carry_over(volume_calculator)
+
+    def filter_symbols(self):
+        # Mutes the rows the symbol filter does not allow anymore and returns the known symbols it allows now
+        self.muted_rows = {
+            row
+            for row, symbol in enumerate(self.filtered_assets.symbols)
+            if not self.symbol_filter.is_symbol_valid(symbol)
+        }
+
+        return sorted(
+            symbol
+            for symbol in self.known_symbols - self.filtered_assets.rows.keys()
+            if self.symbol_filter.is_symbol_valid(symbol)
+        )
+
+    def add_asset(self, symbol):
+        self.filtered_assets.add(symbol)
+        return self.add_row()
+
+    def add_row(self):
+        row = self.rows
+        self.rows += 1
+
+        if self.price_history is not None:
+            self.price_history.add_row()
+        if self.volume_history is not None:
+            self.volume_history.add_row()
+        return row
+
+    @staticmethod
+    def carry_forward(history, values):
+        # Carry the last value forward for missing ones to keep the data points aligned with time
+        missing_rows = np.flatnonzero(np.isnan(values))
+        if len(missing_rows) > 0:
+            values[missing_rows] = history.latest(missing_rows)
+        return values
+
+    def update(self, prices, volumes, current_time, dump_enabled):
+        # Prices and volumes are aligned with the rows, NaN where no data was retrieved.
+        # Returns the outlier intervals of every row.
+        self.price_history.append(
+            self.carry_forward(self.price_history, prices), current_time
+        )
+
+        self.change_calculator.calculate(self.price_history)
+        outliers = self.change_calculator.find_outliers(self.rows, dump_enabled)
+
+        # Volume is tracked like prices, outliers need a volume spike where a threshold is set
+        if self.volume_history is not None:
+            self.volume_history.append(
+                self.carry_forward(self.volume_history, volumes), current_time
+            )
+            self.volume_calculator.calculate(self.volume_history)
+            outliers &= self.volume_calculator.find_spikes(self.rows)
+
+        return outliers
+
+    def alert_event(self, row, outliers):
+        return AlertEvent(
+            row,
+            self.filtered_assets.symbols[row],
+            self.price_history.latest(row),
+            self.change_calculator.change_current[row].copy(),
+            self.change_calculator.change_last[row].copy(),
+            outliers[row].copy(),
+            volume=self.volume_history.latest(row)
+            if self.volume_history is not None
+            else None,
+            volume_changes=self.volume_calculator.change_current[row].copy()
+            if self.volume_calculator is not None
+            else None,
+            z_scores=self.change_calculator.statistics.z_scores[row].copy()
+            if self.change_calculator.statistics is not None
+            else None,
+        )
+
+    def get_trade_url(self, symbol):
+        return self.trade_url.format(symbol)
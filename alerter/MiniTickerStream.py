@@ -0,0 +1,146 @@
+import json
+import logging
+import random
+import threading
+import time
+import websocket
+
+from time import sleep
+
+
+# Consumes the all market mini ticker stream and keeps the latest price per symbol.
+# The alerter samples the latest prices at its own fixed cadence via snapshot().
+# Reconnects back off exponentially while the stream keeps failing, the alerter polls the ticker meanwhile.
+class MiniTickerStream:
+    def __init__(
+        self,
+        stream_url,
+        ping_interval=30,
+        ping_timeout=10,
+        stale_timeout=60,
+        reconnect_interval=5,
+        max_reconnect_interval=60,
+    ):
+        self.stream_url = stream_url
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.stale_timeout = stale_timeout
+        self.reconnect_interval = reconnect_interval
+        self.max_reconnect_interval = max_reconnect_interval
+
+        self.latest_assets = {}
+        self.lock = threading.Lock()
+
+        self.ws = None
+        self.last_message_time = 0
+        self.is_connected = False
+        # Connections in a row which ended without a message, reset by the first message
+        self.failed_connections = 0
+        self.is_running = False
+        self.thread = None
+
+        self.logger = logging.getLogger("mini-ticker-stream")
+
+    def seed(self, exchange_assets):
+        # Stream only pushes symbols which changed, start from a full ticker snapshot
+        with self.lock:
+            for exchange_asset in exchange_assets:
+                self.latest_assets[exchange_asset["symbol"]] = exchange_asset
+
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(
+            target=self.run_forever, name="mini-ticker-stream", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        if self.ws is not None:
+            self.ws.close()
+
+    def reconnect_delay(self):
+        delay = min(
+            self.max_reconnect_interval,
+            self.reconnect_interval * 2**self.failed_connections,
+        )
+        # Jitter avoids all instances reconnecting in lockstep after an outage of the stream
+        return random.uniform(delay / 2, delay)
+
+    def run_forever(self):
+        while self.is_running:
+            self.logger.info("Connecting to stream. StreamUrl: %s.", self.stream_url)
+
+            self.ws = websocket.WebSocketApp(
+                self.stream_url,
+                on_open=self.on_open,
+                on_message=self.on_message,
+                on_error=self.on_error,
+                on_close=self.on_close,
+            )
+            self.ws.run_forever(
+                ping_interval=self.ping_interval, ping_timeout=self.ping_timeout
+            )
+            self.is_connected = False
+
+            if self.is_running:
+                delay = self.reconnect_delay()
+                self.failed_connections += 1
+                self.logger.warning(
+                    "Stream disconnected. Reconnecting in %f seconds.", delay
+                )
+                sleep(delay)
+
+    def on_open(self, ws):
+        self.logger.info("Stream connected.")
+        self.last_message_time = time.monotonic()
+        self.is_connected = True
+
+    def on_message(self, ws, message):
+        self.last_message_time = time.monotonic()
+        self.failed_connections = 0
+
+        try:
+            tickers = json.loads(message)
+        except ValueError as e:
+            self.logger.error("Could not parse stream message. Error: %s.", e)
+            return
+
+        # Single stream messages are a list, combined stream messages are wrapped in data
+        if isinstance(tickers, dict):
+            tickers = tickers.get("data", [])
+
+        with self.lock:
+            for ticker in tickers:
+                self.latest_assets[ticker["s"]] = {
+                    "symbol": ticker["s"],
+                    "price": ticker["c"],
+                    "quoteVolume": ticker["q"],
+                }
+
+    def on_error(self, ws, error):
+        self.logger.error("Stream error occurred. Error: %s.", error)
+
+    def on_close(self, ws, close_status_code, close_message):
+        self.logger.info(
+            "Stream closed. Code: %s. Message: %s.", close_status_code, close_message
+        )
+
+    def is_stale(self):
+        return time.monotonic() - self.last_message_time > self.stale_timeout
+
+    def is_available(self):
+        # Heartbeat: force a reconnect if the connection is open but silent
+        if self.is_connected and self.is_stale():
+            self.logger.warning(
+                "No stream message since %i seconds. Forcing reconnect.",
+                self.stale_timeout,
+            )
+            self.is_connected = False
+            self.ws.close()
+
+        return self.is_connected
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.latest_assets.values())
@@ -0,0 +1,179 @@
+import numpy as np
+import os
+
+
+# Fixed size circular price store, one row per symbol and one column per tick.
+# Every column carries the time of its tick, windows are looked up by time so missed ticks do not shift them.
+# Memory is allocated upfront and stays flat no matter how long the bot is running.
+# With a path the prices live in a memory-mapped .npy file, a snapshot is then just a flush.
+class PriceHistory:
+    def __init__(self, size, capacity=256, path=None, resolution=1):
+        self.size = size
+        self.path = path
+        # Seconds between the ticks of the columns
+        self.resolution = resolution
+        self.prices = self.allocate(capacity, path)
+        self.times = self.allocate_times(path)
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.rows = 0
+        # Column which will be written on the next append
+        self.cursor = 0
+
+    def allocate(self, capacity, path):
+        if path is None:
+            return np.full((capacity, self.size), np.nan)
+
+        prices = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.float64, shape=(capacity, self.size)
+        )
+        prices[:] = np.nan
+        return prices
+
+    @staticmethod
+    def times_path(path):
+        return os.path.splitext(path)[0] + "-times.npy"
+
+    def allocate_times(self, path):
+        # Columns without a tick are the oldest, -inf keeps the times sorted from the cursor on
+        if path is None:
+            return np.full(self.size, -np.inf)
+
+        times = np.lib.format.open_memmap(
+            self.times_path(path), mode="w+", dtype=np.float64, shape=(self.size,)
+        )
+        times[:] = -np.inf
+        return times
+
+    def add_row(self):
+        if self.rows == len(self.prices):
+            self.grow(2 * len(self.prices))
+
+        row = self.rows
+        self.rows += 1
+
+        self.prices[row] = np.nan
+        self.counts[row] = 0
+
+        return row
+
+    def grow(self, capacity):
+        # A mapped file cannot be resized in place, the bigger one is written next to it and swapped in
+        path = None if self.path is None else self.path + ".grow"
+        prices = self.allocate(capacity, path)
+        prices[: self.rows] = self.prices[: self.rows]
+        counts = np.zeros(capacity, dtype=np.int64)
+        counts[: self.rows] = self.counts[: self.rows]
+
+        if path is not None:
+            prices.flush()
+            os.replace(path, self.path)
+
+        self.prices = prices
+        self.counts = counts
+
+    def resize(self, size):
+        # Keeps the latest ticks, oldest first from the first column on, the cursor follows the newest one
+        kept = min(self.size, size)
+        columns = (self.cursor - kept + np.arange(kept)) % self.size
+        previous_prices = self.prices
+        previous_times = self.times
+
+        self.size = size
+        path = None if self.path is None else self.path + ".resize"
+        prices = self.allocate(len(previous_prices), path)
+        times = self.allocate_times(path)
+        prices[: self.rows, :kept] = previous_prices[: self.rows][:, columns]
+        times[:kept] = previous_times[columns]
+
+        if path is not None:
+            prices.flush()
+            times.flush()
+            os.replace(path, self.path)
+            os.replace(self.times_path(path), self.times_path(self.path))
+
+        self.prices = prices
+        self.times = times
+        self.counts = np.minimum(self.counts, size)
+        self.cursor = kept % size
+
+    def flush(self):
+        if self.path is not None:
+            self.prices.flush()
+            self.times.flush()
+
+    def append(self, prices, current_time):
+        # Prices are aligned with the rows, one value per row for the current tick.
+        # Times never go backwards, the lookup by time relies on them being sorted.
+        self.prices[: self.rows, self.cursor] = prices
+        self.times[self.cursor] = max(current_time, self.latest_time())
+        self.counts[: self.rows] = np.minimum(self.counts[: self.rows] + 1, self.size)
+        self.cursor = (self.cursor + 1) % self.size
+
+    def skip(self, times):
+        # Ticks without any data at the given times, e.g. while the bot was down.
+        # Leaves gaps the backfill can fill instead of shifting older prices.
+        ticks = len(times)
+        if ticks >= self.size:
+            self.prices[: self.rows] = np.nan
+            self.times[:] = -np.inf
+            self.counts[: self.rows] = 0
+            return
+
+        columns = (self.cursor + np.arange(ticks)) % self.size
+        self.prices[: self.rows, columns] = np.nan
+        self.times[columns] = times
+        self.counts[: self.rows] = np.where(
+            self.counts[: self.rows] > 0,
+            np.minimum(self.counts[: self.rows] + ticks, self.size),
+            0,
+        )
+        self.cursor = (self.cursor + ticks) % self.size
+
+    def past_columns(self, ticks):
+        # Columns of the ticks before the cursor as at most two slices, oldest first
+        first = (self.cursor - ticks) % self.size
+        head = min(ticks, self.size - first)
+        return (
+            (slice(first, first + head), 0, head),
+            (slice(0, ticks - head), head, ticks),
+        )
+
+    def fill_past_times(self, times):
+        # Times of the ticks before the cursor, oldest first. Only columns without a tick get a time.
+        for columns, start, end in self.past_columns(len(times)):
+            stored = self.times[columns]
+            np.copyto(stored, times[start:end], where=np.isneginf(stored))
+
+    def fill_past(self, row, prices):
+        # Prices of the ticks before the cursor, oldest first. Stored prices are kept, only gaps are filled.
+        ticks = len(prices)
+        for columns, start, end in self.past_columns(ticks):
+            stored = self.prices[row, columns]
+            np.copyto(stored, prices[start:end], where=np.isnan(stored))
+
+        # Data points are counted from the oldest tick with a price
+        available = ~np.isnan(prices)
+        if available.any():
+            self.counts[row] = max(self.counts[row], ticks - np.argmax(available))
+
+    def length(self, row):
+        return self.counts[row]
+
+    def latest(self, row):
+        return self.prices[row, (self.cursor - 1) % self.size]
+
+    def latest_time(self):
+        return self.times[(self.cursor - 1) % self.size]
+
+    def lookback(self, row, data_points):
+        return self.prices[row, (self.cursor - 1 - data_points) % self.size]
+
+    def columns_at(self, times):
+        # Latest column with a tick at or before each of the times, and the time of that tick or -inf if none.
+        # The ring holds two runs sorted by time, from the cursor to the end and from the start to the cursor.
+        newer = np.searchsorted(self.times[: self.cursor], times, side="right")
+        older = np.searchsorted(self.times[self.cursor :], times, side="right")
+
+        columns = np.where(newer > 0, newer - 1, (self.cursor + older - 1) % self.size)
+        column_times = np.where((newer > 0) | (older > 0), self.times[columns], -np.inf)
+        return columns, column_times
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+# Exponentially weighted mean and variance of the changes of every symbol and interval, updated in O(1) per tick.
+# Recent ticks weigh most, a tick of age window has 1/e of the weight of the latest one.
+# The z-score tells how unusual a change is for its symbol: a 2% move is noise for some and rare for others.
+class RollingStatistics:
+    def __init__(self, columns, extract_interval, window, warmup):
+        self.columns = columns
+        # Weight of the latest sample, the same decay for every tick length
+        self.alpha = 1 - np.exp(-extract_interval / window)
+        # Samples a row needs before its z-scores are used
+        self.warmup_samples = max(1, int(round(warmup / extract_interval)))
+
+        self.mean = np.zeros((0, columns))
+        self.variance = np.zeros((0, columns))
+        self.samples = np.zeros((0, columns), dtype=np.int64)
+        self.z_scores = np.zeros((0, columns))
+
+    def grow(self, rows):
+        if rows <= len(self.mean):
+            return
+
+        capacity = max(rows, 2 * len(self.mean))
+        for name in ("mean", "variance", "samples", "z_scores"):
+            values = np.zeros((capacity, self.columns), dtype=getattr(self, name).dtype)
+            values[: len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, values)
+
+    def carry_over(self, previous, columns):
+        # Takes the statistics of the columns kept from a previous configuration, by new and previous column
+        rows = len(previous.mean)
+        self.grow(rows)
+
+        for name in ("mean", "variance", "samples", "z_scores"):
+            for column, previous_column in columns:
+                getattr(self, name)[:rows, column] = getattr(previous, name)[
+                    :, previous_column
+                ]
+
+    def update(self, changes, is_valid):
+        # Scores the changes against the statistics so far, then adds the valid ones.
+        # A spike must not raise the variance it is measured against.
+        rows = len(changes)
+        self.grow(rows)
+
+        mean = self.mean[:rows]
+        variance = self.variance[:rows]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z_scores = (changes - mean) / np.sqrt(variance)
+        # No spread yet, e.g. a constant price, any move is unusual and none is not
+        is_flat = variance == 0
+        z_scores[is_flat] = np.where(changes[is_flat] == mean[is_flat], 0, np.inf)
+        self.z_scores[:rows] = z_scores
+
+        # Incremental update of the exponentially weighted mean and variance (West 1979)
+        difference = changes - mean
+        increment = self.alpha * difference
+        np.copyto(mean, mean + increment, where=is_valid)
+        np.copyto(
+            variance,
+            (1 - self.alpha) * (variance + difference * increment),
+            where=is_valid,
+        )
+        self.samples[:rows] += is_valid
+
+    def is_unusual(self, rows, z_score_threshold):
+        # Rows still warming up are not filtered, the fixed thresholds alone decide
+        return (self.samples[:rows] < self.warmup_samples) | (
+            np.abs(self.z_scores[:rows]) >= z_score_threshold
+        )
@@ -0,0 +1,231 @@
+import logging
+import multiprocessing
+import numpy as np
+
+from multiprocessing import shared_memory
+from reporter import ReportGenerator
+
+from .ShardWorker import ShardWorker
+
+
+# Spreads the monitored symbols of every market over worker processes, one shard per worker.
+# Prices are fetched once and published per tick in shared memory, all workers update their
+# shard at the same time and send back their alert events. Top reports merge the top of every shard.
+class ShardPool:
+    MIN_CAPACITY = 256
+
+    def __init__(
+        self,
+        workers,
+        snapshot_directory=None,
+        snapshot_interval=60,
+        backfill_concurrency=None,
+        retry_interval=5,
+    ):
+        self.workers = workers
+        self.snapshot_directory = snapshot_directory
+        self.snapshot_interval = snapshot_interval
+        self.backfill_concurrency = backfill_concurrency
+        self.retry_interval = retry_interval
+
+        self.markets = []
+        self.market_states = []
+        self.processes = []
+        self.connections = []
+
+        self.logger = logging.getLogger("shard-pool")
+
+    @staticmethod
+    def market_arguments(market, workers):
+        # Markets are created again in the workers, without stream and ticker
+        return {
+            "name": market.name,
+            "api_url": market.api_url,
+            "trade_url": market.trade_url,
+            "watchlist": market.watchlist,
+            "blacklist": market.blacklist,
+            "pairs_of_interest": market.pairs_of_interest,
+            "outlier_intervals": market.outlier_intervals,
+            "volume_enabled": market.volume_enabled,
+            "volume_outlier_intervals": market.volume_outlier_intervals,
+            "klines_url": market.klines_url,
+            # Every worker backfills its own symbols, the request weight is shared
+            "backfill_weight_per_minute": market.backfill_weight_per_minute / workers,
+            # The limit is per IP, the headers tell every worker the weight used by all of them
+            "weight_limit_per_minute": market.weight_limit_per_minute,
+            "z_score_threshold": market.z_score_threshold,
+            "z_score_window": market.z_score_window,
+            "z_score_warmup": market.z_score_warmup,
+        }
+
+    def start(self, markets, chart_intervals, extract_interval, dump_enabled):
+        self.markets = markets
+        self.market_states = [
+            {"memory": None, "values": None, "sent_rows": 0, "published": False}
+            for _ in markets
+        ]
+
+        # Spawned, the coordinator already runs threads which must not be forked
+        context = multiprocessing.get_context("spawn")
+        for shard in range(self.workers):
+            worker = ShardWorker(
+                shard,
+                self.workers,
+                [self.market_arguments(market, self.workers) for market in markets],
+                chart_intervals,
+                extract_interval,
+                dump_enabled,
+                log_level=logging.getLogger().getEffectiveLevel(),
+                snapshot_directory=self.snapshot_directory,
+                snapshot_interval=self.snapshot_interval,
+                backfill_concurrency=self.backfill_concurrency,
+                retry_interval=self.retry_interval,
+            )
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=worker.run,
+                args=(worker_connection,),
+                name="shard-{0}".format(shard),
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+
+            self.processes.append(process)
+            self.connections.append(connection)
+
+        self.logger.info("Started %i shard workers.", self.workers)
+
+    def request(self, command, *args):
+        # Sent to all workers first, they work in parallel while the replies are collected
+        for connection in self.connections:
+            connection.send((command, args))
+
+        replies = []
+        for shard, connection in enumerate(self.connections):
+            try:
+                replies.append(connection.recv())
+            except (EOFError, OSError):
+                raise RuntimeError("Shard worker {0} stopped.".format(shard))
+        return replies
+
+    def new_symbols(self, market, state):
+        # Symbols added since the last request, the workers keep the ones of their shard
+        first_row = state["sent_rows"]
+        state["sent_rows"] = len(market.filtered_assets)
+        return first_row, market.filtered_assets.symbols[first_row:]
+
+    def prepare(self, current_time):
+        # Initial symbols, the workers restore their snapshot and backfill before the first tick
+        all_symbols = [
+            self.new_symbols(market, state)[1]
+            for market, state in zip(self.markets, self.market_states)
+        ]
+        all_rows = self.request("prepare", current_time, all_symbols)
+
+        for market, rows in zip(self.markets, zip(*all_rows)):
+            self.logger.info(
+                "Symbols of %s per shard: %s.",
+                market.name,
+                ", ".join(str(shard_rows) for shard_rows in rows),
+            )
+
+    def allocate(self, state, rows):
+        # Replaced by a bigger one when rows are added, the workers attach to the new one on the next tick
+        capacity = len(state["values"][0]) if state["values"] is not None else 0
+        if rows <= capacity:
+            return state["values"]
+
+        capacity = max(self.MIN_CAPACITY, rows, 2 * capacity)
+        memory = shared_memory.SharedMemory(create=True, size=2 * capacity * 8)
+        self.release(state)
+
+        state["memory"] = memory
+        state["values"] = np.ndarray((2, capacity), dtype=np.float64, buffer=memory.buf)
+        return state["values"]
+
+    @staticmethod
+    def release(state):
+        if state["memory"] is not None:
+            state["values"] = None
+            state["memory"].close()
+            state["memory"].unlink()
+            state["memory"] = None
+
+    def publish(self, market, prices, volumes):
+        # Prices and volumes are aligned with the rows of the market, NaN where no data was retrieved
+        state = self.market_states[self.markets.index(market)]
+        values = self.allocate(state, market.rows)
+
+        values[0, : market.rows] = prices
+        if volumes is not None:
+            values[1, : market.rows] = volumes
+        state["published"] = True
+
+    def run_tick(self, current_time):
+        # Alert events of every market in the order of its rows, markets without prices are skipped
+        updates = []
+        for i, (market, state) in enumerate(zip(self.markets, self.market_states)):
+            if not state["published"]:
+                continue
+
+            first_row, symbols = self.new_symbols(market, state)
+            updates.append(
+                {
+                    "market": i,
+                    "memory": state["memory"].name,
+                    "capacity": len(state["values"][0]),
+                    "rows": market.rows,
+                    "first_row": first_row,
+                    "symbols": symbols,
+                }
+            )
+            state["published"] = False
+
+        all_events = [[] for _ in self.markets]
+        for shard_events in self.request("tick", current_time, updates):
+            for update, events in zip(updates, shard_events):
+                all_events[update["market"]] += events
+
+        for events in all_events:
+            events.sort(key=lambda event: event.row)
+        return all_events
+
+    def configure(self, chart_intervals, dump_enabled):
+        # Settings of a reloaded config, applied by the workers before the next tick
+        self.request(
+            "configure",
+            [self.market_arguments(market, self.workers) for market in self.markets],
+            chart_intervals,
+            dump_enabled,
+        )
+
+    def summarize(self, intervals, no_of_reported_coins):
+        # Top report summaries of every market, merged over the shards
+        all_summaries = self.request(
+            "summarize",
+            intervals,
+            no_of_reported_coins,
+            [market.muted_rows for market in self.markets],
+        )
+        return [
+            ReportGenerator.merge_top_summaries(list(summaries), no_of_reported_coins)
+            for summaries in zip(*all_summaries)
+        ]
+
+    def stop(self):
+        # Workers save their snapshot before they exit
+        for connection in self.connections:
+            try:
+                connection.send(("stop", ()))
+            except (BrokenPipeError, OSError):
+                pass
+
+        for process in self.processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                self.logger.warning("Shard worker %s did not stop.", process.name)
+                process.terminate()
+
+        for state in self.market_states:
+            self.release(state)
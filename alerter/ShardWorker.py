@@ -0,0 +1,232 @@
+import logging
+import numpy as np
+import os
+import signal
+import sys
+
+from multiprocessing import resource_tracker, shared_memory
+from reporter import ReportGenerator
+
+from .HistoryBackfill import HistoryBackfill
+from .HistorySnapshot import HistorySnapshot
+from .Market import Market
+from .TickerFetcher import TickerFetcher
+
+
+# Keeps the history of one shard of the monitored symbols in its own process.
+# Rows are dealt round robin, row r of a market is row r // shards of shard r % shards.
+# Prices of every tick are read from the shared memory of the coordinator, only alert events
+# and top report summaries are sent back.
+class ShardWorker:
+    def __init__(
+        self,
+        shard,
+        no_of_shards,
+        market_arguments,
+        chart_intervals,
+        extract_interval,
+        dump_enabled,
+        log_level=logging.INFO,
+        snapshot_directory=None,
+        snapshot_interval=60,
+        backfill_concurrency=None,
+        retry_interval=5,
+    ):
+        self.shard = shard
+        self.no_of_shards = no_of_shards
+        self.market_arguments = market_arguments
+        self.chart_intervals = chart_intervals
+        self.extract_interval = extract_interval
+        self.dump_enabled = dump_enabled
+        self.log_level = log_level
+        self.snapshot_directory = snapshot_directory
+        self.snapshot_interval = snapshot_interval
+        self.backfill_concurrency = backfill_concurrency
+        self.retry_interval = retry_interval
+
+        # Created in the worker process
+        self.markets = []
+        # Shared memory and prices of every market, by market index
+        self.memories = {}
+        self.history_snapshot = None
+        self.history_backfill = None
+        self.last_tick_time = None
+
+    def run(self, connection):
+        # Ctrl+C and the SIGTERM of a supervisor can reach the whole process group, the coordinator stops the workers
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        logging.basicConfig(level=self.log_level)
+        self.logger = logging.getLogger("shard-worker")
+
+        try:
+            self.create_markets()
+            self.serve(connection)
+        except Exception:
+            self.logger.exception("Shard %i stopped.", self.shard)
+        finally:
+            # Keep the latest ticks on shutdown as well, not only the ones of the last periodic snapshot
+            if self.history_snapshot is not None and self.last_tick_time is not None:
+                self.history_snapshot.save(
+                    self.markets, self.last_tick_time, self.extract_interval
+                )
+            for market_index in list(self.memories):
+                self.detach(market_index)
+            connection.close()
+
+    def create_markets(self):
+        self.markets = [Market(**arguments) for arguments in self.market_arguments]
+
+        if self.snapshot_directory is not None:
+            self.history_snapshot = HistorySnapshot(
+                os.path.join(self.snapshot_directory, "shard-{0}".format(self.shard)),
+                self.snapshot_interval,
+            )
+
+        if self.backfill_concurrency is not None:
+            self.history_backfill = HistoryBackfill(
+                fetcher=TickerFetcher(
+                    retry_interval=self.retry_interval,
+                    max_retries=1,
+                    pool_size=self.backfill_concurrency,
+                ),
+                max_workers=self.backfill_concurrency,
+            )
+
+        for market in self.markets:
+            if self.history_backfill is not None:
+                self.history_backfill.fetcher.add_weight_budget(
+                    market.api_url, market.weight_limit_per_minute
+                )
+            if self.history_snapshot is not None:
+                self.history_snapshot.prepare(market)
+            market.create_history(
+                self.chart_intervals, self.extract_interval, self.history_snapshot
+            )
+
+    def serve(self, connection):
+        while True:
+            try:
+                command, args = connection.recv()
+            except EOFError:
+                self.logger.warning(
+                    "Coordinator is gone. Stopping shard %i.", self.shard
+                )
+                return
+
+            if command == "stop":
+                return
+
+            connection.send(getattr(self, command)(*args))
+
+    def attach(self, market_index, name, capacity):
+        # The coordinator replaces the shared memory when it grows, the old one is released
+        if (
+            market_index not in self.memories
+            or self.memories[market_index][0].name != name
+        ):
+            self.detach(market_index)
+            memory = self.open_memory(name)
+            self.memories[market_index] = (
+                memory,
+                np.ndarray((2, capacity), dtype=np.float64, buffer=memory.buf),
+            )
+        return self.memories[market_index][1]
+
+    @staticmethod
+    def open_memory(name):
+        # Only the coordinator unlinks the shared memory. Tracked by the resource tracker of a worker it would
+        # be unlinked and reported as leaked when the worker exits first.
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=False)
+
+        # Unregistering after attaching would drop the entry of the coordinator when the worker shares its
+        # resource tracker, the registration is skipped instead
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+    def detach(self, market_index):
+        memory, values = self.memories.pop(market_index, (None, None))
+        if memory is not None:
+            del values
+            memory.close()
+
+    def add_symbols(self, market, first_row, symbols):
+        # Symbols of the rows from first_row on, only the ones of this shard are kept
+        first_shard_row = first_row + (self.shard - first_row) % self.no_of_shards
+        for row in range(first_shard_row, first_row + len(symbols), self.no_of_shards):
+            market.add_asset(symbols[row - first_row])
+
+    def prepare(self, current_time, all_symbols):
+        for market, symbols in zip(self.markets, all_symbols):
+            self.add_symbols(market, 0, symbols)
+
+            if self.history_snapshot is not None:
+                self.history_snapshot.restore(
+                    market, current_time, self.extract_interval
+                )
+            if self.history_backfill is not None:
+                self.history_backfill.backfill(
+                    market, current_time, self.extract_interval
+                )
+
+        return [market.rows for market in self.markets]
+
+    def tick(self, current_time, updates):
+        all_events = []
+        for update in updates:
+            market = self.markets[update["market"]]
+            self.add_symbols(market, update["first_row"], update["symbols"])
+
+            values = self.attach(update["market"], update["memory"], update["capacity"])
+            rows = slice(self.shard, update["rows"], self.no_of_shards)
+            prices = values[0, rows].copy()
+            volumes = values[1, rows].copy() if market.volume_enabled else None
+
+            outliers = market.update(prices, volumes, current_time, self.dump_enabled)
+
+            events = []
+            for row in np.flatnonzero(outliers.any(axis=1)):
+                event = market.alert_event(row, outliers)
+                # Rows of the coordinator, alerts of all shards are sent in its order
+                event.row = self.shard + row * self.no_of_shards
+                events.append(event)
+            all_events.append(events)
+
+        self.last_tick_time = current_time
+        if self.history_snapshot is not None:
+            self.history_snapshot.save_when_due(
+                self.markets, current_time, self.extract_interval
+            )
+
+        return all_events
+
+    def configure(self, market_arguments, chart_intervals, dump_enabled):
+        self.market_arguments = market_arguments
+        self.chart_intervals = chart_intervals
+        self.dump_enabled = dump_enabled
+
+        for market, arguments in zip(self.markets, market_arguments):
+            market.configure(
+                Market(**arguments), chart_intervals, self.extract_interval
+            )
+
+    def summarize(self, intervals, no_of_reported_coins, all_muted_rows):
+        return [
+            ReportGenerator.summarize_top_changes(
+                market.filtered_assets,
+                market.change_calculator.intervals_changes(intervals, market.rows),
+                no_of_reported_coins,
+                # Muted rows of the coordinator which belong to this shard
+                excluded_rows=[
+                    row // self.no_of_shards
+                    for row in muted_rows
+                    if row % self.no_of_shards == self.shard
+                ],
+            )
+            for market, muted_rows in zip(self.markets, all_muted_rows)
+        ]
@@ -0,0 +1,55 @@
+import logging
+import re
+
+
+# Watchlist, blacklist, pairsOfInterest and leverage rules compiled once per market.
+# Verdicts are memoized, every symbol is only evaluated the first time it is seen.
+class SymbolFilter:
+    LEVERAGE_SUFFIXES = ("UP", "DOWN", "BULL", "BEAR")
+
+    def __init__(self, watchlist, blacklist, pairs_of_interest):
+        self.watchlist = frozenset(watchlist)
+        self.blacklist = frozenset(blacklist)
+
+        # Without pairsOfInterest no symbol matches, (?!) never matches
+        pairs = "|".join(re.escape(pair) for pair in pairs_of_interest) or "(?!)"
+        leverage_suffixes = "|".join(self.LEVERAGE_SUFFIXES)
+        self.pairs_of_interest_pattern = re.compile("(?:{0})$".format(pairs))
+        self.leverage_pattern = re.compile(
+            "(?:{0})(?:{1})$".format(leverage_suffixes, pairs)
+        )
+
+        self.verdicts = {}
+
+        self.logger = logging.getLogger("symbol-filter")
+
+    def is_symbol_valid(self, symbol):
+        verdict = self.verdicts.get(symbol)
+        if verdict is None:
+            verdict = self.verdicts[symbol] = self.evaluate(symbol)
+        return verdict
+
+    def evaluate(self, symbol):
+        # Filter symbols in watchlist if set - This disables the pairsOfInterest feature
+        if len(self.watchlist) > 0:
+            if symbol not in self.watchlist:
+                self.logger.debug("Ignoring symbol not in watchlist: %s.", symbol)
+                return False
+            return True
+
+        # Filter symbols in blacklist if set - This DOES NOT IMPACT the pairsOfInterest feature
+        if symbol in self.blacklist:
+            self.logger.info("Ignoring symbol found in blacklist: %s.", symbol)
+            return False
+
+        # Filter pairsOfInterest to reduce the noise. E.g. BUSD, USDT, ETH, BTC
+        if self.pairs_of_interest_pattern.search(symbol) is None:
+            self.logger.debug("Ignoring symbol not in pairsOfInterests: %s.", symbol)
+            return False
+
+        # Filter leverage symbols
+        if self.leverage_pattern.search(symbol) is not None:
+            self.logger.debug("Ignoring leverage symbol: %s.", symbol)
+            return False
+
+        return True
@@ -0,0 +1,9 @@
+# Ticker response as columns, prices and volumes are float64 arrays aligned with the symbols
+class TickerColumns:
+    def __init__(self, symbols, prices, volumes=None):
+        self.symbols = symbols
+        self.prices = prices
+        self.volumes = volumes
+
+    def __len__(self):
+        return len(self.symbols)
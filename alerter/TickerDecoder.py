@@ -0,0 +1,105 @@
+import json
+import logging
+import numpy as np
+import re
+
+from .TickerColumns import TickerColumns
+
+
+# Decodes the ticker response bytes straight into columns without a JSON parser.
+# Binance writes every entry of the ticker with the same keys in the same order, so the response split
+# at the quotes repeats with a fixed stride and every field is a slice of it. Responses without a fixed
+# layout are scanned field by field instead. No dict is created per symbol, the prices are parsed once.
+# Responses the scan cannot read exactly, e.g. with escaped characters or unquoted values, go to the JSON parser.
+class TickerDecoder:
+    def __init__(self, price_key="price", volume_key=None):
+        self.price_key = price_key
+        self.volume_key = volume_key
+        self.keys = ["symbol", price_key] + ([volume_key] if volume_key else [])
+        self.patterns = [self.field_pattern(key) for key in self.keys]
+
+        self.logger = logging.getLogger("ticker-decoder")
+
+    @staticmethod
+    def field_pattern(key):
+        # Binance quotes prices and volumes as strings, e.g. "price":"0.03440000"
+        return re.compile(r'"{0}"\s*:\s*"([^"]*)"'.format(re.escape(key)))
+
+    @staticmethod
+    def parse_values(values):
+        return np.fromiter(map(float, values), dtype=np.float64, count=len(values))
+
+    def split_fields(self, payload):
+        # Quoted keys and values are every other token, e.g. [{ symbol : ETHBTC , price : 0.034 },{ ...
+        tokens = payload.split('"')
+        if len(tokens) < 2 or tokens[1] != "symbol":
+            return None
+
+        try:
+            stride = tokens.index("symbol", 2) - 1
+        except ValueError:
+            # Single entry
+            stride = len(tokens)
+        no_of_entries = len(tokens) // stride
+
+        fields = []
+        for key in self.keys:
+            try:
+                offset = tokens.index(key, 1, stride + 1)
+            except ValueError:
+                return None
+
+            # Every entry must have the key at the same offset and a quoted value
+            if tokens[offset + 1].strip() != ":":
+                return None
+            if tokens[offset::stride].count(key) != no_of_entries:
+                return None
+
+            fields.append(tokens[offset + 2 :: stride][:no_of_entries])
+
+        return fields
+
+    def scan_fields(self, payload):
+        fields = [pattern.findall(payload) for pattern in self.patterns]
+
+        for values in fields[1:]:
+            if len(values) != len(fields[0]):
+                return None
+        return fields
+
+    def parse_fields(self, payload):
+        try:
+            exchange_assets = json.loads(payload)
+            return [
+                [exchange_asset[key] for exchange_asset in exchange_assets]
+                for key in self.keys
+            ]
+        except (KeyError, TypeError) as e:
+            # Raised as ValueError like a broken JSON response, the fetcher retries
+            raise ValueError("Unexpected ticker response: {0}".format(e))
+
+    def decode(self, content):
+        payload = content.decode("utf-8")
+
+        # A list, complete up to its end, e.g. not cut off by a dropped connection
+        stripped = payload.strip()
+        if not stripped.startswith("[") or not stripped.endswith("]"):
+            # Raised as ValueError like a broken JSON response, the fetcher retries
+            raise ValueError("Unexpected ticker response: {0}".format(payload[:200]))
+
+        # Binance never escapes anything in the ticker, the scans would keep the escapes
+        fields = None
+        if "\\" not in payload:
+            fields = self.split_fields(payload)
+            if fields is None:
+                self.logger.debug("Ticker has no fixed layout. Scanning every field.")
+                fields = self.scan_fields(payload)
+        if fields is None:
+            self.logger.debug("Ticker cannot be scanned. Parsing it as JSON.")
+            fields = self.parse_fields(payload)
+
+        return TickerColumns(
+            fields[0],
+            self.parse_values(fields[1]),
+            self.parse_values(fields[2]) if self.volume_key else None,
+        )
@@ -0,0 +1,119 @@
+import logging
+import random
+import requests
+import time
+
+from requests.adapters import HTTPAdapter
+from time import sleep
+from urllib.parse import urlparse
+
+from .WeightBudget import WeightBudget
+
+
+# HTTP client for the Binance REST API, keeps connections alive between ticks.
+# Failed requests are retried in a loop with jittered exponential backoff and a bounded number of attempts.
+# Requests are paid from the request weight budget of their host, paced ones are skipped when it runs low.
+class TickerFetcher:
+    def __init__(
+        self,
+        retry_interval=5,
+        max_retries=3,
+        connect_timeout=3.05,
+        read_timeout=5,
+        max_backoff=60,
+        pool_size=10,
+        metrics=None,
+        weight_budgets=None,
+    ):
+        self.retry_interval = retry_interval
+        self.max_retries = max_retries
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_backoff = max_backoff
+        self.metrics = metrics
+        # Request weight budget per host, shared with the other fetchers of the process
+        self.weight_budgets = weight_budgets if weight_budgets is not None else {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.logger = logging.getLogger("ticker-fetcher")
+
+    def add_weight_budget(self, url, limit):
+        # Markets on the same host share its budget, Binance limits the weight per IP and host
+        host = urlparse(url).netloc
+        if host not in self.weight_budgets:
+            self.weight_budgets[host] = WeightBudget(limit)
+
+    def get_weight_budget(self, url):
+        return self.weight_budgets.get(urlparse(url).netloc)
+
+    def backoff_delay(self, attempt):
+        delay = min(self.max_backoff, self.retry_interval * 2**attempt)
+        # Jitter avoids several instances hammering the API in lockstep after an outage
+        return random.uniform(delay / 2, delay)
+
+    def fetch(self, url, params=None, decode=None, weight=1, paced=False):
+        # Paced requests, e.g. the ticks, are skipped while the budget is low, the others wait for it
+        weight_budget = self.get_weight_budget(url)
+
+        for attempt in range(self.max_retries + 1):
+            if weight_budget is not None:
+                if paced:
+                    wait_time = weight_budget.try_acquire(weight, paced=True)
+                    if wait_time > 0:
+                        if self.metrics is not None:
+                            self.metrics.increment("throttled_requests_total")
+                        self.logger.debug(
+                            "Request weight budget is low. Skipping url: %s for %f seconds.",
+                            url,
+                            wait_time,
+                        )
+                        return None
+                else:
+                    weight_budget.acquire(weight)
+
+            try:
+                self.logger.debug("Requesting url: %s. Attempt: %i.", url, attempt + 1)
+                start = time.perf_counter()
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if weight_budget is not None:
+                    ban_time = weight_budget.update(
+                        response.status_code, response.headers
+                    )
+                    if ban_time > 0:
+                        self.logger.warning(
+                            "Request weight limit of %s exceeded. Pausing requests for %i seconds.",
+                            urlparse(url).netloc,
+                            ban_time,
+                        )
+                response.raise_for_status()
+                fetched = time.perf_counter()
+                # Decoders get the raw bytes, e.g. to skip building a dict per symbol
+                if decode is not None:
+                    assets = decode(response.content)
+                else:
+                    assets = response.json()
+
+                if self.metrics is not None:
+                    self.metrics.observe_stage("fetch", fetched - start)
+                    self.metrics.observe_stage("decode", time.perf_counter() - fetched)
+                return assets
+            except (requests.RequestException, ValueError) as e:
+                if self.metrics is not None:
+                    self.metrics.increment("fetch_errors_total")
+                self.logger.error(
+                    "Issue occurred while requesting url: %s. Attempt: %i/%i. Error: %s.",
+                    url,
+                    attempt + 1,
+                    self.max_retries + 1,
+                    e,
+                )
+
+            if attempt < self.max_retries:
+                delay = self.backoff_delay(attempt)
+                self.logger.debug("Retrying in %f seconds.", delay)
+                sleep(delay)
+
+        return None
@@ -0,0 +1,135 @@
+import math
+import numpy as np
+import os
+
+from .PriceHistory import PriceHistory
+
+
+# Price history in tiers of decreasing resolution, the full resolution only covers the short intervals.
+# Rollup tiers take the first tick of every 1m or 5m bucket, so hour and day intervals cost a few hundred
+# columns per symbol instead of one per tick. Every interval looks up its window in the coarsest tier
+# which still resolves it to 1/60 of its length, the latest prices always come from the full resolution.
+class TieredHistory:
+    ROLLUP_RESOLUTIONS = (60, 300)
+    RESOLUTION_SHARE = 60
+
+    def __init__(self, chart_intervals, extract_interval, path=None):
+        self.extract_interval = extract_interval
+        self.path = path
+
+        sizes, self.interval_resolutions = self.layout(chart_intervals)
+        self.tiers = [
+            PriceHistory(
+                size,
+                path=self.tier_path(path, resolution, extract_interval),
+                resolution=resolution,
+            )
+            for resolution, size in sizes.items()
+        ]
+
+    def layout(self, chart_intervals):
+        # Size of every tier by resolution and the resolution of every interval by its seconds
+        resolutions = [self.extract_interval] + [
+            resolution
+            for resolution in self.ROLLUP_RESOLUTIONS
+            if resolution > self.extract_interval
+        ]
+
+        # Longest interval of every tier, the full resolution is kept even without intervals
+        longest_intervals = {self.extract_interval: 0}
+        interval_resolutions = {}
+        for interval in chart_intervals:
+            seconds = chart_intervals[interval]["value"]
+            resolution = max(
+                [
+                    resolution
+                    for resolution in resolutions
+                    if resolution * self.RESOLUTION_SHARE <= seconds
+                ],
+                default=self.extract_interval,
+            )
+            interval_resolutions[seconds] = resolution
+            longest_intervals[resolution] = max(
+                longest_intervals.get(resolution, 0), seconds
+            )
+
+        sizes = {
+            # Longest interval plus the current price
+            resolution: math.ceil(longest_intervals[resolution] / resolution) + 1
+            for resolution in resolutions
+            if resolution in longest_intervals
+        }
+        return sizes, interval_resolutions
+
+    def resize(self, chart_intervals):
+        # Tiers are only resized if their longest interval changed, the latest ticks are kept.
+        # Tiers of new resolutions start empty and fill up from the ticks, unused ones are dropped.
+        sizes, self.interval_resolutions = self.layout(chart_intervals)
+        rows = self.rows
+        capacity = len(self.tiers[0].counts)
+        tiers = {tier.resolution: tier for tier in self.tiers}
+
+        self.tiers = []
+        for resolution, size in sizes.items():
+            tier = tiers.get(resolution)
+            if tier is None:
+                tier = PriceHistory(
+                    size,
+                    capacity=capacity,
+                    path=self.tier_path(self.path, resolution, self.extract_interval),
+                    resolution=resolution,
+                )
+                tier.rows = rows
+            elif tier.size != size:
+                tier.resize(size)
+            self.tiers.append(tier)
+
+    @staticmethod
+    def tier_path(path, resolution, extract_interval):
+        if path is None or resolution == extract_interval:
+            return path
+        return "{0}-{1}s.npy".format(os.path.splitext(path)[0], resolution)
+
+    def named_tiers(self, name):
+        # Rollups are named after their resolution like their files, e.g. prices-60s
+        names = [name] + [
+            "{0}-{1}s".format(name, tier.resolution) for tier in self.tiers[1:]
+        ]
+        return list(zip(names, self.tiers))
+
+    def tier_intervals(self, seconds):
+        # Tiers with the positions of the intervals they serve
+        resolutions = np.array(
+            [self.interval_resolutions[interval] for interval in seconds]
+        )
+        return [
+            (tier, np.flatnonzero(resolutions == tier.resolution))
+            for tier in self.tiers
+            if (resolutions == tier.resolution).any()
+        ]
+
+    @property
+    def rows(self):
+        return self.tiers[0].rows
+
+    def add_row(self):
+        for tier in self.tiers:
+            row = tier.add_row()
+        return row
+
+    def flush(self):
+        for tier in self.tiers:
+            tier.flush()
+
+    def append(self, prices, current_time):
+        self.tiers[0].append(prices, current_time)
+
+        # A tick starting a new bucket is rolled up, floor keeps the -inf of an empty tier
+        for tier in self.tiers[1:]:
+            if np.floor(current_time / tier.resolution) > np.floor(
+                tier.latest_time() / tier.resolution
+            ):
+                tier.append(prices, current_time)
+
+    def latest(self, row):
+        return self.tiers[0].latest(row)
@@ -0,0 +1,98 @@
+import threading
+import time
+
+
+# Request weight of one API host left in the current minute, shared by every request of the process to it.
+# Binance sends the weight used by the IP in the X-MBX-USED-WEIGHT-1M header of every response, so other
+# instances behind the same IP count as well. Requests are counted up front until their response tells.
+# Going over the limit is answered with 429 and then 418 bans, Retry-After says for how long.
+class WeightBudget:
+    # Binance counts the weight per minute of the clock
+    WINDOW = 60
+    # Seconds of the even pace paced requests may run ahead
+    PACE_AHEAD = 10
+
+    def __init__(self, limit, reserve=0.1):
+        self.limit = limit
+        # Share of the limit kept free for requests in flight and other instances
+        self.reserve = reserve
+        self.used = 0
+        self.window_start = 0
+        self.banned_until = 0
+        self.lock = threading.Lock()
+
+    def start_window(self, now):
+        window_start = now - now % self.WINDOW
+        if window_start > self.window_start:
+            self.window_start = window_start
+            self.used = 0
+
+    def try_acquire(self, weight, paced=False):
+        # Returns 0 if the weight was taken, otherwise the seconds until it may be available.
+        # Paced requests, e.g. the ticks, spread the budget evenly over the minute. They slow down before
+        # the limit is reached and pick up their cadence again as soon as the usage allows.
+        with self.lock:
+            now = time.time()
+            if now < self.banned_until:
+                return self.banned_until - now
+
+            self.start_window(now)
+            budget = self.limit * (1 - self.reserve)
+            if self.used + weight > budget:
+                return self.window_start + self.WINDOW - now
+
+            if paced:
+                elapsed = now - self.window_start
+                paced_budget = budget * min(
+                    1, (elapsed + self.PACE_AHEAD) / self.WINDOW
+                )
+                if self.used + weight > paced_budget:
+                    return (
+                        (self.used + weight) / budget * self.WINDOW
+                        - self.PACE_AHEAD
+                        - elapsed
+                    )
+
+            self.used += weight
+            return 0
+
+    def acquire(self, weight):
+        wait_time = self.try_acquire(weight)
+        while wait_time > 0:
+            time.sleep(wait_time)
+            wait_time = self.try_acquire(weight)
+
+    def update(self, status, headers):
+        # Returns the seconds of a ban, 0 if the request was not rejected for its weight
+        with self.lock:
+            now = time.time()
+            self.start_window(now)
+
+            used = headers.get("X-MBX-USED-WEIGHT-1M", headers.get("X-MBX-USED-WEIGHT"))
+            if used is not None:
+                # Requests still in flight are counted already, the count only goes up within a window
+                self.used = max(self.used, int(used))
+
+            if status not in (418, 429):
+                return 0
+
+            retry_after = headers.get("Retry-After")
+            self.banned_until = max(
+                self.banned_until,
+                (
+                    now + float(retry_after)
+                    if retry_after is not None
+                    else self.window_start + self.WINDOW
+                ),
+            )
+            return self.banned_until - now
+
+    def get_statistics(self):
+        with self.lock:
+            now = time.time()
+            self.start_window(now)
+            return {
+                "weight_limit": self.limit,
+                "weight_used": self.used,
+                "ban_seconds": max(0, self.banned_until - now),
+            }
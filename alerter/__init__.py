@@ -1 +1,13 @@
+from .AlertEvent import AlertEvent
+from .AssetRegistry import AssetRegistry
 from .BinancePumpAndDumpAlerter import BinancePumpAndDumpAlerter
+from .HistoryBackfill import HistoryBackfill
+from .HistorySnapshot import HistorySnapshot
+from .Market import Market
+from .MiniTickerStream import MiniTickerStream
+from .ShardPool import ShardPool
+from .ShardWorker import ShardWorker
+from .SymbolFilter import SymbolFilter
+from .TickerColumns import TickerColumns
+from .TickerDecoder import TickerDecoder
+from .TickerFetcher import TickerFetcher
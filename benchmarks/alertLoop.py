@@ -0,0 +1,356 @@
+import argparse
+import gc
+import json
+import numpy as np
+import resource
+import time
+import tracemalloc
+
+from alerter import BinancePumpAndDumpAlerter, Market, ShardPool, TickerColumns
+from reporter import ReportGenerator
+from sender import NullSender
+
+# Run from the repository root with: python -m benchmarks.alertLoop [--symbols 500 2000] [--hours 1]
+# Add --decode json or --decode scan to include decoding the ticker response bytes in the tick.
+# Add --shards 4 to spread the symbols over 4 worker processes, memory is then measured for the main one only.
+
+SYMBOL_COUNTS = [500, 2000, 10000]
+CHART_INTERVALS = ["1s", "5s", "15s", "30s", "1m", "5m", "15m", "30m", "1h", "3h", "6h"]
+OUTLIER_INTERVALS = {
+    "1s": 0.02,
+    "5s": 0.05,
+    "15s": 0.06,
+    "30s": 0.08,
+    "1m": 0.1,
+    "5m": 0.10,
+    "15m": 0.15,
+    "30m": 0.20,
+    "1h": 0.30,
+    "3h": 0.4,
+    "6h": 0.5,
+}
+TOP_REPORT_INTERVALS = ["5m", "15m", "1h"]
+STAGES = ["decode", "listing", "update", "top report"]
+DECODERS = ["none", "json", "scan"]
+
+
+def generate_symbols(no_of_symbols, offset=0):
+    return ["SYM{0}USDT".format(i) for i in range(offset, offset + no_of_symbols)]
+
+
+class SyntheticTicker:
+    # Random walk for every symbol with pumps and dumps injected at random ticks
+    def __init__(self, symbols, events_per_hour, listings_per_hour, seed=1):
+        self.random = np.random.default_rng(seed)
+        self.symbols = list(symbols)
+        self.prices = self.random.uniform(0.01, 1000, len(self.symbols))
+        self.event_probability = events_per_hour / 3600
+        self.listing_probability = listings_per_hour / 3600
+        self.events = 0
+        self.listings = 0
+
+    def next_tick(self):
+        self.prices *= 1 + self.random.normal(0, 0.0005, len(self.prices))
+
+        if self.random.random() < self.event_probability:
+            # Pump or dump of 5-30% on a few symbols at once
+            rows = self.random.integers(0, len(self.prices), 3)
+            self.prices[rows] *= self.random.choice([0.7, 0.8, 1.1, 1.3], len(rows))
+            self.events += 1
+
+        if self.random.random() < self.listing_probability:
+            self.symbols.append("NEW{0}USDT".format(self.listings))
+            self.prices = np.append(self.prices, self.random.uniform(0.01, 10))
+            self.listings += 1
+
+        # Same shape as the ticker response, prices are strings
+        return [
+            {"symbol": symbol, "price": "{0:.8f}".format(price)}
+            for symbol, price in zip(self.symbols, self.prices)
+        ]
+
+
+def create_alerter(symbols, decode, shards):
+    market = Market(
+        name="Benchmark",
+        api_url=None,
+        trade_url="https://www.binance.com/en/trade/{0}",
+        watchlist=[],
+        blacklist=[],
+        pairs_of_interest=["USDT"],
+        outlier_intervals=OUTLIER_INTERVALS,
+        fast_decode_enabled=decode == "scan",
+    )
+
+    sender = NullSender()
+    alerter = BinancePumpAndDumpAlerter(
+        markets=[market],
+        chart_intervals=CHART_INTERVALS,
+        top_report_intervals=TOP_REPORT_INTERVALS,
+        extract_interval=1,
+        top_pump_enabled=True,
+        top_dump_enabled=True,
+        additional_statistics_enabled=True,
+        no_of_reported_coins=5,
+        dump_enabled=True,
+        check_new_listing_enabled=True,
+        top_report_nearest_hour=False,
+        telegram=sender,
+        report_generator=ReportGenerator(telegram=sender, alert_skip_threshold=0.75),
+        fetcher=None,
+        shard_pool=ShardPool(shards) if shards > 1 else None,
+    )
+
+    market.known_symbols = set(symbols)
+    market.filtered_assets = alerter.filter_and_convert_assets(
+        [{"symbol": symbol} for symbol in symbols], market.symbol_filter, market
+    )
+    if alerter.shard_pool is not None:
+        alerter.shard_pool.prepare(time.time())
+
+    return alerter, market, sender
+
+
+def encode_payload(exchange_assets, decode):
+    # Response bytes as sent by Binance, encoding is not part of the timed tick
+    if decode == "none":
+        return exchange_assets
+    return json.dumps(exchange_assets, separators=(",", ":")).encode("utf-8")
+
+
+def decode_payload(market, payload, decode):
+    if decode == "json":
+        return json.loads(payload)
+    if decode == "scan":
+        return market.ticker_decoder.decode(payload)
+    return payload
+
+
+def run_tick(alerter, market, payload, current_time, stage_times, decode):
+    # Same stages as the live loop, the fetch is replaced by the synthetic ticker
+    start = time.perf_counter()
+    exchange_assets = decode_payload(market, payload, decode)
+    decode_end = time.perf_counter()
+
+    if isinstance(exchange_assets, TickerColumns):
+        alerter.index_ticker_columns(market, exchange_assets)
+        listing_end = time.perf_counter()
+
+        alerter.update_all_monitored_columns_and_send_news_messages(
+            market, exchange_assets, current_time, alerter.dump_enabled
+        )
+    else:
+        exchange_assets_by_symbol = alerter.index_exchange_assets(exchange_assets)
+        alerter.add_new_asset_listings(market, exchange_assets_by_symbol)
+        listing_end = time.perf_counter()
+
+        alerter.update_all_monitored_assets_and_send_news_messages(
+            market, exchange_assets_by_symbol, current_time, alerter.dump_enabled
+        )
+    if alerter.shard_pool is not None:
+        alerter.update_shards_and_send_news_messages(current_time)
+    alerter.alert_renderer.flush()
+    update_end = time.perf_counter()
+
+    alerter.check_and_send_top_pump_dump_statistics_report(
+        alerter.markets,
+        current_time,
+        alerter.top_report_intervals,
+        alerter.top_pump_enabled,
+        alerter.top_dump_enabled,
+        alerter.additional_statistics_enabled,
+        alerter.no_of_reported_coins,
+    )
+    end = time.perf_counter()
+
+    stage_times["decode"].append(decode_end - start)
+    stage_times["listing"].append(listing_end - decode_end)
+    stage_times["update"].append(update_end - listing_end)
+    stage_times["top report"].append(end - update_end)
+    return end - start
+
+
+def current_rss_mb():
+    # Current resident memory on Linux, otherwise the peak
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def benchmark(
+    no_of_symbols,
+    ticks,
+    trace_ticks,
+    events_per_hour,
+    listings_per_hour,
+    decode,
+    shards,
+):
+    gc.collect()
+    rss_before = current_rss_mb()
+
+    ticker = SyntheticTicker(
+        generate_symbols(no_of_symbols), events_per_hour, listings_per_hour
+    )
+    alerter, market, sender = create_alerter(ticker.symbols, decode, shards)
+
+    # Simulated clock, one second per tick
+    current_time = 1_700_000_000
+    for interval in alerter.top_report_intervals.values():
+        interval["start"] = current_time
+
+    latencies = np.empty(ticks)
+    stage_times = {stage: [] for stage in STAGES}
+    for tick in range(ticks):
+        payload = encode_payload(ticker.next_tick(), decode)
+        latencies[tick] = run_tick(
+            alerter, market, payload, current_time, stage_times, decode
+        )
+        current_time += 1
+
+    # Allocations are traced on a shorter run after the timed one, tracing slows every allocation down
+    # Memory still traced after the run is retained by the alerter, e.g. a growing list
+    tick_peaks = np.empty(trace_ticks)
+    traced_stage_times = {stage: [] for stage in STAGES}
+    tracemalloc.start()
+    traced_before, _ = tracemalloc.get_traced_memory()
+    for tick in range(trace_ticks):
+        payload = encode_payload(ticker.next_tick(), decode)
+        tracemalloc.reset_peak()
+        tick_before, _ = tracemalloc.get_traced_memory()
+        run_tick(alerter, market, payload, current_time, traced_stage_times, decode)
+        _, peak = tracemalloc.get_traced_memory()
+        tick_peaks[tick] = peak - tick_before
+        current_time += 1
+        del payload
+    for stage in STAGES:
+        traced_stage_times[stage].clear()
+    gc.collect()
+    traced_after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if alerter.shard_pool is not None:
+        alerter.shard_pool.stop()
+    # Alerts are rendered on their own thread, count them once all are out
+    alerter.alert_renderer.close()
+
+    return {
+        "symbols": no_of_symbols,
+        "ticks": ticks,
+        "latencies": latencies * 1000,
+        "stages": {stage: np.array(stage_times[stage]) * 1000 for stage in STAGES},
+        "tick_peak_kb": np.median(tick_peaks) / 2**10 if trace_ticks > 0 else 0,
+        "retained_kb_per_hour": (traced_after - traced_before)
+        / 2**10
+        / max(1, trace_ticks)
+        * 3600,
+        "rss_mb": current_rss_mb() - rss_before,
+        "events": ticker.events,
+        "listings": ticker.listings,
+        "messages": sender.get_statistics(),
+    }
+
+
+def print_results(results):
+    print(
+        "{0:>8} {1:>7} {2:>8} {3:>8} {4:>8} {5:>8} {6:>14} {7:>14} {8:>8}".format(
+            "symbols",
+            "ticks",
+            "p50 ms",
+            "p90 ms",
+            "p99 ms",
+            "max ms",
+            "alloc KB/tick",
+            "retained KB/h",
+            "RSS MB",
+        )
+    )
+    for result in results:
+        p50, p90, p99 = np.percentile(result["latencies"], [50, 90, 99])
+        print(
+            "{0:>8} {1:>7} {2:>8.3f} {3:>8.3f} {4:>8.3f} {5:>8.3f} {6:>14.1f} {7:>14.1f} {8:>8.1f}".format(
+                result["symbols"],
+                result["ticks"],
+                p50,
+                p90,
+                p99,
+                result["latencies"].max(),
+                result["tick_peak_kb"],
+                result["retained_kb_per_hour"],
+                result["rss_mb"],
+            )
+        )
+
+    print()
+    print("{0:>8} {1:>12} {2:>8} {3:>8}".format("symbols", "stage", "p50 ms", "p99 ms"))
+    for result in results:
+        for stage in STAGES:
+            p50, p99 = np.percentile(result["stages"][stage], [50, 99])
+            print(
+                "{0:>8} {1:>12} {2:>8.3f} {3:>8.3f}".format(
+                    result["symbols"], stage, p50, p99
+                )
+            )
+
+    print()
+    for result in results:
+        print(
+            "{0:>8} symbols: {1} injected pumps and dumps, {2} listings, {3} alerts, {4} top reports.".format(
+                result["symbols"],
+                result["events"],
+                result["listings"],
+                result["messages"]["news"],
+                result["messages"]["report"],
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic load on the alert loop.")
+    parser.add_argument("--symbols", type=int, nargs="+", default=SYMBOL_COUNTS)
+    parser.add_argument(
+        "--hours", type=float, default=1, help="Simulated hours, one tick per second."
+    )
+    parser.add_argument(
+        "--trace-ticks",
+        type=int,
+        default=300,
+        help="Ticks traced for allocations after the timed ticks.",
+    )
+    parser.add_argument("--events-per-hour", type=float, default=120)
+    parser.add_argument("--listings-per-hour", type=float, default=2)
+    parser.add_argument(
+        "--decode",
+        choices=DECODERS,
+        default="none",
+        help="Decode the ticker response bytes with the JSON parser or the scanner.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=0,
+        help="Worker processes the symbols are spread over, 0 or 1 for none.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for no_of_symbols in args.symbols:
+        results.append(
+            benchmark(
+                no_of_symbols,
+                int(args.hours * 3600),
+                args.trace_ticks,
+                args.events_per_hour,
+                args.listings_per_hour,
+                args.decode,
+                args.shards,
+            )
+        )
+
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import random
+import time
+
+from alerter import BinancePumpAndDumpAlerter, Market
+
+# Run from the repository root with: python -m benchmarks.tickerLookup
+
+SYMBOL_COUNTS = [500, 1000, 2000, 5000, 10000]
+TICKS = 5
+
+
+class NoopReportGenerator:
+    def send_pump_dump_message(self, *args, **kwargs):
+        pass
+
+
+def generate_exchange_assets(no_of_symbols):
+    return [
+        {"symbol": "SYM{0}USDT".format(i), "price": "{0:.8f}".format(random.random())}
+        for i in range(no_of_symbols)
+    ]
+
+
+def linear_scan_tick(monitored_assets, exchange_assets):
+    # Previous implementation, scans the whole ticker list for every monitored asset
+    prices = []
+    for asset in monitored_assets:
+        for exchange_asset in exchange_assets:
+            if exchange_asset["symbol"] == asset.symbol:
+                prices.append(float(exchange_asset["price"]))
+                break
+
+
+def indexed_tick(alerter, market, exchange_assets):
+    alerter.update_all_monitored_assets_and_send_news_messages(
+        market,
+        alerter.index_exchange_assets(exchange_assets),
+        int(time.time()),
+        True,
+    )
+
+
+def measure(tick, ticks):
+    start = time.perf_counter()
+    for _ in range(ticks):
+        tick()
+    return (time.perf_counter() - start) / ticks
+
+
+def create_alerter():
+    market = Market(
+        name="Benchmark",
+        api_url=None,
+        trade_url="{0}",
+        watchlist=[],
+        blacklist=[],
+        pairs_of_interest=["USDT"],
+        outlier_intervals={},
+    )
+
+    alerter = BinancePumpAndDumpAlerter(
+        markets=[market],
+        chart_intervals=[],
+        top_report_intervals=[],
+        extract_interval=1,
+        top_pump_enabled=False,
+        top_dump_enabled=False,
+        additional_statistics_enabled=False,
+        no_of_reported_coins=5,
+        dump_enabled=True,
+        check_new_listing_enabled=False,
+        top_report_nearest_hour=False,
+        telegram=None,
+        report_generator=NoopReportGenerator(),
+        fetcher=None,
+    )
+
+    return alerter, market
+
+
+def main():
+    print(
+        "{0:>8} {1:>16} {2:>16}".format("symbols", "linear ms/tick", "indexed ms/tick")
+    )
+
+    for no_of_symbols in SYMBOL_COUNTS:
+        exchange_assets = generate_exchange_assets(no_of_symbols)
+
+        alerter, market = create_alerter()
+        for exchange_asset in exchange_assets:
+            market.add_asset(exchange_asset["symbol"])
+        monitored_assets = market.filtered_assets
+
+        linear = measure(
+            lambda: linear_scan_tick(monitored_assets, exchange_assets), TICKS
+        )
+        indexed = measure(lambda: indexed_tick(alerter, market, exchange_assets), TICKS)
+
+        print(
+            "{0:>8} {1:>16.3f} {2:>16.3f}".format(
+                no_of_symbols, linear * 1000, indexed * 1000
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
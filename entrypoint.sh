@@ -10,6 +10,37 @@ process_config() {
         sed -i "s/apiUrl.*/apiUrl: ${API_URL}/" config.yml
     fi
 
+    if [[ -n $STREAM_ENABLED ]]; then
+        sed -i "s/streamEnabled.*/streamEnabled: ${STREAM_ENABLED}/" config.yml
+    fi
+    if [[ -n $STREAM_URL ]]; then
+        sed -i "s|streamUrl.*|streamUrl: ${STREAM_URL}|" config.yml
+    fi
+
+    if [[ -n $ZSCORE_ENABLED ]]; then
+        sed -i "s/zScoreEnabled.*/zScoreEnabled: ${ZSCORE_ENABLED}/" config.yml
+    fi
+    if [[ -n $ZSCORE_THRESHOLD ]]; then
+        sed -i "s/zScoreThreshold.*/zScoreThreshold: ${ZSCORE_THRESHOLD}/" config.yml
+    fi
+    if [[ -n $ZSCORE_WINDOW ]]; then
+        sed -i "s/zScoreWindow.*/zScoreWindow: ${ZSCORE_WINDOW}/" config.yml
+    fi
+    if [[ -n $ZSCORE_WARMUP ]]; then
+        sed -i "s/zScoreWarmup.*/zScoreWarmup: ${ZSCORE_WARMUP}/" config.yml
+    fi
+
+    if [[ -n $FAST_DECODE_ENABLED ]]; then
+        sed -i "s/fastDecodeEnabled.*/fastDecodeEnabled: ${FAST_DECODE_ENABLED}/" config.yml
+    fi
+
+    if [[ -n $VOLUME_ENABLED ]]; then
+        sed -i "s/volumeEnabled.*/volumeEnabled: ${VOLUME_ENABLED}/" config.yml
+    fi
+    if [[ -n $VOLUME_API_URL ]]; then
+        sed -i "s|volumeApiUrl.*|volumeApiUrl: ${VOLUME_API_URL}|" config.yml
+    fi
+
     if [[ -n $TELEGRAM_TOKEN ]]; then
         sed -i "s/telegramToken.*/telegramToken: ${TELEGRAM_TOKEN}/" config.yml
     fi
@@ -20,6 +51,17 @@ process_config() {
         sed -i "s/telegramAlertChatId.*/telegramAlertChatId: ${TELEGRAM_ALERT_CHAT_ID}/" config.yml
     fi
 
+    if [[ -n $TELEGRAM_API_URL ]]; then
+        sed -i "s|telegramApiUrl.*|telegramApiUrl: ${TELEGRAM_API_URL}|" config.yml
+    fi
+
+    if [[ -n $WEBHOOK_URL ]]; then
+        sed -i "s|webhookUrl.*|webhookUrl: ${WEBHOOK_URL}|" config.yml
+    fi
+    if [[ -n $NOTIFICATION_FILE ]]; then
+        sed -i "s|notificationFile.*|notificationFile: ${NOTIFICATION_FILE}|" config.yml
+    fi
+
     if [[ -n $EXTRACT_INTERVAL ]]; then
         sed -i "s/extractInterval.*/extractInterval: ${EXTRACT_INTERVAL}/" config.yml
     fi
@@ -63,18 +105,60 @@ process_config() {
     if [[ -n $ALERT_SKIP_THRESHOLD ]]; then
         sed -i "s/alertSkipThreshold.*/alertSkipThreshold: ${ALERT_SKIP_THRESHOLD}/" config.yml
     fi
-    if [[ -n $RESET_INTERVAL ]]; then
-        sed -i "s/resetInterval.*/resetInterval: ${RESET_INTERVAL}/" config.yml
-    fi
     if [[ -n $PRICE_RETRY_INTERVAL ]]; then
         sed -i "s/priceRetryInterval.*/priceRetryInterval: ${PRICE_RETRY_INTERVAL}/" config.yml
     fi
+    if [[ -n $PRICE_RETRY_ATTEMPTS ]]; then
+        sed -i "s/priceRetryAttempts.*/priceRetryAttempts: ${PRICE_RETRY_ATTEMPTS}/" config.yml
+    fi
+    if [[ -n $PRICE_REQUEST_TIMEOUT ]]; then
+        sed -i "s/priceRequestTimeout.*/priceRequestTimeout: ${PRICE_REQUEST_TIMEOUT}/" config.yml
+    fi
+    if [[ -n $BACKFILL_ENABLED ]]; then
+        sed -i "s/backfillEnabled.*/backfillEnabled: ${BACKFILL_ENABLED}/" config.yml
+    fi
+    if [[ -n $BACKFILL_CONCURRENCY ]]; then
+        sed -i "s/backfillConcurrency.*/backfillConcurrency: ${BACKFILL_CONCURRENCY}/" config.yml
+    fi
+    if [[ -n $SNAPSHOT_ENABLED ]]; then
+        sed -i "s/snapshotEnabled.*/snapshotEnabled: ${SNAPSHOT_ENABLED}/" config.yml
+    fi
+    if [[ -n $SNAPSHOT_PATH ]]; then
+        sed -i "s|snapshotPath.*|snapshotPath: ${SNAPSHOT_PATH}|" config.yml
+    fi
+    if [[ -n $SNAPSHOT_INTERVAL ]]; then
+        sed -i "s/snapshotInterval.*/snapshotInterval: ${SNAPSHOT_INTERVAL}/" config.yml
+    fi
+    if [[ -n $RECORD_ENABLED ]]; then
+        sed -i "s/recordEnabled.*/recordEnabled: ${RECORD_ENABLED}/" config.yml
+    fi
+    if [[ -n $RECORD_PATH ]]; then
+        sed -i "s|recordPath.*|recordPath: ${RECORD_PATH}|" config.yml
+    fi
+    if [[ -n $METRICS_ENABLED ]]; then
+        sed -i "s/metricsEnabled.*/metricsEnabled: ${METRICS_ENABLED}/" config.yml
+    fi
+    if [[ -n $METRICS_HOST ]]; then
+        sed -i "s/metricsHost.*/metricsHost: ${METRICS_HOST}/" config.yml
+    fi
+    if [[ -n $METRICS_PORT ]]; then
+        sed -i "s/metricsPort.*/metricsPort: ${METRICS_PORT}/" config.yml
+    fi
+    if [[ -n $SHARD_WORKERS ]]; then
+        sed -i "s/shardWorkers.*/shardWorkers: ${SHARD_WORKERS}/" config.yml
+    fi
     if [[ -n $CHECK_NEW_LISTING_ENABLED ]]; then
         sed -i "s/checkNewListingEnabled.*/checkNewListingEnabled: ${CHECK_NEW_LISTING_ENABLED}/" config.yml
     fi
     if [[ -n $TOP_REPORT_NEAREST_HOUR ]]; then
         sed -i "s/topReportNearestHour.*/topReportNearestHour: ${TOP_REPORT_NEAREST_HOUR}/" config.yml
     fi
+    if [[ -n $CONFIG_RELOAD_ENABLED ]]; then
+        sed -i "s/configReloadEnabled.*/configReloadEnabled: ${CONFIG_RELOAD_ENABLED}/" config.yml
+    fi
+    if [[ -n $CONFIG_RELOAD_INTERVAL ]]; then
+        sed -i "s/configReloadInterval.*/configReloadInterval: ${CONFIG_RELOAD_INTERVAL}/" config.yml
+    fi
 }
 
 # Adding parameters set from the environment variables to the config yaml file.
@@ -0,0 +1,196 @@
+import threading
+import time
+
+from contextlib import contextmanager
+
+
+# Counters, gauges and stage duration histograms of the bot, rendered in the Prometheus text format.
+# Collectors are called on every scrape to set gauges which are cheaper to read than to keep up to date.
+class Metrics:
+    PREFIX = "binance_pump_alerts_"
+    # Stage durations in seconds, fine at the low end where most stages are
+    BUCKETS = (
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+    )
+    DESCRIPTIONS = {
+        "stage_duration_seconds": ("histogram", "Duration of the stages of a tick."),
+        "ticks_total": ("counter", "Ticks processed."),
+        "tick_overruns_total": (
+            "counter",
+            "Ticks which took longer than extractInterval.",
+        ),
+        "missed_ticks_total": (
+            "counter",
+            "Ticks skipped because the previous one ran past their slot.",
+        ),
+        "fetch_errors_total": ("counter", "Failed price requests, including retries."),
+        "throttled_requests_total": (
+            "counter",
+            "Price requests skipped because the request weight budget was low.",
+        ),
+        "request_weight_limit": ("gauge", "Request weight limit per minute per host."),
+        "request_weight_used": (
+            "gauge",
+            "Request weight used by the IP in the current minute per host.",
+        ),
+        "request_ban_seconds": (
+            "gauge",
+            "Seconds until requests to a host are allowed again after a 418 or 429.",
+        ),
+        "outlier_symbols_total": (
+            "counter",
+            "Symbols with at least one outlier interval.",
+        ),
+        "skipped_alerts_total": (
+            "counter",
+            "Alerts not sent because their change moved less than alertSkipThreshold.",
+        ),
+        "alert_queue_depth": ("gauge", "Ticks of alerts waiting to be rendered."),
+        "monitored_symbols": ("gauge", "Symbols monitored per market."),
+        "known_symbols": ("gauge", "Symbols listed per market, monitored or not."),
+        "notification_pending_messages": (
+            "gauge",
+            "Alerts held back until the end of the tick.",
+        ),
+        "notification_queue_depth": ("gauge", "Messages waiting per sink."),
+        "notification_sent_messages": (
+            "gauge",
+            "Messages sent per sink since the start.",
+        ),
+        "notification_merged_messages": (
+            "gauge",
+            "Messages merged into a queued one per sink.",
+        ),
+        "notification_dropped_messages": (
+            "gauge",
+            "Messages dropped from the full queue of a sink.",
+        ),
+        "notification_failed_messages": (
+            "gauge",
+            "Messages a sink failed to deliver.",
+        ),
+    }
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def label_key(labels):
+        return tuple(sorted((name, value) for name, value in labels.items() if value))
+
+    def observe_stage(self, stage, seconds, market=""):
+        key = (
+            "stage_duration_seconds",
+            self.label_key({"stage": stage, "market": market}),
+        )
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(self.BUCKETS), 0.0, 0]
+
+            for i, bucket in enumerate(self.BUCKETS):
+                if seconds <= bucket:
+                    histogram[0][i] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def time_stage(self, stage, market=""):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start, market)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, self.label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, self.label_key(labels))] = value
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    @staticmethod
+    def format_labels(labels, extra_labels=()):
+        labels = list(labels) + list(extra_labels)
+        if len(labels) == 0:
+            return ""
+        return (
+            "{"
+            + ",".join('{0}="{1}"'.format(name, value) for name, value in labels)
+            + "}"
+        )
+
+    def render(self):
+        for collector in self.collectors:
+            collector(self)
+
+        with self.lock:
+            samples = {}
+            for (name, labels), value in list(self.counters.items()) + list(
+                self.gauges.items()
+            ):
+                samples.setdefault(name, []).append(
+                    "{0}{1}{2} {3}".format(
+                        self.PREFIX, name, self.format_labels(labels), value
+                    )
+                )
+
+            for (name, labels), (buckets, total, count) in self.histograms.items():
+                lines = samples.setdefault(name, [])
+                for bucket, bucket_count in zip(self.BUCKETS, buckets):
+                    lines.append(
+                        "{0}{1}_bucket{2} {3}".format(
+                            self.PREFIX,
+                            name,
+                            self.format_labels(labels, [("le", bucket)]),
+                            bucket_count,
+                        )
+                    )
+                lines.append(
+                    "{0}{1}_bucket{2} {3}".format(
+                        self.PREFIX,
+                        name,
+                        self.format_labels(labels, [("le", "+Inf")]),
+                        count,
+                    )
+                )
+                lines.append(
+                    "{0}{1}_sum{2} {3}".format(
+                        self.PREFIX, name, self.format_labels(labels), total
+                    )
+                )
+                lines.append(
+                    "{0}{1}_count{2} {3}".format(
+                        self.PREFIX, name, self.format_labels(labels), count
+                    )
+                )
+
+        output = []
+        for name in sorted(samples):
+            metric_type, description = self.DESCRIPTIONS.get(name, ("untyped", name))
+            output.append("# HELP {0}{1} {2}".format(self.PREFIX, name, description))
+            output.append("# TYPE {0}{1} {2}".format(self.PREFIX, name, metric_type))
+            output.extend(samples[name])
+
+        return "\n".join(output) + "\n"
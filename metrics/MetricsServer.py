@@ -0,0 +1,60 @@
+import logging
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Serves the metrics at /metrics for Prometheus on its own thread.
+class MetricsServer:
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, metrics, host="127.0.0.1", port=9120):
+        self.metrics = metrics
+
+        self.logger = logging.getLogger("metrics-server")
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle_request(self)
+
+            def log_message(self, format, *args):
+                server.logger.debug(format, *args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return "http://{0}:{1}/metrics".format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="metrics-server", daemon=True
+        )
+        self.thread.start()
+        self.logger.info("Serving metrics on %s.", self.url)
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_request(self, handler):
+        if handler.path.split("?")[0] != "/metrics":
+            status, content_type, payload = 404, "text/plain", b"Not Found\n"
+        else:
+            status, content_type, payload = (
+                200,
+                self.CONTENT_TYPE,
+                self.metrics.render().encode("utf-8"),
+            )
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
@@ -0,0 +1,2 @@
+from .Metrics import Metrics
+from .MetricsServer import MetricsServer
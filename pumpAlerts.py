@@ -1,54 +1,285 @@
 import colorlog, logging
 import os
+import signal
+import sys
 import yaml
 
-from alerter import BinancePumpAndDumpAlerter
+from alerter import (
+    BinancePumpAndDumpAlerter,
+    HistoryBackfill,
+    HistorySnapshot,
+    Market,
+    MiniTickerStream,
+    ShardPool,
+    TickerFetcher,
+)
+from metrics import Metrics, MetricsServer
+from recorder import TickRecorder
 from reporter import ReportGenerator
-from sender import TelegramSender
-from utils import ConversionUtils
+from sender import FileSink, NotificationSender, TelegramSink, WebhookSink
+from utils import ConfigWatcher, ConversionUtils
 
-# Read config
+# Config and logging are set up in main(), spawned shard workers import this module again
 __location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-config_file = "config.yml"
-
-# Using dev config while development
-config_dev_file = "config.dev.yml"
-if os.path.isfile(config_dev_file):
-    config_file = config_dev_file
-
-yaml_file = open(os.path.join(__location__, config_file), "r", encoding="utf-8")
-
-config = yaml.load(yaml_file, Loader=yaml.FullLoader)
 
 # Define the log format
 bold_seq = "\033[1m"
 log_format = "[%(asctime)s] %(processName)-12s %(threadName)-23s %(levelname)-8s %(name)-23s %(message)s"
 color_format = f"{bold_seq} " "%(log_color)s " f"{log_format}"
 
-colorlog.basicConfig(
-    # Define logging level according to the configuration
-    level=logging.DEBUG if config["debug"] is True else logging.INFO,
-    # Declare the object we created to format the log messages
-    format=color_format,
-    # Declare handlers for the Console
-    handlers=[logging.StreamHandler()],
-)
-
 # Define your logger name
 logger = logging.getLogger("binance-pump-alerts-app")
 
-# Logg whole configuration during the startup
-logger.info("Using config file: %s", config_file)
-logger.debug("Config: %s", config)
+# Keys which change how prices are fetched, kept or sent, only applied on restart
+RESTART_KEYS = [
+    "extractInterval",
+    "telegramToken",
+    "telegramChatId",
+    "telegramAlertChatId",
+    "telegramMaxQueueSize",
+    "telegramChatMessagesPerMinute",
+    "webhookUrl",
+    "webhookMaxQueueSize",
+    "notificationFile",
+    "priceRetryInterval",
+    "priceRetryAttempts",
+    "priceRequestTimeout",
+    "backfillEnabled",
+    "backfillConcurrency",
+    "snapshotEnabled",
+    "snapshotPath",
+    "snapshotInterval",
+    "recordEnabled",
+    "recordPath",
+    "metricsEnabled",
+    "metricsHost",
+    "metricsPort",
+    "shardWorkers",
+    "weightLimitPerMinute",
+    "configReloadEnabled",
+    "configReloadInterval",
+]
+
+
+def create_market(config, market_config):
+    # Markets fall back to the global config for every parameter they do not override
+    market_config = {**config, **market_config}
+
+    is_futures = "fapi" in market_config["apiUrl"]
+
+    stream = None
+    if "streamEnabled" in market_config and market_config["streamEnabled"]:
+        stream = MiniTickerStream(stream_url=market_config["streamUrl"])
+    volume_enabled = "volumeEnabled" in market_config and market_config["volumeEnabled"]
+
+    return Market(
+        name=market_config["name"]
+        if "name" in market_config
+        else ("Binance Futures" if is_futures else "Binance Spot"),
+        api_url=market_config["apiUrl"],
+        trade_url=market_config["tradeUrl"]
+        if "tradeUrl" in market_config
+        else (
+            "https://www.binance.com/en/futures/{0}"
+            if is_futures
+            else "https://www.binance.com/en/trade/{0}"
+        ),
+        watchlist=[] if "watchlist" not in market_config else market_config["watchlist"],
+        blacklist=[] if "blacklist" not in market_config else market_config["blacklist"],
+        pairs_of_interest=market_config["pairsOfInterest"],
+        outlier_intervals=market_config["outlierIntervals"],
+        stream=stream,
+        volume_enabled=volume_enabled,
+        volume_api_url=market_config["volumeApiUrl"]
+        if "volumeApiUrl" in market_config
+        else market_config["apiUrl"].replace("/ticker/price", "/ticker/24hr"),
+        volume_outlier_intervals=market_config["volumeOutlierIntervals"]
+        if "volumeOutlierIntervals" in market_config
+        else {},
+        klines_url=market_config["klinesUrl"]
+        if "klinesUrl" in market_config
+        else market_config["apiUrl"].replace("/ticker/price", "/klines"),
+        # Request weight limits are 6000 per minute on Spot and 2400 on Futures, leave room for the ticks
+        backfill_weight_per_minute=market_config["backfillWeightPerMinute"]
+        if "backfillWeightPerMinute" in market_config
+        else (1800 if is_futures else 4800),
+        fast_decode_enabled="fastDecodeEnabled" in market_config
+        and market_config["fastDecodeEnabled"],
+        z_score_threshold=market_config["zScoreThreshold"]
+        if "zScoreEnabled" in market_config and market_config["zScoreEnabled"]
+        else None,
+        z_score_window=ConversionUtils.duration_to_seconds(
+            market_config["zScoreWindow"]
+        )
+        if "zScoreWindow" in market_config
+        else 86400,
+        z_score_warmup=ConversionUtils.duration_to_seconds(
+            market_config["zScoreWarmup"]
+        )
+        if "zScoreWarmup" in market_config
+        else 3600,
+        # Request weight limits per IP are 6000 per minute on Spot and 2400 on Futures
+        weight_limit_per_minute=market_config["weightLimitPerMinute"]
+        if "weightLimitPerMinute" in market_config
+        else (2400 if is_futures else 6000),
+        # Weight of the ticker of all symbols, the 24hr ticker is polled with volume enabled
+        ticker_weight=(40 if is_futures else 80)
+        if volume_enabled and stream is None
+        else (2 if is_futures else 4),
+    )
+
+
+def price_source(market):
+    return (
+        market.api_url,
+        market.ticker_url,
+        market.klines_url,
+        market.stream.stream_url if market.stream is not None else None,
+        market.volume_enabled,
+        market.ticker_decoder is not None,
+    )
+
+
+def select_config_file():
+    # Using dev config while development
+    config_dev_file = "config.dev.yml"
+    if os.path.isfile(config_dev_file):
+        return config_dev_file
+    return "config.yml"
+
+
+def load_config(path):
+    with open(path, "r", encoding="utf-8") as yaml_file:
+        return yaml.load(yaml_file, Loader=yaml.FullLoader)
+
+
+def reload_config(config_file, config, alerter, reporter, telegram):
+    # Validated in full before anything is applied, a broken config raises and the running one is kept.
+    # Keys only applied on restart are compared with the config of the startup.
+    new_config = load_config(os.path.join(__location__, config_file))
+
+    markets = [
+        create_market(new_config, market_config)
+        for market_config in (
+            new_config["markets"] if "markets" in new_config else [{}]
+        )
+    ]
+    if [market.name for market in markets] != [
+        market.name for market in alerter.markets
+    ]:
+        raise ValueError("Markets can only be added or removed on restart.")
+
+    for interval in new_config["chartIntervals"] + new_config["topReportIntervals"]:
+        if not isinstance(ConversionUtils.duration_to_seconds(interval), int):
+            raise ValueError("Invalid interval: {0}.".format(interval))
+    for interval in new_config["topReportIntervals"]:
+        if interval not in new_config["chartIntervals"]:
+            raise ValueError(
+                "Top report interval {0} is not in chartIntervals.".format(interval)
+            )
+
+    for key in RESTART_KEYS:
+        if (config[key] if key in config else None) != (
+            new_config[key] if key in new_config else None
+        ):
+            logger.warning("Changed %s only applies on restart.", key)
+    for market, new_market in zip(alerter.markets, markets):
+        if price_source(market) != price_source(new_market):
+            logger.warning(
+                "Changed price source of %s only applies on restart.", market.name
+            )
+
+    logging.getLogger().setLevel(
+        logging.DEBUG if new_config["debug"] is True else logging.INFO
+    )
+
+    reporter.alert_skip_threshold = new_config["alertSkipThreshold"]
+    reporter.pump_emoji = new_config["pumpEmoji"]
+    reporter.dump_emoji = new_config["dumpEmoji"]
+    telegram.bot_emoji = new_config["botEmoji"]
+    telegram.top_emoji = new_config["topEmoji"]
+    telegram.news_emoji = new_config["newsEmoji"]
+
+    # Everything touching the history is applied by the tick loop before the next tick
+    alerter.reconfigure(
+        markets=markets,
+        chart_intervals=new_config["chartIntervals"],
+        top_report_intervals=new_config["topReportIntervals"],
+        top_pump_enabled=new_config["topPumpEnabled"],
+        top_dump_enabled=new_config["topDumpEnabled"],
+        additional_statistics_enabled=new_config["additionalStatsEnabled"],
+        no_of_reported_coins=new_config["noOfReportedCoins"],
+        dump_enabled=new_config["dumpEnabled"],
+        check_new_listing_enabled=new_config["checkNewListingEnabled"],
+        top_report_nearest_hour=new_config["topReportNearestHour"],
+    )
+
+    logger.info("Reloaded config file: %s", config_file)
+    logger.debug("Config: %s", new_config)
+
+
+def exit_on_sigterm(signum, frame):
+    # Sent again to the whole process group by some supervisors, the shutdown is not interrupted
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    sys.exit(0)
 
 
 def main():
-    telegram = TelegramSender(
-        token=config["telegramToken"],
-        chat_id=config["telegramChatId"],
-        alert_chat_id=config["telegramAlertChatId"]
-        if "telegramAlertChatId" in config and config["telegramAlertChatId"] != 0
-        else config["telegramChatId"],
+    # Read config
+    config_file = select_config_file()
+    config = load_config(os.path.join(__location__, config_file))
+
+    colorlog.basicConfig(
+        # Define logging level according to the configuration
+        level=logging.DEBUG if config["debug"] is True else logging.INFO,
+        # Declare the object we created to format the log messages
+        format=color_format,
+        # Declare handlers for the Console
+        handlers=[logging.StreamHandler()],
+    )
+
+    # Logg whole configuration during the startup
+    logger.info("Using config file: %s", config_file)
+    logger.debug("Config: %s", config)
+
+    sinks = []
+    if "telegramToken" in config and config["telegramToken"]:
+        sinks += TelegramSink.for_chats(
+            token=config["telegramToken"],
+            chat_id=config["telegramChatId"],
+            alert_chat_id=config["telegramAlertChatId"]
+            if "telegramAlertChatId" in config
+            else 0,
+            max_queue_size=config["telegramMaxQueueSize"]
+            if "telegramMaxQueueSize" in config
+            else 100,
+            chat_messages_per_minute=config["telegramChatMessagesPerMinute"]
+            if "telegramChatMessagesPerMinute" in config
+            else 20,
+            base_url=config["telegramApiUrl"] if "telegramApiUrl" in config else None,
+        )
+    if "webhookUrl" in config and config["webhookUrl"]:
+        sinks.append(
+            WebhookSink(
+                config["webhookUrl"],
+                max_queue_size=config["webhookMaxQueueSize"]
+                if "webhookMaxQueueSize" in config
+                else 1000,
+            )
+        )
+    if "notificationFile" in config and config["notificationFile"]:
+        sinks.append(
+            FileSink(
+                config["notificationFile"]
+                if config["notificationFile"] == "-"
+                else os.path.join(__location__, config["notificationFile"])
+            )
+        )
+    if len(sinks) == 0:
+        logger.warning("No notification sink is configured, alerts are only logged.")
+
+    telegram = NotificationSender(
+        sinks,
         bot_emoji=config["botEmoji"],
         top_emoji=config["topEmoji"],
         news_emoji=config["newsEmoji"],
@@ -61,19 +292,96 @@ def main():
         dump_emoji=config["dumpEmoji"],
     )
 
+    metrics = Metrics()
+    if "metricsEnabled" in config and config["metricsEnabled"]:
+        MetricsServer(
+            metrics,
+            host=config["metricsHost"] if "metricsHost" in config else "127.0.0.1",
+            port=config["metricsPort"] if "metricsPort" in config else 9120,
+        ).start()
+
+    fetcher = TickerFetcher(
+        retry_interval=ConversionUtils.duration_to_seconds(
+            config["priceRetryInterval"]
+        ),
+        max_retries=config["priceRetryAttempts"]
+        if "priceRetryAttempts" in config
+        else 3,
+        read_timeout=ConversionUtils.duration_to_seconds(config["priceRequestTimeout"])
+        if "priceRequestTimeout" in config
+        else 5,
+        metrics=metrics,
+    )
+
+    markets = [
+        create_market(config, market_config)
+        for market_config in (config["markets"] if "markets" in config else [{}])
+    ]
+    for market in markets:
+        fetcher.add_weight_budget(market.api_url, market.weight_limit_per_minute)
+
+    history_snapshot = None
+    if "snapshotEnabled" in config and config["snapshotEnabled"]:
+        history_snapshot = HistorySnapshot(
+            directory=os.path.join(__location__, config["snapshotPath"])
+            if "snapshotPath" in config
+            else os.path.join(__location__, "snapshots"),
+            interval=ConversionUtils.duration_to_seconds(config["snapshotInterval"])
+            if "snapshotInterval" in config
+            else 60,
+        )
+
+    history_backfill = None
+    if "backfillEnabled" in config and config["backfillEnabled"]:
+        backfill_concurrency = (
+            config["backfillConcurrency"] if "backfillConcurrency" in config else 50
+        )
+        history_backfill = HistoryBackfill(
+            fetcher=TickerFetcher(
+                retry_interval=ConversionUtils.duration_to_seconds(
+                    config["priceRetryInterval"]
+                ),
+                max_retries=1,
+                pool_size=backfill_concurrency,
+                weight_budgets=fetcher.weight_budgets,
+            ),
+            max_workers=backfill_concurrency,
+        )
+
+    shard_pool = None
+    if "shardWorkers" in config and config["shardWorkers"] > 1:
+        # Shard workers keep the history, they take over its snapshot and backfill
+        shard_pool = ShardPool(
+            workers=config["shardWorkers"],
+            snapshot_directory=history_snapshot.directory
+            if history_snapshot is not None
+            else None,
+            snapshot_interval=history_snapshot.interval
+            if history_snapshot is not None
+            else 60,
+            backfill_concurrency=backfill_concurrency
+            if history_backfill is not None
+            else None,
+            retry_interval=ConversionUtils.duration_to_seconds(
+                config["priceRetryInterval"]
+            ),
+        )
+        history_snapshot = None
+        history_backfill = None
+
+    tick_recorder = None
+    if "recordEnabled" in config and config["recordEnabled"]:
+        tick_recorder = TickRecorder(
+            os.path.join(__location__, config["recordPath"])
+            if "recordPath" in config
+            else os.path.join(__location__, "records", "ticks.bin")
+        )
+
     alerter = BinancePumpAndDumpAlerter(
-        api_url=config["apiUrl"],
-        watchlist=[] if "watchlist" not in config else config["watchlist"],
-        blacklist=[] if "blacklist" not in config else config["blacklist"],
-        pairs_of_interest=config["pairsOfInterest"],
+        markets=markets,
         chart_intervals=config["chartIntervals"],
-        outlier_intervals=config["outlierIntervals"],
         top_report_intervals=config["topReportIntervals"],
         extract_interval=ConversionUtils.duration_to_seconds(config["extractInterval"]),
-        retry_interval=ConversionUtils.duration_to_seconds(
-            config["priceRetryInterval"]
-        ),
-        reset_interval=ConversionUtils.duration_to_seconds(config["resetInterval"]),
         top_pump_enabled=config["topPumpEnabled"],
         top_dump_enabled=config["topDumpEnabled"],
         additional_statistics_enabled=config["additionalStatsEnabled"],
@@ -83,9 +391,32 @@ def main():
         top_report_nearest_hour=config["topReportNearestHour"],
         telegram=telegram,
         report_generator=reporter,
+        fetcher=fetcher,
+        history_snapshot=history_snapshot,
+        history_backfill=history_backfill,
+        tick_recorder=tick_recorder,
+        metrics=metrics,
+        shard_pool=shard_pool,
     )
 
-    alerter.run()
+    # docker stop sends SIGTERM, exit normally so the history snapshot is saved
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+
+    if "configReloadEnabled" in config and config["configReloadEnabled"]:
+        ConfigWatcher(
+            os.path.join(__location__, config_file),
+            reload=lambda: reload_config(
+                config_file, config, alerter, reporter, telegram
+            ),
+            interval=ConversionUtils.duration_to_seconds(config["configReloadInterval"])
+            if "configReloadInterval" in config
+            else 5,
+        ).start()
+
+    try:
+        alerter.run()
+    finally:
+        telegram.close()
 
 
 if __name__ == "__main__":
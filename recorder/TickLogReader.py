@@ -0,0 +1,125 @@
+import logging
+import numpy as np
+
+from .TickRecorder import TickRecorder
+
+
+# Reads a log written by the TickRecorder tick by tick.
+# Prices and volumes of every market are rebuilt in place, the arrays yielded are reused by the next tick.
+class TickLogReader:
+    def __init__(self, path):
+        self.path = path
+        self.logger = logging.getLogger("tick-log-reader")
+
+    def decode_changes(self, payload, offset, values):
+        bitmap_length = (len(values) + 7) // 8
+        changed = np.unpackbits(
+            np.frombuffer(payload, dtype=np.uint8, count=bitmap_length, offset=offset),
+            count=len(values),
+            bitorder="little",
+        ).astype(bool)
+        offset += bitmap_length
+
+        no_of_changes = int(np.count_nonzero(changed))
+        values[changed] = np.frombuffer(
+            payload, dtype=np.float64, count=no_of_changes, offset=offset
+        )
+        return offset + 8 * no_of_changes
+
+    def market_names(self):
+        # Only market records are read, everything else is skipped without decoding
+        names = []
+        header_size = TickRecorder.RECORD_HEADER.size
+        with open(self.path, "rb") as log_file:
+            log_file.seek(len(TickRecorder.MAGIC))
+            while True:
+                header = log_file.read(header_size)
+                if len(header) < header_size:
+                    return names
+
+                record_type, length = TickRecorder.RECORD_HEADER.unpack(header)
+                if record_type != TickRecorder.MARKET_NAME:
+                    log_file.seek(length, 1)
+                    continue
+
+                name = log_file.read(length)[TickRecorder.MARKET.size :].decode("utf-8")
+                if name not in names:
+                    names.append(name)
+
+    def read_records(self, log_file):
+        header_size = TickRecorder.RECORD_HEADER.size
+        while True:
+            header = log_file.read(header_size)
+            if len(header) < header_size:
+                return
+
+            record_type, length = TickRecorder.RECORD_HEADER.unpack(header)
+            payload = log_file.read(length)
+            if len(payload) < length:
+                # Last record was cut off, e.g. the bot was killed while writing
+                self.logger.warning("Ignoring incomplete record at the end of the log.")
+                return
+
+            yield record_type, payload
+
+    def __iter__(self):
+        # Yields tuples of time, market name, symbols, prices, volumes or None and the symbols new in this tick
+        with open(self.path, "rb") as log_file:
+            if log_file.read(len(TickRecorder.MAGIC)) != TickRecorder.MAGIC:
+                raise ValueError("Not a tick log: {0}".format(self.path))
+
+            markets = {}
+            new_symbols = {}
+
+            for record_type, payload in self.read_records(log_file):
+                if record_type == TickRecorder.SESSION:
+                    markets = {}
+                    new_symbols = {}
+
+                elif record_type == TickRecorder.MARKET_NAME:
+                    (market_id,) = TickRecorder.MARKET.unpack_from(payload)
+                    markets[market_id] = {
+                        "name": payload[TickRecorder.MARKET.size :].decode("utf-8"),
+                        "symbols": [],
+                        "prices": np.empty(0),
+                        "volumes": np.empty(0),
+                    }
+                    new_symbols[market_id] = []
+
+                elif record_type == TickRecorder.SYMBOLS:
+                    (market_id,) = TickRecorder.MARKET.unpack_from(payload)
+                    symbols = (
+                        payload[TickRecorder.MARKET.size :].decode("utf-8").split("\n")
+                    )
+                    markets[market_id]["symbols"].extend(symbols)
+                    new_symbols[market_id].extend(symbols)
+
+                elif record_type == TickRecorder.PRICES:
+                    current_time, market_id, no_of_symbols, flags = (
+                        TickRecorder.TICK.unpack_from(payload)
+                    )
+                    market = markets[market_id]
+                    offset = TickRecorder.TICK.size
+
+                    market["prices"] = TickRecorder.resize(
+                        market["prices"], no_of_symbols
+                    )
+                    offset = self.decode_changes(payload, offset, market["prices"])
+
+                    volumes = None
+                    if flags & TickRecorder.HAS_VOLUMES:
+                        market["volumes"] = TickRecorder.resize(
+                            market["volumes"], no_of_symbols
+                        )
+                        self.decode_changes(payload, offset, market["volumes"])
+                        volumes = market["volumes"]
+
+                    yield (
+                        current_time,
+                        market["name"],
+                        market["symbols"],
+                        market["prices"],
+                        volumes,
+                        new_symbols[market_id],
+                    )
+                    new_symbols[market_id] = []
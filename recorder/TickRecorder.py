@@ -0,0 +1,152 @@
+import logging
+import numpy as np
+import os
+import struct
+
+
+# Appends the ticker response of every tick to a compact binary log for replays.
+# Symbols are written once per market into a dictionary, ticks only carry the prices which changed
+# since the previous tick as a bitmap over the dictionary plus the changed float64 values.
+class TickRecorder:
+    MAGIC = b"BPATICKS"
+    RECORD_HEADER = struct.Struct("<cI")
+    MARKET = struct.Struct("<H")
+    TICK = struct.Struct("<dHIB")
+
+    # Record types
+    SESSION = b"R"
+    MARKET_NAME = b"M"
+    SYMBOLS = b"S"
+    PRICES = b"T"
+
+    # Tick flags
+    HAS_VOLUMES = 1
+
+    def __init__(self, path):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(self.MAGIC)
+
+        # Every start is a new session, market ids and symbol dictionaries start over
+        self.write_record(self.SESSION, b"")
+
+        self.markets = {}
+
+        self.logger = logging.getLogger("tick-recorder")
+
+    def write_record(self, record_type, payload):
+        self.file.write(self.RECORD_HEADER.pack(record_type, len(payload)))
+        self.file.write(payload)
+
+    def get_market_state(self, market):
+        if market.name not in self.markets:
+            market_id = len(self.markets)
+            self.markets[market.name] = {
+                "id": market_id,
+                "symbol_indexes": {},
+                "symbols": None,
+                "indexes": None,
+                "prices": np.empty(0),
+                "volumes": np.empty(0),
+            }
+            self.write_record(
+                self.MARKET_NAME,
+                self.MARKET.pack(market_id) + market.name.encode("utf-8"),
+            )
+        return self.markets[market.name]
+
+    @staticmethod
+    def encode_changes(previous, current):
+        # NaN marks symbols missing in this tick, NaN to NaN is no change
+        changed = ~((previous == current) | (np.isnan(previous) & np.isnan(current)))
+        return (
+            np.packbits(changed, bitorder="little").tobytes()
+            + current[changed].tobytes()
+        )
+
+    def record(self, market, current_time, exchange_assets):
+        has_volumes = len(exchange_assets) > 0 and "quoteVolume" in exchange_assets[0]
+
+        symbols = [exchange_asset["symbol"] for exchange_asset in exchange_assets]
+        prices = np.array(
+            [float(exchange_asset[market.price_key]) for exchange_asset in exchange_assets]
+        )
+        volumes = None
+        if has_volumes:
+            volumes = np.array(
+                [float(exchange_asset["quoteVolume"]) for exchange_asset in exchange_assets]
+            )
+
+        self.record_columns(market, current_time, symbols, prices, volumes)
+
+    def record_columns(self, market, current_time, symbols, prices, volumes=None):
+        state = self.get_market_state(market)
+        symbol_indexes = state["symbol_indexes"]
+
+        # Dictionary positions are only looked up again when the symbols of the ticker change
+        if symbols != state["symbols"]:
+            new_symbols = [symbol for symbol in symbols if symbol not in symbol_indexes]
+            if len(new_symbols) > 0:
+                for symbol in new_symbols:
+                    symbol_indexes[symbol] = len(symbol_indexes)
+                self.write_record(
+                    self.SYMBOLS,
+                    self.MARKET.pack(state["id"])
+                    + "\n".join(new_symbols).encode("utf-8"),
+                )
+
+            state["symbols"] = symbols
+            state["indexes"] = np.array(
+                [symbol_indexes[symbol] for symbol in symbols], dtype=np.int64
+            )
+
+        no_of_symbols = len(symbol_indexes)
+        has_volumes = volumes is not None
+        indexes = state["indexes"]
+
+        tick_prices = np.full(no_of_symbols, np.nan)
+        tick_prices[indexes] = prices
+        if has_volumes:
+            tick_volumes = np.full(no_of_symbols, np.nan)
+            tick_volumes[indexes] = volumes
+
+        payload = [
+            self.TICK.pack(
+                current_time,
+                state["id"],
+                no_of_symbols,
+                self.HAS_VOLUMES if has_volumes else 0,
+            ),
+            self.encode_changes(
+                self.resize(state["prices"], no_of_symbols), tick_prices
+            ),
+        ]
+        state["prices"] = tick_prices
+
+        if has_volumes:
+            payload.append(
+                self.encode_changes(
+                    self.resize(state["volumes"], no_of_symbols), tick_volumes
+                )
+            )
+            state["volumes"] = tick_volumes
+
+        self.write_record(self.PRICES, b"".join(payload))
+        self.file.flush()
+
+    @staticmethod
+    def resize(values, size):
+        if len(values) == size:
+            return values
+        resized = np.full(size, np.nan)
+        resized[: len(values)] = values[:size]
+        return resized
+
+    def close(self):
+        self.file.close()
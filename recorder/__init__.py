@@ -0,0 +1,2 @@
+from .TickLogReader import TickLogReader
+from .TickRecorder import TickRecorder
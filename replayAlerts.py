@@ -0,0 +1,219 @@
+import argparse
+import logging
+import os
+import time
+import yaml
+
+from alerter import BinancePumpAndDumpAlerter, Market
+from recorder import TickLogReader
+from reporter import ReportGenerator
+from sender import NullSender
+from utils import ConversionUtils
+
+# Replays a tick log written with recordEnabled through the alerter as fast as possible.
+# Nothing is sent to Telegram. Tune outlierIntervals and alertSkipThreshold in the config and replay again.
+#
+# Run with: python replayAlerts.py records/ticks.bin [--config config.yml] [--print-alerts]
+
+def create_market(config, name):
+    # Markets use the settings of the entry with the same name, like the live bot
+    market_config = dict(config)
+    for entry in config["markets"] if "markets" in config else []:
+        if "name" in entry and entry["name"] == name:
+            market_config.update(entry)
+
+    return Market(
+        name=name,
+        api_url=None,
+        trade_url=market_config["tradeUrl"]
+        if "tradeUrl" in market_config
+        else "https://www.binance.com/en/trade/{0}",
+        watchlist=[] if "watchlist" not in market_config else market_config["watchlist"],
+        blacklist=[] if "blacklist" not in market_config else market_config["blacklist"],
+        pairs_of_interest=market_config["pairsOfInterest"],
+        outlier_intervals=market_config["outlierIntervals"],
+        volume_enabled="volumeEnabled" in market_config
+        and market_config["volumeEnabled"],
+        volume_outlier_intervals=market_config["volumeOutlierIntervals"]
+        if "volumeOutlierIntervals" in market_config
+        else {},
+        z_score_threshold=market_config["zScoreThreshold"]
+        if "zScoreEnabled" in market_config and market_config["zScoreEnabled"]
+        else None,
+        z_score_window=ConversionUtils.duration_to_seconds(
+            market_config["zScoreWindow"]
+        )
+        if "zScoreWindow" in market_config
+        else 86400,
+        z_score_warmup=ConversionUtils.duration_to_seconds(
+            market_config["zScoreWarmup"]
+        )
+        if "zScoreWarmup" in market_config
+        else 3600,
+    )
+
+
+def create_alerter(config, markets, sender):
+    return BinancePumpAndDumpAlerter(
+        markets=markets,
+        chart_intervals=config["chartIntervals"],
+        top_report_intervals=config["topReportIntervals"],
+        extract_interval=ConversionUtils.duration_to_seconds(config["extractInterval"]),
+        top_pump_enabled=config["topPumpEnabled"],
+        top_dump_enabled=config["topDumpEnabled"],
+        additional_statistics_enabled=config["additionalStatsEnabled"],
+        no_of_reported_coins=config["noOfReportedCoins"],
+        dump_enabled=config["dumpEnabled"],
+        check_new_listing_enabled=config["checkNewListingEnabled"],
+        top_report_nearest_hour=config["topReportNearestHour"],
+        telegram=sender,
+        report_generator=ReportGenerator(
+            telegram=sender,
+            alert_skip_threshold=config["alertSkipThreshold"],
+            pump_emoji=config["pumpEmoji"],
+            dump_emoji=config["dumpEmoji"],
+        ),
+        fetcher=None,
+    )
+
+
+def update_symbols(alerter, market, symbols, new_symbols):
+    if len(market.known_symbols) == 0:
+        market.known_symbols = set(new_symbols)
+        market.filtered_assets = alerter.filter_and_convert_assets(
+            [{"symbol": symbol} for symbol in new_symbols],
+            market.symbol_filter,
+            market,
+        )
+    elif alerter.check_new_listing_enabled:
+        alerter.add_new_asset_listings(market, dict.fromkeys(new_symbols))
+
+    # Position of every monitored row in the log, -1 if the symbol is not in the log anymore
+    return alerter.symbol_positions(market.filtered_assets, symbols)
+
+
+def end_tick(alerter, current_time):
+    # Waits for the alerts of the tick, messages are kept in the order of the live bot
+    alerter.alert_renderer.flush()
+    alerter.alert_renderer.join()
+    alerter.check_and_send_top_pump_dump_statistics_report(
+        alerter.markets,
+        current_time,
+        alerter.top_report_intervals,
+        alerter.top_pump_enabled,
+        alerter.top_dump_enabled,
+        alerter.additional_statistics_enabled,
+        alerter.no_of_reported_coins,
+    )
+
+
+def replay(alerter, reader, top_report_nearest_hour):
+    markets = {market.name: market for market in alerter.markets}
+    log_indexes = {}
+
+    ticks = 0
+    first_time = None
+    tick_time = None
+    start_time = time.perf_counter()
+
+    for recorded_time, name, symbols, prices, volumes, new_symbols in reader:
+        current_time = int(recorded_time)
+
+        if first_time is None:
+            first_time = current_time
+            # Top reports are scheduled from the recorded time instead of the wall clock
+            start = (
+                current_time - (current_time % 3600) + 3600
+                if top_report_nearest_hour
+                else current_time
+            )
+            for interval in alerter.top_report_intervals.values():
+                interval["start"] = start
+
+        # All markets of a tick share the time, reports are checked once per tick like in the live loop
+        if tick_time is not None and current_time != tick_time:
+            end_tick(alerter, tick_time)
+            ticks += 1
+        tick_time = current_time
+
+        market = markets[name]
+        if len(new_symbols) > 0:
+            log_indexes[name] = update_symbols(alerter, market, symbols, new_symbols)
+
+        if market.volume_history is not None and volumes is None:
+            raise ValueError(
+                "Log has no volumes for {0}, disable volumeEnabled.".format(name)
+            )
+
+        alerter.update_monitored_prices_and_send_news_messages(
+            market,
+            alerter.select_rows(prices, log_indexes[name]),
+            alerter.select_rows(volumes, log_indexes[name])
+            if market.volume_history is not None
+            else None,
+            # Exact tick time, windows are looked up by time
+            recorded_time,
+            alerter.dump_enabled,
+        )
+
+    if tick_time is not None:
+        end_tick(alerter, tick_time)
+        ticks += 1
+
+    elapsed_time = time.perf_counter() - start_time
+    recorded_time = tick_time - first_time if tick_time is not None else 0
+    return ticks, recorded_time, elapsed_time
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a tick log through the alerter."
+    )
+    parser.add_argument("log", help="Tick log written with recordEnabled.")
+    parser.add_argument("--config", default="config.yml", help="Config to replay with.")
+    parser.add_argument(
+        "--print-alerts", action="store_true", help="Print every message."
+    )
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging.")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.WARNING,
+        format="[%(asctime)s] %(levelname)-8s %(name)-23s %(message)s",
+    )
+
+    with open(args.config, "r", encoding="utf-8") as yaml_file:
+        config = yaml.load(yaml_file, Loader=yaml.FullLoader)
+
+    reader = TickLogReader(args.log)
+    markets = [create_market(config, name) for name in reader.market_names()]
+    sender = NullSender(keep_messages=args.print_alerts)
+    alerter = create_alerter(config, markets, sender)
+
+    ticks, recorded_time, elapsed_time = replay(
+        alerter, reader, config["topReportNearestHour"]
+    )
+
+    if args.print_alerts:
+        for message in sender.messages:
+            print(message, end="\n\n")
+
+    statistics = sender.get_statistics()
+    print(
+        "Replayed {0} ticks covering {1:.1f}h of {2} in {3:.2f}s, {4:.0f} ticks/s.".format(
+            ticks,
+            recorded_time / 3600,
+            os.path.basename(args.log),
+            elapsed_time,
+            ticks / elapsed_time if elapsed_time > 0 else 0,
+        )
+    )
+    print(
+        "Alerts and listings: {0}. Top reports: {1}.".format(
+            statistics["news"], statistics["report"]
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import logging
+import queue
+import threading
+import time
+
+
+# Renders the alert events of every tick on its own thread and hands the messages over for delivery.
+# The tick loop only queues the events, so it never waits for formatting or sending.
+# Skipped alerts are dropped before anything is formatted.
+class AlertRenderer:
+    FLUSH = "flush"
+
+    def __init__(self, report_generator, telegram, metrics):
+        self.report_generator = report_generator
+        self.telegram = telegram
+        self.metrics = metrics
+
+        self.queue = queue.Queue()
+
+        self.logger = logging.getLogger("alert-renderer")
+
+        self.thread = threading.Thread(
+            target=self.run, name="alert-renderer", daemon=True
+        )
+        self.thread.start()
+
+    def put(self, market, events, intervals, current_time):
+        # Intervals go along with the events, a reloaded config must not change the ones already queued
+        if len(events) > 0:
+            self.queue.put((market, events, intervals, current_time))
+
+    def flush(self):
+        # The alerts of a tick are coalesced once all of them are rendered
+        self.queue.put(self.FLUSH)
+
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def join(self):
+        # Waits until everything queued so far is handed over
+        self.queue.join()
+
+    def close(self):
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+
+    def render(self, market, events, intervals, current_time):
+        start = time.perf_counter()
+
+        skipped_alerts = 0
+        for event in events:
+            if not self.report_generator.send_pump_dump_message(
+                market, event, intervals, current_time
+            ):
+                skipped_alerts += 1
+
+        self.metrics.observe_stage("render", time.perf_counter() - start, market.name)
+        self.metrics.increment(
+            "skipped_alerts_total", skipped_alerts, market=market.name
+        )
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if item == self.FLUSH:
+                    self.telegram.flush()
+                else:
+                    self.render(*item)
+            except Exception:
+                self.logger.exception("Rendering the alerts failed.")
+            finally:
+                self.queue.task_done()
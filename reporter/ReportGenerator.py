@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 
 from datetime import datetime
 
@@ -42,14 +43,14 @@ Open in [Binance Spot](https://www.binance.com/en/trade/{1})\
             is_alert_chat=False,
         )
 
-    def send_new_listings(self, symbols_to_add):
+    def send_new_listings(self, market, symbols_to_add):
         message = """\
-*New Listings*"
-{0} new pairs found, adding to monitored list."
+*New Listings* | {0}
+{1} new pairs found, adding to monitored list.
 
 *Adding Pairs:*\
             """.format(
-            len(symbols_to_add)
+            market.name, len(symbols_to_add)
         )
 
         message += "\n"
@@ -58,153 +59,188 @@ Open in [Binance Spot](https://www.binance.com/en/trade/{1})\
 
         self.telegram.send_news_message(message, is_alert_chat=True)
 
-    def send_pump_dump_message(
-        self,
-        asset,
-        chart_intervals,
-        outlier_intervals,
-        current_time,
-        dump_enabled=True,
-    ):
-        change_biggest_delta = 0
-        no_of_alerts = 0
-        message = ""
-
-        for interval in chart_intervals:
-
-            change = asset[interval]["change_current"]
-
-            # Skip report if no outlier
-            if abs(change) < outlier_intervals[interval]:
-                self.logger.debug(
-                    "Change for asset: %s for interval: %s is to low: %s. Skipping report creation.",
-                    asset["symbol"],
-                    interval,
-                    change,
-                )
-                continue
-
-            # Remember biggest change of all intervals, to skip later notification
-            change_last = asset[interval]["change_last"]
-            change_delta = change - change_last
-
-            if abs(change_delta) > abs(change_biggest_delta):
-                change_biggest_delta = change_delta
-
-            # Remember the total number of alerts
-            no_of_alerts += 1
+    def is_alert_skipped(self, event):
+        # Skip alert if the biggest change of the flagged intervals did not move enough since the last tick
+        change_deltas = (event.changes - event.changes_last)[event.outliers]
+        change_biggest_delta = change_deltas[np.argmax(np.abs(change_deltas))]
 
-            if change > 0:
-                message += "{0} *{1} Interval* | Change: _{2:.3f}%_\n".format(
-                    self.pump_emoji,
-                    interval,
-                    change * 100,
-                    asset["price"][-1],
-                )
-
-            if change < 0 and dump_enabled:
-                message += "{0} *{1} Interval* | Change: _{2:.3f}%_\n".format(
-                    self.dump_emoji,
-                    interval,
-                    change * 100,
-                    asset["price"][-1],
-                )
-
-        # Skip alert if change is not big enough to avoid spam
         if abs(change_biggest_delta) < (self.alert_skip_threshold / 100):
             self.logger.debug(
                 "Change for asset: %s on all intervals is to low: %s. Skipping this alert report.",
-                asset["symbol"],
+                event.symbol,
                 change_biggest_delta,
             )
-            return
+            return True
+        return False
+
+    def render_pump_dump_message(self, market, event, intervals, current_time):
+        lines = []
 
-        news_message = """\
+        # Outliers are already filtered for the dump setting, only the flagged intervals are reported
+        for i in np.flatnonzero(event.outliers):
+            change = event.changes[i]
+
+            line = "{0} *{1} Interval* | Change: _{2:.3f}%_".format(
+                self.pump_emoji if change > 0 else self.dump_emoji,
+                intervals[i],
+                change * 100,
+            )
+            if event.volume_changes is not None:
+                line += " | Volume: _{0:.3f}%_".format(event.volume_changes[i] * 100)
+            if event.z_scores is not None and np.isfinite(event.z_scores[i]):
+                line += " | z: _{0:.1f}_".format(event.z_scores[i])
+            lines.append(line + "\n")
+
+        return """\
 *{0}* | {1} Alert(s) | {2}
 
 Price: _{3:.10f}_ | Volume: _{4}_
 
 {5}
-Open in [Binance Spot](https://www.binance.com/en/trade/{0})\
+Open in [{6}]({7})\
             """.format(
-            asset["symbol"],
-            no_of_alerts,
+            event.symbol,
+            len(lines),
             datetime.fromtimestamp(current_time).strftime("%Y-%m-%d %H:%M:%S"),
-            asset["price"][-1],
-            0,
-            message,
+            event.price,
+            "{0:,.0f}".format(event.volume)
+            if event.volume is not None and not np.isnan(event.volume)
+            else 0,
+            "".join(lines),
+            market.name,
+            market.get_trade_url(event.symbol),
         )
 
-        self.telegram.send_news_message(news_message)
+    def send_pump_dump_message(self, market, event, intervals, current_time):
+        # Only alerts which are not skipped are rendered
+        if self.is_alert_skipped(event):
+            return False
+
+        # Alerts of the same tick are coalesced into as few messages as possible
+        self.telegram.send_news_message(
+            self.render_pump_dump_message(market, event, intervals, current_time),
+            coalesce=True,
+        )
+        return True
+
+    @staticmethod
+    def select_top_rows(changes, no_of_reported_coins):
+        # Partial selection of the largest changes per column, only the selected rows are sorted
+        k = min(no_of_reported_coins, len(changes))
+        if k == 0:
+            return np.zeros((0, changes.shape[1]), dtype=np.int64)
+
+        top_rows = np.argpartition(-changes, k - 1, axis=0)[:k]
+        order = np.argsort(
+            -np.take_along_axis(changes, top_rows, axis=0), axis=0, kind="stable"
+        )
+        return np.take_along_axis(top_rows, order, axis=0)
 
-    def send_top_pump_dump_statistics_report(
+    @classmethod
+    def summarize_top_changes(
+        cls, assets, changes, no_of_reported_coins, excluded_rows=()
+    ):
+        # Top pumps and dumps of every interval column and the counts behind the additional statistics.
+        # Summaries of disjoint sets of symbols merge into the summary of all of them.
+        if len(excluded_rows) > 0:
+            rows = np.setdiff1d(np.arange(len(changes)), list(excluded_rows))
+            assets = [assets[row] for row in rows]
+            changes = changes[rows]
+
+        pump_rows = cls.select_top_rows(changes, no_of_reported_coins)
+        dump_rows = cls.select_top_rows(-changes, no_of_reported_coins)
+
+        return {
+            "pumps": [
+                [(assets[row].symbol, changes[row, i]) for row in pump_rows[:, i]]
+                for i in range(changes.shape[1])
+            ],
+            "dumps": [
+                [(assets[row].symbol, changes[row, i]) for row in dump_rows[:, i]]
+                for i in range(changes.shape[1])
+            ],
+            "ups": np.count_nonzero(changes > 0, axis=0),
+            "downs": np.count_nonzero(changes < 0, axis=0),
+            "totals": changes.sum(axis=0),
+            "count": len(changes),
+        }
+
+    @staticmethod
+    def merge_top_summaries(summaries, no_of_reported_coins):
+        # The top of all symbols is within the tops of the parts, ties keep the order of the parts
+        intervals = range(len(summaries[0]["ups"]))
+        return {
+            "pumps": [
+                sorted(
+                    [pump for summary in summaries for pump in summary["pumps"][i]],
+                    key=lambda pump: -pump[1],
+                )[:no_of_reported_coins]
+                for i in intervals
+            ],
+            "dumps": [
+                sorted(
+                    [dump for summary in summaries for dump in summary["dumps"][i]],
+                    key=lambda dump: dump[1],
+                )[:no_of_reported_coins]
+                for i in intervals
+            ],
+            "ups": sum(summary["ups"] for summary in summaries),
+            "downs": sum(summary["downs"] for summary in summaries),
+            "totals": sum(summary["totals"] for summary in summaries),
+            "count": sum(summary["count"] for summary in summaries),
+        }
+
+    def send_top_pump_dump_statistics_reports(
         self,
-        assets,
-        interval,
+        market,
+        summary,
+        intervals,
         top_pump_enabled=True,
         top_dump_enabled=True,
         additional_stats_enabled=True,
         no_of_reported_coins=5,
     ):
 
-        if not top_pump_enabled or not top_dump_enabled:
+        # Report whatever is enabled, pump or dump only setups still get their report
+        if not (top_pump_enabled or top_dump_enabled or additional_stats_enabled):
             return
 
-        message = "*[{0} Interval]*\n\n".format(interval)
-
-        if top_pump_enabled:
-            pump_sorted_list = sorted(
-                assets,
-                key=lambda item: item[interval]["change_current"],
-                reverse=True,
-            )[0:no_of_reported_coins]
-
-            message += "{0} *Top {1} Pumps*\n".format(
-                self.pump_emoji, no_of_reported_coins
-            )
-
-            for asset in pump_sorted_list:
-                message += "- {0}: _{1:.2f}_%\n".format(
-                    asset["symbol"], asset[interval]["change_current"] * 100
-                )
-            message += "\n"
-
-        if top_dump_enabled:
-            dump_sorted_list = sorted(
-                assets, key=lambda item: item[interval]["change_current"]
-            )[0:no_of_reported_coins]
+        if summary["count"] == 0:
+            return
 
-            message += "{0} *Top {1} Dumps*\n".format(
-                self.dump_emoji, no_of_reported_coins
-            )
+        # Summary holds one entry per interval, computed in a single pass over the changes
+        for i, interval in enumerate(intervals):
+            message = "*{0} [{1} Interval]*\n\n".format(market.name, interval)
 
-            for asset in dump_sorted_list:
-                message += "- {0}: _{1:.2f}_%\n".format(
-                    asset["symbol"], asset[interval]["change_current"] * 100
+            if top_pump_enabled:
+                message += "{0} *Top {1} Pumps*\n".format(
+                    self.pump_emoji, no_of_reported_coins
                 )
 
-        if additional_stats_enabled:
-            if top_pump_enabled or top_dump_enabled:
+                for symbol, change in summary["pumps"][i]:
+                    message += "- {0}: _{1:.2f}_%\n".format(symbol, change * 100)
                 message += "\n"
-            message += self.generate_additional_statistics_report(assets, interval)
-
-        self.telegram.send_report_message(message, is_alert_chat=True)
 
-    def generate_additional_statistics_report(self, assets, interval):
-        up = 0
-        down = 0
-        sum_change = 0
+            if top_dump_enabled:
+                message += "{0} *Top {1} Dumps*\n".format(
+                    self.dump_emoji, no_of_reported_coins
+                )
 
-        for asset in assets:
-            if asset[interval]["change_current"] > 0:
-                up += 1
-            elif asset[interval]["change_current"] < 0:
-                down += 1
+                for symbol, change in summary["dumps"][i]:
+                    message += "- {0}: _{1:.2f}_%\n".format(symbol, change * 100)
 
-            sum_change += asset[interval]["change_current"]
+            if additional_stats_enabled:
+                if top_pump_enabled or top_dump_enabled:
+                    message += "\n"
+                message += self.generate_additional_statistics_report(
+                    summary["ups"][i],
+                    summary["downs"][i],
+                    summary["totals"][i] / summary["count"],
+                )
 
-        avg_change = sum_change / len(assets)
+            self.telegram.send_report_message(message, is_alert_chat=True)
 
+    def generate_additional_statistics_report(self, up, down, avg_change):
         return "*Average Change:* {0:.2f}%\n {1} {2} / {3} {4}".format(
             avg_change * 100,
             self.pump_emoji,
@@ -1 +1,2 @@
+from .AlertRenderer import AlertRenderer
 from .ReportGenerator import ReportGenerator
@@ -0,0 +1,48 @@
+import asyncio
+import json
+import os
+import sys
+
+from .NotificationSink import NotificationSink
+
+
+# Appends every message as a JSON line to a local file, or to stdout with "-", to pipe into other systems.
+# Writes run on a worker thread, a blocked pipe only holds up this sink.
+class FileSink(NotificationSink):
+    def __init__(self, path, max_queue_size=1000):
+        super().__init__("file", max_queue_size=max_queue_size)
+        self.path = path
+        self.file = None
+
+    async def open(self, session):
+        if self.path == "-":
+            self.file = sys.stdout
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    async def close(self):
+        if self.file is not None and self.file is not sys.stdout:
+            self.file.close()
+
+    def write(self, line):
+        self.file.write(line + "\n")
+        self.file.flush()
+
+    async def deliver(self, session, notification):
+        await asyncio.to_thread(
+            self.write,
+            json.dumps(
+                {
+                    "kind": notification["kind"],
+                    "chat": "alert" if notification["is_alert_chat"] else "main",
+                    "time": notification["time"],
+                    "text": notification["text"],
+                },
+                ensure_ascii=False,
+            ),
+        )
+        return None
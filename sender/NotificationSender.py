@@ -0,0 +1,182 @@
+import aiohttp
+import asyncio
+import logging
+import threading
+import time
+
+
+# Fans every message out to the notification sinks, e.g. Telegram, a webhook and a file.
+# Sinks are delivered concurrently on an event loop of their own thread, callers never wait for a delivery
+# and every sink has its own bounded queue, so a slow sink never holds up the others.
+class NotificationSender:
+    def __init__(
+        self,
+        sinks,
+        bot_emoji="\U0001F916",  # 🤖
+        top_emoji="\U0001F3C6",  # 🏆
+        news_emoji="\U0001F4F0",  # 📰
+        request_timeout=30,
+    ):
+        self.sinks = sinks
+
+        self.bot_emoji = bot_emoji
+        self.top_emoji = top_emoji
+        self.news_emoji = news_emoji
+
+        self.pending_messages = []
+        self.lock = threading.Lock()
+
+        self.logger = logging.getLogger("notification-sender")
+
+        self.loop = asyncio.new_event_loop()
+        self.session = None
+        self.started = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run,
+            args=(request_timeout,),
+            name="notification-sender",
+            daemon=True,
+        )
+        self.thread.start()
+        self.started.wait()
+
+    def run(self, request_timeout):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.open(request_timeout))
+        self.started.set()
+        self.loop.run_forever()
+
+    async def open(self, request_timeout):
+        # The session belongs to the loop it is created on
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=request_timeout)
+        )
+        for sink in self.sinks:
+            sink.start(self.session)
+
+    def is_alert_chat_enabled(self):
+        return any(sink.is_alert_chat for sink in self.sinks)
+
+    def put(self, notifications):
+        # Runs on the event loop
+        for notification in notifications:
+            for sink in self.sinks:
+                if sink.receives(notification["is_alert_chat"]):
+                    # Every sink gets its own copy, merges must not change the queues of the others
+                    sink.put(dict(notification))
+
+    def send_message(
+        self, message, is_alert_chat=False, coalesce=False, kind="generic"
+    ):
+        notification = {
+            "text": message,
+            "kind": kind,
+            "is_alert_chat": is_alert_chat,
+            "time": time.time(),
+        }
+
+        # Coalesced messages are held back until the end of the tick and sent together
+        if coalesce:
+            with self.lock:
+                self.pending_messages.append(notification)
+            return
+
+        self.loop.call_soon_threadsafe(self.put, [notification])
+
+    def flush(self):
+        with self.lock:
+            pending_messages = self.pending_messages
+            self.pending_messages = []
+
+        if len(pending_messages) > 0:
+            self.loop.call_soon_threadsafe(self.put_coalesced, pending_messages)
+
+    def put_coalesced(self, notifications):
+        # Runs on the event loop, only sinks with a maximum message length get them merged
+        for sink in self.sinks:
+            sink_notifications = [
+                dict(notification)
+                for notification in notifications
+                if sink.receives(notification["is_alert_chat"])
+            ]
+            if sink.max_message_length is not None:
+                sink_notifications = self.coalesce_notifications(
+                    sink_notifications, sink.max_message_length
+                )
+            for notification in sink_notifications:
+                sink.put(notification)
+
+    @staticmethod
+    def coalesce_notifications(notifications, max_message_length):
+        coalesced_notifications = []
+        for notification in notifications:
+            if (
+                len(coalesced_notifications) > 0
+                and coalesced_notifications[-1]["is_alert_chat"]
+                == notification["is_alert_chat"]
+                and len(coalesced_notifications[-1]["text"])
+                + 2
+                + len(notification["text"])
+                <= max_message_length
+            ):
+                coalesced_notifications[-1]["text"] += "\n\n" + notification["text"]
+            else:
+                coalesced_notifications.append(notification)
+        return coalesced_notifications
+
+    def get_statistics(self):
+        with self.lock:
+            pending_messages = len(self.pending_messages)
+
+        return {
+            "pending_messages": pending_messages,
+            "sinks": {sink.name: sink.get_statistics() for sink in self.sinks},
+        }
+
+    async def drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not all(
+            sink.is_idle() for sink in self.sinks
+        ):
+            await asyncio.sleep(0.05)
+
+        for sink in self.sinks:
+            if not sink.is_idle():
+                self.logger.warning(
+                    "Closing %s with %i messages left.", sink.name, len(sink.queue)
+                )
+            sink.task.cancel()
+        await asyncio.gather(
+            *[sink.task for sink in self.sinks], return_exceptions=True
+        )
+
+        for sink in self.sinks:
+            await sink.close()
+        await self.session.close()
+
+    def close(self, timeout=5):
+        # Gives the queued messages some time to get out, e.g. the last alerts before a restart
+        self.flush()
+        asyncio.run_coroutine_threadsafe(self.drain(timeout), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def send_generic_message(self, message, args=None, is_alert_chat=False):
+        if args is not None:
+            message = message.format(args)
+        self.send_message(self.bot_emoji + " " + message, is_alert_chat, kind="generic")
+
+    def send_report_message(self, message, args=None, is_alert_chat=False):
+        if args is not None:
+            message = message.format(args)
+        self.send_message(self.top_emoji + " " + message, is_alert_chat, kind="report")
+
+    def send_news_message(
+        self, message, args=None, is_alert_chat=False, coalesce=False
+    ):
+        if args is not None:
+            message = message.format(args)
+        self.send_message(
+            self.news_emoji + " " + message, is_alert_chat, coalesce, kind="news"
+        )
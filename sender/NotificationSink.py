@@ -0,0 +1,156 @@
+import asyncio
+import logging
+
+from collections import deque
+
+
+# Destination of the notifications, e.g. a Telegram chat, a webhook or a file.
+# Every sink has its own bounded queue delivered in order by its own task, a slow sink only delays itself.
+# When the queue is full, a message is merged into the last queued one if the sink allows merging and
+# it fits, otherwise the oldest queued message is dropped.
+class NotificationSink:
+    def __init__(
+        self,
+        name,
+        max_queue_size=100,
+        max_message_length=None,
+        is_alert_chat=None,
+        buckets=(),
+    ):
+        self.name = name
+        self.max_queue_size = max_queue_size
+        # Messages are only merged if a maximum length is set
+        self.max_message_length = max_message_length
+        # Receives messages of the alert chat only if True, of the main chat only if False, both if None
+        self.is_alert_chat = is_alert_chat
+        # Rate limits, the first one is paused when the destination asks to slow down
+        self.buckets = list(buckets)
+
+        self.queue = deque()
+        self.wakeup = None
+        self.task = None
+        self.in_flight = False
+
+        self.sent_messages = 0
+        self.merged_messages = 0
+        self.dropped_messages = 0
+        self.failed_messages = 0
+        # Dropped since the queue was last drained, logged once per burst instead of for every message
+        self.burst_dropped_messages = 0
+
+        self.logger = logging.getLogger("notification-sink")
+
+    def receives(self, is_alert_chat):
+        return self.is_alert_chat is None or self.is_alert_chat == is_alert_chat
+
+    async def open(self, session):
+        pass
+
+    async def close(self):
+        pass
+
+    async def deliver(self, session, notification):
+        # Returns the seconds to wait if the destination asks to slow down, otherwise None.
+        # Raises if the notification could not be delivered, it is not retried.
+        raise NotImplementedError
+
+    def start(self, session):
+        # Runs on the event loop of the sender
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self.run(session))
+
+    def put(self, notification):
+        # Runs on the event loop of the sender, never waits for the delivery
+        if len(self.queue) >= self.max_queue_size:
+            last_notification = self.queue[-1]
+            if (
+                self.max_message_length is not None
+                and len(last_notification["text"]) + 2 + len(notification["text"])
+                <= self.max_message_length
+            ):
+                last_notification["text"] += "\n\n" + notification["text"]
+                self.merged_messages += 1
+                return
+
+            self.queue.popleft()
+            self.dropped_messages += 1
+            self.burst_dropped_messages += 1
+            if self.burst_dropped_messages == 1:
+                self.logger.warning(
+                    "Queue of %s is full. Dropping the oldest messages until it is drained.",
+                    self.name,
+                )
+            self.logger.debug(
+                "Queue of %s is full. Dropped oldest message. Dropped so far: %i.",
+                self.name,
+                self.dropped_messages,
+            )
+
+        self.queue.append(notification)
+        self.wakeup.set()
+
+    def is_idle(self):
+        return len(self.queue) == 0 and not self.in_flight
+
+    async def acquire(self):
+        for bucket in self.buckets:
+            wait_time = bucket.try_acquire()
+            while wait_time > 0:
+                await asyncio.sleep(wait_time)
+                wait_time = bucket.try_acquire()
+
+    async def run(self, session):
+        await self.open(session)
+
+        while True:
+            if len(self.queue) == 0 and self.burst_dropped_messages > 0:
+                self.logger.warning(
+                    "Queue of %s is drained. Dropped %i messages.",
+                    self.name,
+                    self.burst_dropped_messages,
+                )
+                self.burst_dropped_messages = 0
+
+            while len(self.queue) == 0:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+
+            # Taken off the queue while sending, so merges never touch an in-flight message
+            notification = self.queue.popleft()
+            self.in_flight = True
+
+            try:
+                await self.acquire()
+                retry_after = await self.deliver(session, notification)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_messages += 1
+                self.logger.error("Sending to %s failed: %s", self.name, e)
+                continue
+            finally:
+                self.in_flight = False
+
+            if retry_after is None:
+                self.sent_messages += 1
+                continue
+
+            # Flood limit hit, put the message back in front and pause this sink only
+            self.logger.error(
+                "Flood limit is exceeded for %s. Sleep %s seconds.",
+                self.name,
+                retry_after,
+            )
+            self.queue.appendleft(notification)
+            if len(self.buckets) > 0:
+                self.buckets[0].drain(retry_after)
+            await asyncio.sleep(retry_after)
+
+    def get_statistics(self):
+        return {
+            "queue_depth": len(self.queue),
+            "sent_messages": self.sent_messages,
+            "merged_messages": self.merged_messages,
+            "dropped_messages": self.dropped_messages,
+            "failed_messages": self.failed_messages,
+        }
@@ -0,0 +1,46 @@
+import logging
+
+
+# Drop-in for the NotificationSender which sends nothing, used for replays.
+# Messages are counted per kind and optionally kept for inspection.
+class NullSender:
+    def __init__(self, keep_messages=False):
+        self.keep_messages = keep_messages
+        self.messages = []
+        self.message_counts = {"generic": 0, "report": 0, "news": 0}
+
+        self.logger = logging.getLogger("null-sender")
+
+    def is_alert_chat_enabled(self):
+        return False
+
+    def count_message(self, kind, message, args=None):
+        if args is not None:
+            message = message.format(args)
+
+        self.message_counts[kind] += 1
+        if self.keep_messages:
+            self.messages.append(message)
+        self.logger.debug(message)
+
+    def send_message(
+        self, message, is_alert_chat=False, coalesce=False, kind="generic"
+    ):
+        self.count_message(kind, message)
+
+    def flush(self):
+        pass
+
+    def get_statistics(self):
+        return dict(self.message_counts)
+
+    def send_generic_message(self, message, args=None, is_alert_chat=False):
+        self.count_message("generic", message, args)
+
+    def send_report_message(self, message, args=None, is_alert_chat=False):
+        self.count_message("report", message, args)
+
+    def send_news_message(
+        self, message, args=None, is_alert_chat=False, coalesce=False
+    ):
+        self.count_message("news", message, args)
@@ -0,0 +1,90 @@
+from utils import TokenBucket
+
+from .NotificationSink import NotificationSink
+
+
+# Sends to a Telegram chat through the Bot API sendMessage method.
+# Telegram allows about 30 messages per second per bot and 20 messages per minute per group.
+class TelegramSink(NotificationSink):
+    MAX_MESSAGE_LENGTH = 4096
+    BASE_URL = "https://api.telegram.org/bot"
+
+    def __init__(
+        self,
+        token,
+        chat_id,
+        global_bucket,
+        is_alert_chat=None,
+        max_queue_size=100,
+        chat_messages_per_minute=20,
+        base_url=None,
+    ):
+        super().__init__(
+            "telegram-alert" if is_alert_chat else "telegram",
+            max_queue_size=max_queue_size,
+            max_message_length=self.MAX_MESSAGE_LENGTH,
+            is_alert_chat=is_alert_chat,
+            buckets=[
+                TokenBucket(
+                    chat_messages_per_minute / 60,
+                    max(1, chat_messages_per_minute // 4),
+                ),
+                global_bucket,
+            ],
+        )
+        self.chat_id = chat_id
+        self.url = "{0}{1}/sendMessage".format(base_url or self.BASE_URL, token)
+
+    @classmethod
+    def for_chats(
+        cls,
+        token,
+        chat_id,
+        alert_chat_id=0,
+        max_queue_size=100,
+        chat_messages_per_minute=20,
+        global_messages_per_second=30,
+        base_url=None,
+    ):
+        # The alert chat gets its own sink if it is set and differs, otherwise one chat receives everything
+        global_bucket = TokenBucket(
+            global_messages_per_second, global_messages_per_second
+        )
+        has_alert_chat = alert_chat_id != 0 and alert_chat_id != chat_id
+
+        return [
+            cls(
+                token,
+                sink_chat_id,
+                global_bucket,
+                is_alert_chat=is_alert_chat,
+                max_queue_size=max_queue_size,
+                chat_messages_per_minute=chat_messages_per_minute,
+                base_url=base_url,
+            )
+            for sink_chat_id, is_alert_chat in (
+                [(chat_id, False), (alert_chat_id, True)]
+                if has_alert_chat
+                else [(chat_id, None)]
+            )
+        ]
+
+    async def deliver(self, session, notification):
+        self.logger.info(notification["text"])
+
+        async with session.post(
+            self.url,
+            json={
+                "chat_id": self.chat_id,
+                "text": notification["text"],
+                "parse_mode": "Markdown",
+                "disable_web_page_preview": True,
+            },
+        ) as response:
+            body = await response.json(content_type=None)
+
+        if response.status == 429:
+            return body.get("parameters", {}).get("retry_after", 1)
+        if not body.get("ok"):
+            raise RuntimeError(body.get("description", response.status))
+        return None
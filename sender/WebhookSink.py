@@ -0,0 +1,28 @@
+from .NotificationSink import NotificationSink
+
+
+# Posts every message as JSON to a generic webhook, e.g. {"kind": "news", "chat": "main", "text": "..."}.
+# Messages are never merged, receivers get one request per message. 429 and 503 answers are retried
+# after their Retry-After header.
+class WebhookSink(NotificationSink):
+    def __init__(self, url, max_queue_size=1000, headers=None):
+        super().__init__("webhook", max_queue_size=max_queue_size)
+        self.url = url
+        self.headers = headers or {}
+
+    async def deliver(self, session, notification):
+        async with session.post(
+            self.url,
+            json={
+                "kind": notification["kind"],
+                "chat": "alert" if notification["is_alert_chat"] else "main",
+                "time": notification["time"],
+                "text": notification["text"],
+            },
+            headers=self.headers,
+        ) as response:
+            if response.status in (429, 503):
+                return float(response.headers.get("Retry-After", 1))
+            if response.status >= 400:
+                raise RuntimeError("Webhook answered {0}.".format(response.status))
+        return None
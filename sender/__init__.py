@@ -1 +1,6 @@
-from .TelegramSender import TelegramSender
+from .FileSink import FileSink
+from .NotificationSender import NotificationSender
+from .NotificationSink import NotificationSink
+from .NullSender import NullSender
+from .TelegramSink import TelegramSink
+from .WebhookSink import WebhookSink
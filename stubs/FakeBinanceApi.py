@@ -0,0 +1,240 @@
+import json
+import logging
+import math
+import random
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# Local stand-in for the Binance Spot and Futures REST API, to run the bot offline.
+# Prices follow a random walk, every request moves them one step.
+# Request weight is counted per minute and sent in X-MBX-USED-WEIGHT-1M. With a weight limit, requests over it
+# get 429 and, while that ban lasts, 418 with a Retry-After header.
+class FakeBinanceApi:
+    # Weight of the tickers of all symbols on Spot
+    WEIGHTS = {"price": 4, "24hr": 80}
+
+    def __init__(self, symbols, host="127.0.0.1", port=0, weight_limit=None, window=60):
+        self.symbols = list(symbols)
+        self.prices = {symbol: random.uniform(0.1, 100) for symbol in self.symbols}
+        self.volumes = {symbol: random.uniform(1e5, 1e7) for symbol in self.symbols}
+        self.lock = threading.Lock()
+        self.requests = 0
+
+        self.weight_limit = weight_limit
+        # Seconds the weight is counted for, shorter than the minute of Binance to try the limits quickly
+        self.window = window
+        self.used_weight = 0
+        self.window_start = 0
+        self.banned_until = 0
+
+        self.logger = logging.getLogger("fake-binance-api")
+
+        self.routes = {
+            "/api/v3/ticker/price": self.ticker_price,
+            "/fapi/v1/ticker/price": self.ticker_price,
+            "/api/v3/ticker/24hr": self.ticker_24hr,
+            "/fapi/v1/ticker/24hr": self.ticker_24hr,
+            "/api/v3/klines": self.klines,
+            "/fapi/v1/klines": self.klines,
+        }
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive and a longer accept queue, clients reuse their pooled connections like with Binance
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                api.handle_request(self)
+
+            def log_message(self, format, *args):
+                api.logger.debug(format, *args)
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128
+
+        self.server = Server((host, port), Handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return "http://{0}:{1}".format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="fake-binance-api", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def set_price(self, symbol, price):
+        with self.lock:
+            if symbol not in self.prices:
+                self.symbols.append(symbol)
+                self.volumes[symbol] = 0
+            self.prices[symbol] = price
+
+    def add_volume(self, symbol, volume):
+        with self.lock:
+            self.volumes[symbol] += volume
+
+    def add_weight(self, weight):
+        # Weight used by other clients behind the same IP
+        with self.lock:
+            self.start_window(time.time())
+            self.used_weight += weight
+
+    def start_window(self, now):
+        window_start = now - now % self.window
+        if window_start > self.window_start:
+            self.window_start = window_start
+            self.used_weight = 0
+
+    @staticmethod
+    def request_weight(path, params):
+        if not path.endswith("/klines"):
+            return FakeBinanceApi.WEIGHTS[path.rsplit("/", 1)[-1]]
+
+        limit = int(params.get("limit", 500))
+        if limit < 100:
+            return 1
+        if limit < 500:
+            return 2
+        if limit <= 1000:
+            return 5
+        return 10
+
+    def charge(self, path, params):
+        # Returns the status and Retry-After of a rejected request, None if it may be served
+        with self.lock:
+            now = time.time()
+            self.start_window(now)
+
+            if now < self.banned_until:
+                # Ignoring the ban gets a longer one, like the 418 of Binance
+                self.banned_until += self.window
+                return 418, self.banned_until - now
+
+            self.used_weight += self.request_weight(path, params)
+            if self.weight_limit is not None and self.used_weight > self.weight_limit:
+                self.banned_until = self.window_start + self.window
+                return 429, self.banned_until - now
+            return None
+
+    def step_prices(self):
+        for symbol in self.symbols:
+            self.prices[symbol] *= 1 + random.uniform(-0.001, 0.001)
+
+    def ticker_price(self, params):
+        with self.lock:
+            self.step_prices()
+            return 200, [
+                {"symbol": symbol, "price": "{0:.8f}".format(self.prices[symbol])}
+                for symbol in self.symbols
+            ]
+
+    def ticker_24hr(self, params):
+        with self.lock:
+            self.step_prices()
+            return 200, [
+                {
+                    "symbol": symbol,
+                    "lastPrice": "{0:.8f}".format(self.prices[symbol]),
+                    "volume": "{0:.8f}".format(
+                        self.volumes[symbol] / self.prices[symbol]
+                    ),
+                    "quoteVolume": "{0:.8f}".format(self.volumes[symbol]),
+                }
+                for symbol in self.symbols
+            ]
+
+    def klines(self, params):
+        symbol = params.get("symbol")
+        interval = params.get("interval", "1m")
+        units = {"m": 60, "h": 3600, "d": 86400}
+        if symbol not in self.prices or interval[-1] not in units:
+            return 400, {"code": -1121, "msg": "Invalid symbol."}
+
+        seconds = int(interval[:-1]) * units[interval[-1]]
+        limit = min(int(params.get("limit", 500)), 1000)
+
+        with self.lock:
+            price = self.prices[symbol]
+
+        # Random walk backwards from the current price, the last kline is still open
+        open_time = int(time.time()) // seconds * seconds - (limit - 1) * seconds
+        closes = [price]
+        for _ in range(limit - 1):
+            closes.append(closes[-1] / (1 + random.uniform(-0.01, 0.01)))
+        closes.reverse()
+
+        return 200, [
+            [
+                (open_time + i * seconds) * 1000,
+                "{0:.8f}".format(close),
+                "{0:.8f}".format(close),
+                "{0:.8f}".format(close),
+                "{0:.8f}".format(close),
+                "0",
+                (open_time + (i + 1) * seconds) * 1000 - 1,
+                "0",
+                0,
+                "0",
+                "0",
+                "0",
+            ]
+            for i, close in enumerate(closes)
+        ]
+
+    def handle_request(self, handler):
+        url = urlparse(handler.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.requests += 1
+
+        retry_after = None
+        if url.path not in self.routes:
+            status, body = 404, {"code": -1, "msg": "Unknown path."}
+        else:
+            rejection = self.charge(url.path, params)
+            if rejection is not None:
+                status, retry_after = rejection
+                body = {"code": -1003, "msg": "Too many requests."}
+            else:
+                status, body = self.routes[url.path](params)
+
+        payload = json.dumps(body, separators=(",", ":")).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("X-MBX-USED-WEIGHT-1M", str(self.used_weight))
+        if retry_after is not None:
+            handler.send_header("Retry-After", str(int(math.ceil(retry_after))))
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    weight_limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    fake_api = FakeBinanceApi(
+        ["SYM{0}USDT".format(i) for i in range(500)],
+        port=port,
+        weight_limit=weight_limit,
+    ).start()
+    print("Serving fake Binance API on {0}".format(fake_api.url))
+    fake_api.thread.join()
@@ -0,0 +1,196 @@
+import base64
+import hashlib
+import json
+import logging
+import random
+import select
+import socketserver
+import struct
+import threading
+import time
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+# Local stand-in for the Binance all market mini ticker stream, to run the streaming mode offline.
+# Prices follow a random walk, every symbol is pushed once per push interval.
+class FakeMiniTickerServer:
+    def __init__(
+        self,
+        symbols,
+        host="127.0.0.1",
+        port=0,
+        push_interval=1,
+        disconnect_after=0,
+    ):
+        self.symbols = symbols
+        self.prices = {symbol: random.uniform(0.1, 100) for symbol in symbols}
+        self.push_interval = push_interval
+        # Drop every connection after this many pushes to exercise reconnects, 0 keeps it open
+        self.disconnect_after = disconnect_after
+
+        self.connections = 0
+        self.pongs = 0
+        self.is_silent = False
+
+        self.logger = logging.getLogger("fake-mini-ticker-server")
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server.handle_connection(self.request)
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return "ws://{0}:{1}/ws/!miniTicker@arr".format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="fake-mini-ticker", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def set_price(self, symbol, price):
+        self.prices[symbol] = price
+
+    def next_tickers(self):
+        tickers = []
+        for symbol in self.symbols:
+            self.prices[symbol] *= 1 + random.uniform(-0.001, 0.001)
+            tickers.append(
+                {
+                    "e": "24hrMiniTicker",
+                    "E": int(time.time() * 1000),
+                    "s": symbol,
+                    "c": "{0:.8f}".format(self.prices[symbol]),
+                    "q": "{0:.2f}".format(random.uniform(1000, 100000)),
+                }
+            )
+        return tickers
+
+    def handle_connection(self, connection):
+        request = connection.recv(4096).decode("latin-1")
+        key = None
+        for line in request.split("\r\n"):
+            if line.lower().startswith("sec-websocket-key:"):
+                key = line.split(":", 1)[1].strip()
+
+        if key is None:
+            return
+
+        accept = base64.b64encode(
+            hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        connection.sendall(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                "Sec-WebSocket-Accept: {0}\r\n\r\n".format(accept)
+            ).encode()
+        )
+
+        self.connections += 1
+        pushes = 0
+        next_push = time.monotonic()
+
+        try:
+            while True:
+                timeout = max(0, next_push - time.monotonic())
+                readable, _, _ = select.select([connection], [], [], timeout)
+
+                if readable:
+                    opcode, payload = self.read_frame(connection)
+                    if opcode is None or opcode == OPCODE_CLOSE:
+                        self.send_frame(connection, OPCODE_CLOSE, b"")
+                        return
+                    if opcode == OPCODE_PING:
+                        self.send_frame(connection, OPCODE_PONG, payload)
+                    elif opcode == OPCODE_PONG:
+                        self.pongs += 1
+                    continue
+
+                next_push += self.push_interval
+                if self.is_silent:
+                    continue
+
+                self.send_frame(
+                    connection, OPCODE_TEXT, json.dumps(self.next_tickers()).encode()
+                )
+                pushes += 1
+
+                if self.disconnect_after and pushes >= self.disconnect_after:
+                    self.logger.info("Dropping connection after %i pushes.", pushes)
+                    return
+        except OSError:
+            return
+
+    @staticmethod
+    def read_exactly(connection, length):
+        data = b""
+        while len(data) < length:
+            chunk = connection.recv(length - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def read_frame(self, connection):
+        header = self.read_exactly(connection, 2)
+        if header is None:
+            return None, None
+
+        opcode = header[0] & 0x0F
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.read_exactly(connection, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.read_exactly(connection, 8))[0]
+
+        # Client frames are always masked
+        mask = self.read_exactly(connection, 4) if header[1] & 0x80 else b"\0\0\0\0"
+        payload = self.read_exactly(connection, length) if length else b""
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+        return opcode, payload
+
+    @staticmethod
+    def send_frame(connection, opcode, payload):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack(">H", length)
+        else:
+            header += bytes([127]) + struct.pack(">Q", length)
+        connection.sendall(header + payload)
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 9443
+    fake_server = FakeMiniTickerServer(
+        ["SYM{0}USDT".format(i) for i in range(500)], port=port
+    ).start()
+    print("Serving fake mini ticker stream on {0}".format(fake_server.url))
+    fake_server.thread.join()
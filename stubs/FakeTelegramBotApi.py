@@ -0,0 +1,125 @@
+import json
+import logging
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+# Local stand-in for the Telegram Bot API sendMessage method, records messages per chat.
+# Optionally answers with 429 flood errors when a chat receives messages faster than allowed.
+class FakeTelegramBotApi:
+    def __init__(self, host="127.0.0.1", port=0, messages_per_second=0, retry_after=1):
+        self.messages_per_second = messages_per_second
+        self.retry_after = retry_after
+
+        self.messages = {}
+        self.last_message_time = {}
+        self.flood_errors = 0
+        self.lock = threading.Lock()
+
+        self.logger = logging.getLogger("fake-telegram-bot-api")
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                api.handle_request(self)
+
+            def log_message(self, format, *args):
+                api.logger.debug(format, *args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return "http://{0}:{1}/bot".format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="fake-telegram-bot-api", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def read_params(self, handler):
+        body = handler.rfile.read(int(handler.headers.get("Content-Length", 0)))
+        if handler.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(body or b"{}")
+        return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+    def send_message(self, params):
+        chat_id = str(params["chat_id"])
+        now = time.monotonic()
+
+        with self.lock:
+            if (
+                self.messages_per_second > 0
+                and chat_id in self.last_message_time
+                and now - self.last_message_time[chat_id] < 1 / self.messages_per_second
+            ):
+                self.flood_errors += 1
+                return 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after {0}".format(
+                        self.retry_after
+                    ),
+                    "parameters": {"retry_after": self.retry_after},
+                }
+
+            self.last_message_time[chat_id] = now
+            chat_messages = self.messages.setdefault(chat_id, [])
+            chat_messages.append(params["text"])
+            message_id = len(chat_messages)
+
+        return 200, {
+            "ok": True,
+            "result": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": params["chat_id"], "type": "private"},
+                "text": params["text"],
+            },
+        }
+
+    def handle_request(self, handler):
+        method = handler.path.rsplit("/", 1)[-1]
+
+        if method == "sendMessage":
+            status, body = self.send_message(self.read_params(handler))
+        else:
+            status, body = 404, {
+                "ok": False,
+                "error_code": 404,
+                "description": "Not Found",
+            }
+
+        payload = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
+    messages_per_second = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    fake_api = FakeTelegramBotApi(
+        port=port, messages_per_second=messages_per_second
+    ).start()
+    print("Serving fake Telegram Bot API on {0}".format(fake_api.base_url))
+    fake_api.thread.join()
@@ -0,0 +1,89 @@
+import json
+import logging
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Local stand-in for a webhook receiver, records the posted JSON bodies.
+# Optionally answers slowly, or with 503 and a Retry-After header for the first requests.
+class FakeWebhookServer:
+    def __init__(
+        self, host="127.0.0.1", port=0, delay=0, unavailable_requests=0, retry_after=1
+    ):
+        self.delay = delay
+        self.unavailable_requests = unavailable_requests
+        self.retry_after = retry_after
+
+        self.posts = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+        self.logger = logging.getLogger("fake-webhook-server")
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                server.handle_request(self)
+
+            def log_message(self, format, *args):
+                server.logger.debug(format, *args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return "http://{0}:{1}/webhook".format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="fake-webhook-server", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_request(self, handler):
+        body = handler.rfile.read(int(handler.headers.get("Content-Length", 0)))
+
+        with self.lock:
+            self.requests += 1
+            is_unavailable = self.requests <= self.unavailable_requests
+
+        if self.delay > 0:
+            time.sleep(self.delay)
+
+        if is_unavailable:
+            handler.send_response(503)
+            handler.send_header("Retry-After", str(self.retry_after))
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        with self.lock:
+            self.posts.append(json.loads(body or b"{}"))
+
+        handler.send_response(204)
+        handler.end_headers()
+
+        self.logger.info("Received: %s", self.posts[-1].get("text"))
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8082
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    fake_server = FakeWebhookServer(port=port, delay=delay).start()
+    print("Serving fake webhook on {0}".format(fake_server.url))
+    fake_server.thread.join()
@@ -0,0 +1,193 @@
+import numpy as np
+import pytest
+import time
+
+from alerter import HistoryBackfill, Market, TickerFetcher
+from stubs.FakeBinanceApi import FakeBinanceApi
+
+SYMBOLS = ["AAAUSDT", "BBBUSDT", "CCCUSDT"]
+CHART_INTERVALS = {
+    interval: {"value": seconds}
+    for interval, seconds in (
+        ("1s", 1),
+        ("5s", 5),
+        ("15s", 15),
+        ("30s", 30),
+        ("1m", 60),
+        ("5m", 300),
+        ("15m", 900),
+        ("1h", 3600),
+    )
+}
+EXTRACT_INTERVAL = 1
+
+
+@pytest.fixture
+def fake_api():
+    fake_api = FakeBinanceApi(SYMBOLS).start()
+    yield fake_api
+    fake_api.stop()
+
+
+def create_market(fake_api):
+    market = Market(
+        "Spot",
+        fake_api.url + "/api/v3/ticker/price",
+        "https://www.binance.com/en/trade/{0}",
+        [],
+        [],
+        [],
+        {"1m": 0.02, "5m": 0.05},
+        klines_url=fake_api.url + "/api/v3/klines",
+    )
+    market.create_history(CHART_INTERVALS, EXTRACT_INTERVAL)
+    for symbol in SYMBOLS:
+        market.add_asset(symbol)
+    return market
+
+
+def wait_for_new_minute():
+    # The weight is counted per minute of the clock, the requests of a test must not span two
+    if time.time() % 60 > 50:
+        time.sleep(60 - time.time() % 60)
+
+
+def backfill(fake_api, market, current_time, weight_limit=6000):
+    fetcher = TickerFetcher(max_retries=0)
+    fetcher.add_weight_budget(market.klines_url, weight_limit)
+    history_backfill = HistoryBackfill(fetcher, max_workers=4)
+    history_backfill.backfill(market, current_time, EXTRACT_INTERVAL)
+    return history_backfill
+
+
+def test_select_kline_interval():
+    assert HistoryBackfill.select_kline_interval(900) == ("1m", 60, 17)
+    assert HistoryBackfill.select_kline_interval(3600 * 24) == ("3m", 180, 482)
+    assert HistoryBackfill.select_kline_interval(10**8)[2] == HistoryBackfill.MAX_LIMIT
+
+
+def test_backfill_fills_tier_times_and_counts(fake_api):
+    market = create_market(fake_api)
+    current_time = time.time()
+    backfill(fake_api, market, current_time)
+
+    base_tier, rollup_tier = market.price_history.tiers
+    assert [tier.resolution for tier in market.price_history.tiers] == [1, 60]
+
+    # Ticks before the next append, which is the tick at current_time in the first column
+    ticks = np.arange(base_tier.size - 1, 0, -1)
+    np.testing.assert_allclose(base_tier.times[1:], current_time - ticks)
+    assert np.isneginf(base_tier.times[0])
+
+    # Rollups hold the start of every 1m bucket before the current one
+    buckets = np.arange(rollup_tier.size - 1, 0, -1)
+    np.testing.assert_allclose(
+        rollup_tier.times[1:], (current_time // 60 - buckets) * 60
+    )
+
+    for tier in market.price_history.tiers:
+        assert (tier.counts[: len(SYMBOLS)] == tier.size - 1).all()
+
+
+def test_backfill_steps_kline_closes(fake_api):
+    market = create_market(fake_api)
+    current_time = time.time()
+    backfill(fake_api, market, current_time)
+
+    base_tier = market.price_history.tiers[0]
+    times = base_tier.times[1:]
+    prices = base_tier.prices[: len(SYMBOLS), 1:]
+    filled = ~np.isnan(prices[0])
+
+    # Every tick takes the close of the last kline closed before it, ticks of the same kline share it
+    kline_open_times = np.floor((times + 0.001) / 60) - 1
+    for open_time in np.unique(kline_open_times[filled]):
+        in_kline = filled & (kline_open_times == open_time)
+        assert (prices[:, in_kline] == prices[:, in_kline][:, :1]).all()
+    assert len(np.unique(prices[0, filled])) > 1
+
+
+def test_backfill_leaves_the_last_kline_empty(fake_api):
+    market = create_market(fake_api)
+    current_time = time.time()
+    backfill(fake_api, market, current_time)
+
+    # Closes of ticks within one kline are up to a kline older than the tick
+    for tier in market.price_history.tiers:
+        times = tier.times[1:]
+        prices = tier.prices[: len(SYMBOLS), 1:]
+        is_recent = times > current_time - 60 - 0.001
+        assert np.isnan(prices[:, is_recent]).all()
+        assert not np.isnan(prices[:, ~is_recent]).any()
+
+
+def test_sub_minute_changes_are_empty_after_backfill(fake_api):
+    market = create_market(fake_api)
+    current_time = time.time()
+    backfill(fake_api, market, current_time)
+
+    prices = np.array([fake_api.prices[symbol] for symbol in SYMBOLS])
+    market.update(prices, None, current_time, True)
+
+    # Windows up to the kline resolution start at an empty tick, their change is not calculated yet
+    base_tier = market.price_history.tiers[0]
+    seconds = np.array([1, 5, 15, 30, 60], dtype=np.float64)
+    columns, _ = base_tier.columns_at(current_time - seconds + 0.001)
+    assert np.isnan(base_tier.prices[: len(SYMBOLS)][:, columns]).all()
+
+    calculator = market.change_calculator
+    for interval in ("1s", "5s", "15s", "30s", "1m"):
+        assert (calculator.interval_changes(interval, len(SYMBOLS)) == 0).all()
+    for interval in ("5m", "15m", "1h"):
+        assert (calculator.interval_changes(interval, len(SYMBOLS)) != 0).all()
+
+    # The live ticks fill them up
+    for tick in range(1, 6):
+        market.update(prices * (1 + 0.001 * tick), None, current_time + tick, True)
+    np.testing.assert_allclose(
+        calculator.interval_changes("5s", len(SYMBOLS)), 1 - 1 / 1.005
+    )
+    assert (calculator.interval_changes("1m", len(SYMBOLS)) == 0).all()
+
+
+def test_backfill_keeps_stored_prices(fake_api):
+    market = create_market(fake_api)
+    current_time = time.time()
+    base_tier = market.price_history.tiers[0]
+    base_tier.append(np.full(len(SYMBOLS), 42.0), current_time - 1)
+
+    backfill(fake_api, market, current_time)
+
+    assert (base_tier.latest(np.arange(len(SYMBOLS))) == 42.0).all()
+
+
+def test_backfill_weight_accounting(fake_api):
+    market = create_market(fake_api)
+    market.backfill_weight_per_minute = 6
+    wait_for_new_minute()
+    history_backfill = backfill(fake_api, market, time.time())
+
+    # 1m klines for the base tier and the 1h rollup, limit 62 weighs 1 per symbol
+    weight = HistoryBackfill.request_weight(62)
+    assert fake_api.requests == len(SYMBOLS)
+    assert fake_api.used_weight == len(SYMBOLS) * weight
+
+    # The budget of the host follows the header, the share of the backfill is paid from its own bucket
+    statistics = history_backfill.fetcher.get_weight_budget(
+        market.klines_url
+    ).get_statistics()
+    assert statistics["weight_used"] == fake_api.used_weight
+    assert statistics["ban_seconds"] == 0
+
+    bucket = history_backfill.weight_buckets[market.name]
+    assert bucket.available() == pytest.approx(6 - len(SYMBOLS) * weight, abs=0.1)
+
+
+def test_backfill_skips_symbols_without_klines(fake_api):
+    market = create_market(fake_api)
+    market.add_asset("DELISTEDUSDT")
+    backfill(fake_api, market, time.time())
+
+    base_tier = market.price_history.tiers[0]
+    assert base_tier.counts[len(SYMBOLS)] == 0
+    assert np.isnan(base_tier.prices[len(SYMBOLS)]).all()
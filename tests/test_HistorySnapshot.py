@@ -0,0 +1,96 @@
+import numpy as np
+import os
+import pytest
+import time
+
+from alerter import HistorySnapshot, Market
+
+SYMBOLS = ["AAAUSDT", "BBBUSDT", "CCCUSDT"]
+CHART_INTERVALS = {"1s": {"value": 1}, "5s": {"value": 5}, "1m": {"value": 60}}
+EXTRACT_INTERVAL = 1
+
+
+def create_market(snapshot):
+    market = Market(
+        "Spot",
+        "http://127.0.0.1:1/api/v3/ticker/price",
+        "https://www.binance.com/en/trade/{0}",
+        [],
+        [],
+        [],
+        {"1m": 0.02},
+    )
+    snapshot.prepare(market)
+    market.create_history(CHART_INTERVALS, EXTRACT_INTERVAL, snapshot)
+    for symbol in SYMBOLS:
+        market.add_asset(symbol)
+    return market
+
+
+def save_ticks(snapshot, start_time, ticks=5):
+    market = create_market(snapshot)
+    snapshot.restore(market, start_time, EXTRACT_INTERVAL)
+    for tick in range(ticks):
+        market.update(
+            np.arange(1, len(SYMBOLS) + 1) * (tick + 1.0),
+            None,
+            start_time + tick,
+            True,
+        )
+    snapshot.save([market], start_time + ticks - 1, EXTRACT_INTERVAL)
+    return market
+
+
+def latest_prices(market):
+    return market.price_history.tiers[0].latest(np.arange(len(SYMBOLS)))
+
+
+def snapshot_files(tmp_path):
+    return sorted(os.listdir(tmp_path))
+
+
+def test_snapshot_is_restored(tmp_path):
+    start_time = time.time() - 10
+    saved_market = save_ticks(HistorySnapshot(str(tmp_path), 60), start_time)
+
+    snapshot = HistorySnapshot(str(tmp_path), 60)
+    market = create_market(snapshot)
+    snapshot.restore(market, start_time + 5, EXTRACT_INTERVAL)
+
+    np.testing.assert_array_equal(latest_prices(market), latest_prices(saved_market))
+    assert not any(path.endswith(".previous") for path in snapshot_files(tmp_path))
+
+
+def test_snapshot_is_kept_when_the_start_fails(tmp_path):
+    start_time = time.time() - 10
+    saved_market = save_ticks(HistorySnapshot(str(tmp_path), 60), start_time)
+
+    # Moved aside and the live history created, but the start fails before the restore
+    create_market(HistorySnapshot(str(tmp_path), 60))
+    assert "spot.json.previous" in snapshot_files(tmp_path)
+    assert "spot.json" not in snapshot_files(tmp_path)
+
+    # The next start restores the files moved aside
+    snapshot = HistorySnapshot(str(tmp_path), 60)
+    market = create_market(snapshot)
+    snapshot.restore(market, start_time + 5, EXTRACT_INTERVAL)
+
+    np.testing.assert_array_equal(latest_prices(market), latest_prices(saved_market))
+    assert not any(path.endswith(".previous") for path in snapshot_files(tmp_path))
+
+
+def test_snapshot_is_kept_when_the_restore_fails(tmp_path, monkeypatch):
+    start_time = time.time() - 10
+    save_ticks(HistorySnapshot(str(tmp_path), 60), start_time)
+
+    snapshot = HistorySnapshot(str(tmp_path), 60)
+    market = create_market(snapshot)
+
+    def fail(*args):
+        raise OSError("Disk failure")
+
+    monkeypatch.setattr(snapshot, "restore_histories", fail)
+    with pytest.raises(OSError):
+        snapshot.restore(market, start_time + 5, EXTRACT_INTERVAL)
+
+    assert "spot.json.previous" in snapshot_files(tmp_path)
@@ -0,0 +1,186 @@
+import pytest
+import time
+
+from alerter import BinancePumpAndDumpAlerter, Market, MiniTickerStream, TickerFetcher
+from reporter import ReportGenerator
+from sender import NullSender
+from stubs.FakeBinanceApi import FakeBinanceApi
+from stubs.FakeMiniTickerServer import FakeMiniTickerServer
+
+SYMBOLS = ["AAAUSDT", "BBBUSDT"]
+
+
+@pytest.fixture
+def create_server():
+    servers = []
+
+    def create_server(**kwargs):
+        server = FakeMiniTickerServer(SYMBOLS, push_interval=0.05, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield create_server
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def create_stream():
+    streams = []
+
+    def create_stream(stream_url, **kwargs):
+        stream = MiniTickerStream(stream_url, **kwargs)
+        streams.append(stream)
+        return stream
+
+    yield create_stream
+    for stream in streams:
+        stream.stop()
+
+
+@pytest.fixture
+def fake_api():
+    fake_api = FakeBinanceApi(SYMBOLS).start()
+    yield fake_api
+    fake_api.stop()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def create_alerter(market):
+    sender = NullSender()
+    fetcher = TickerFetcher(retry_interval=0.01, max_retries=0)
+    fetcher.add_weight_budget(market.ticker_url, 6000)
+    return BinancePumpAndDumpAlerter(
+        markets=[market],
+        chart_intervals=["1s", "1m"],
+        top_report_intervals=[],
+        extract_interval=1,
+        top_pump_enabled=False,
+        top_dump_enabled=False,
+        additional_statistics_enabled=False,
+        no_of_reported_coins=5,
+        dump_enabled=True,
+        check_new_listing_enabled=False,
+        top_report_nearest_hour=False,
+        telegram=sender,
+        report_generator=ReportGenerator(telegram=sender, alert_skip_threshold=5),
+        fetcher=fetcher,
+    )
+
+
+def test_stream_keeps_the_latest_prices(create_server, create_stream):
+    server = create_server()
+    stream = create_stream(server.url)
+    stream.seed([{"symbol": "CCCUSDT", "price": "1.00000000"}])
+    stream.start()
+
+    assert wait_until(lambda: len(stream.snapshot()) == 3)
+    assert stream.is_available()
+
+    server.set_price("AAAUSDT", 123)
+    assert wait_until(
+        lambda: any(
+            asset["symbol"] == "AAAUSDT" and 122 < float(asset["price"]) < 124
+            for asset in stream.snapshot()
+        )
+    )
+
+
+def test_stream_reconnects_after_a_disconnect(create_server, create_stream):
+    server = create_server(disconnect_after=2)
+    stream = create_stream(server.url, reconnect_interval=0.05)
+    stream.start()
+
+    # Connections which got messages reconnect right away, without backing off
+    assert wait_until(lambda: server.connections >= 3)
+    assert stream.failed_connections <= 1
+
+
+def test_reconnects_back_off():
+    stream = MiniTickerStream(
+        "ws://127.0.0.1:1/ws", reconnect_interval=1, max_reconnect_interval=8
+    )
+
+    for failed_connections, delay in ((0, 1), (1, 2), (2, 4), (3, 8), (6, 8)):
+        stream.failed_connections = failed_connections
+        for _ in range(20):
+            assert delay / 2 <= stream.reconnect_delay() <= delay
+
+
+def test_failed_connections_back_off(create_server, create_stream):
+    server = create_server()
+    url = server.url
+    server.stop()
+
+    stream = create_stream(url, reconnect_interval=0.05, max_reconnect_interval=0.4)
+    stream.start()
+
+    # Every failed attempt doubles the delay, 0.05 + 0.1 + 0.2 + 0.4 seconds at most for 4 attempts
+    assert wait_until(lambda: stream.failed_connections >= 4)
+    assert not stream.is_available()
+    time.sleep(0.5)
+    assert stream.failed_connections <= 6
+
+
+def test_silent_stream_is_reconnected(create_server, create_stream):
+    server = create_server()
+    # The closed connection is only noticed by the ping timeout
+    stream = create_stream(
+        server.url,
+        ping_interval=1,
+        ping_timeout=0.5,
+        stale_timeout=0.3,
+        reconnect_interval=0.05,
+    )
+    stream.start()
+    assert wait_until(lambda: len(stream.snapshot()) == 2)
+
+    # Connected but silent, the heartbeat closes the connection and the stream reconnects
+    server.is_silent = True
+    assert wait_until(lambda: not stream.is_available())
+
+    server.is_silent = False
+    assert wait_until(lambda: server.connections == 2)
+    assert wait_until(stream.is_available)
+
+
+def test_prices_are_polled_while_the_stream_is_down(
+    create_server, create_stream, fake_api
+):
+    server = create_server(disconnect_after=5)
+    stream = create_stream(server.url, reconnect_interval=0.05)
+    market = Market(
+        "Spot",
+        fake_api.url + "/api/v3/ticker/price",
+        "https://www.binance.com/en/trade/{0}",
+        [],
+        [],
+        [],
+        {"1m": 0.02},
+        stream=stream,
+    )
+    alerter = create_alerter(market)
+
+    # Not connected yet, the ticker is polled and seeds the stream
+    assets = alerter.retrieve_latest_assets(market)
+    assert [asset["symbol"] for asset in assets] == SYMBOLS
+    assert fake_api.requests == 1
+    assert len(stream.snapshot()) == 2
+
+    # Connected, the stream prices are sampled without a request
+    stream.start()
+    assert wait_until(stream.is_available)
+    assert len(alerter.retrieve_latest_assets(market)) == 2
+    assert fake_api.requests == 1
+
+    # Stream gone, polled again until it is back
+    server.stop()
+    assert wait_until(lambda: not stream.is_available())
+    assert len(alerter.retrieve_latest_assets(market)) == 2
+    assert fake_api.requests == 2
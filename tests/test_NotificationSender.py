@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import pytest
+import time
+
+from sender import NotificationSender, NotificationSink, TelegramSink, WebhookSink
+from stubs.FakeTelegramBotApi import FakeTelegramBotApi
+from stubs.FakeWebhookServer import FakeWebhookServer
+
+CHAT_ID = 1
+ALERT_CHAT_ID = 2
+
+
+@pytest.fixture
+def telegram_api():
+    telegram_api = FakeTelegramBotApi().start()
+    yield telegram_api
+    telegram_api.stop()
+
+
+@pytest.fixture
+def create_webhook():
+    webhooks = []
+
+    def create_webhook(**kwargs):
+        webhook = FakeWebhookServer(**kwargs).start()
+        webhooks.append(webhook)
+        return webhook
+
+    yield create_webhook
+    for webhook in webhooks:
+        webhook.stop()
+
+
+def telegram_sinks(telegram_api, alert_chat_id=0, **kwargs):
+    return TelegramSink.for_chats(
+        "TOKEN",
+        CHAT_ID,
+        alert_chat_id=alert_chat_id,
+        base_url=telegram_api.base_url,
+        **kwargs
+    )
+
+
+def chat_messages(telegram_api, chat_id=CHAT_ID):
+    with telegram_api.lock:
+        return list(telegram_api.messages.get(str(chat_id), []))
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def put_all(sink, texts):
+    async def put():
+        sink.wakeup = asyncio.Event()
+        for text in texts:
+            sink.put({"text": text, "is_alert_chat": False})
+
+    asyncio.run(put())
+    return [notification["text"] for notification in sink.queue]
+
+
+def test_chat_messages_are_paced(telegram_api):
+    # 2 messages per second after a burst of 30
+    sender = NotificationSender(
+        telegram_sinks(telegram_api, chat_messages_per_minute=120)
+    )
+    start = time.monotonic()
+    for i in range(34):
+        sender.send_message(str(i))
+    sender.close(timeout=10)
+
+    assert time.monotonic() - start >= 1.9
+    assert chat_messages(telegram_api) == [str(i) for i in range(34)]
+
+
+def test_chats_share_the_global_rate(telegram_api):
+    # Every chat could send right away, together they are held to 20 messages per second after a burst of 20
+    sender = NotificationSender(
+        telegram_sinks(
+            telegram_api,
+            alert_chat_id=ALERT_CHAT_ID,
+            chat_messages_per_minute=6000,
+            global_messages_per_second=20,
+        )
+    )
+    start = time.monotonic()
+    for i in range(20):
+        sender.send_message(str(i))
+        sender.send_message(str(i), is_alert_chat=True)
+    sender.close(timeout=10)
+
+    assert time.monotonic() - start >= 0.9
+    assert len(chat_messages(telegram_api)) == 20
+    assert len(chat_messages(telegram_api, ALERT_CHAT_ID)) == 20
+
+
+def test_flood_errors_are_retried(telegram_api):
+    telegram_api.messages_per_second = 2
+    telegram_api.retry_after = 1
+    sender = NotificationSender(
+        telegram_sinks(telegram_api, chat_messages_per_minute=6000)
+    )
+    for i in range(3):
+        sender.send_message(str(i))
+    sender.close(timeout=10)
+
+    # Retried after the retry_after of the 429, in order and without losing any
+    assert telegram_api.flood_errors >= 1
+    assert chat_messages(telegram_api) == ["0", "1", "2"]
+    assert sender.get_statistics()["sinks"]["telegram"]["sent_messages"] == 3
+
+
+def test_webhook_unavailable_is_retried(create_webhook):
+    webhook = create_webhook(unavailable_requests=1, retry_after=1)
+    sender = NotificationSender([WebhookSink(webhook.url)])
+    sender.send_news_message("Listed", is_alert_chat=True)
+    sender.close(timeout=10)
+
+    assert webhook.requests == 2
+    assert len(webhook.posts) == 1
+    assert webhook.posts[0]["kind"] == "news"
+    assert webhook.posts[0]["chat"] == "alert"
+
+
+def test_full_queue_drops_the_oldest_message():
+    sink = NotificationSink("test", max_queue_size=2)
+
+    assert put_all(sink, ["a", "b", "c"]) == ["b", "c"]
+    assert sink.get_statistics()["dropped_messages"] == 1
+
+
+def test_full_queue_warns_once_per_burst(caplog):
+    sink = NotificationSink("test", max_queue_size=2)
+
+    with caplog.at_level(logging.DEBUG, logger="notification-sink"):
+        put_all(sink, [str(i) for i in range(10)])
+
+    # Every dropped message is logged at debug level only
+    assert [record.levelno for record in caplog.records].count(logging.WARNING) == 1
+    assert [record.levelno for record in caplog.records].count(logging.DEBUG) == 8
+
+
+def test_full_queue_merges_into_the_last_message():
+    sink = NotificationSink("test", max_queue_size=2, max_message_length=7)
+
+    # Merged as long as the last message stays within the maximum length, then the oldest is dropped
+    assert put_all(sink, ["a", "b", "c", "d", "e"]) == ["b\n\nc\n\nd", "e"]
+    assert sink.get_statistics()["merged_messages"] == 2
+    assert sink.get_statistics()["dropped_messages"] == 1
+
+
+def test_coalesce_notifications():
+    notifications = [
+        {"text": text, "is_alert_chat": is_alert_chat}
+        for text, is_alert_chat in (
+            ("a", False),
+            ("b", False),
+            ("c", True),
+            ("d", True),
+            ("e", True),
+        )
+    ]
+
+    coalesced_notifications = NotificationSender.coalesce_notifications(
+        notifications, 4
+    )
+
+    # Only messages of the same chat are merged, up to the maximum length
+    assert [notification["text"] for notification in coalesced_notifications] == [
+        "a\n\nb",
+        "c\n\nd",
+        "e",
+    ]
+
+
+def test_coalesced_messages_are_sent_on_flush(telegram_api, create_webhook):
+    webhook = create_webhook()
+    sender = NotificationSender(
+        telegram_sinks(telegram_api) + [WebhookSink(webhook.url)]
+    )
+    sender.send_news_message("a", coalesce=True)
+    sender.send_news_message("b", coalesce=True)
+    assert sender.get_statistics()["pending_messages"] == 2
+
+    sender.flush()
+    sender.close(timeout=10)
+
+    # Telegram gets them in one message, the webhook one request per message
+    assert len(chat_messages(telegram_api)) == 1
+    assert len(webhook.posts) == 2
+
+
+def test_slow_webhook_does_not_block_telegram(telegram_api, create_webhook):
+    webhook = create_webhook(delay=1)
+    sender = NotificationSender(
+        telegram_sinks(telegram_api) + [WebhookSink(webhook.url)]
+    )
+    start = time.monotonic()
+    for i in range(3):
+        sender.send_message(str(i))
+
+    assert wait_until(lambda: len(chat_messages(telegram_api)) == 3)
+    assert time.monotonic() - start < 1
+    assert len(webhook.posts) == 0
+
+    # Closing waits for the webhook to get the queued messages
+    sender.close(timeout=10)
+    assert [post["text"] for post in webhook.posts] == ["0", "1", "2"]
+
+
+def test_close_gives_up_after_the_timeout(create_webhook):
+    webhook = create_webhook(delay=1)
+    sender = NotificationSender([WebhookSink(webhook.url)])
+    for i in range(5):
+        sender.send_message(str(i))
+
+    start = time.monotonic()
+    sender.close(timeout=0.5)
+
+    assert time.monotonic() - start < 2
+    assert len(webhook.posts) < 5
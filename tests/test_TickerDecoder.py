@@ -0,0 +1,128 @@
+import json
+import numpy as np
+import pytest
+
+from alerter import TickerDecoder
+from stubs.FakeBinanceApi import FakeBinanceApi
+
+SPOT_24HR_TICKER = {
+    "symbol": "BNBBTC",
+    "priceChange": "-94.99999800",
+    "priceChangePercent": "-95.960",
+    "weightedAvgPrice": "0.29628482",
+    "prevClosePrice": "0.10002000",
+    "lastPrice": "4.00000200",
+    "lastQty": "200.00000000",
+    "bidPrice": "4.00000000",
+    "bidQty": "100.00000000",
+    "askPrice": "4.00000200",
+    "askQty": "100.00000000",
+    "openPrice": "99.00000000",
+    "highPrice": "100.00000000",
+    "lowPrice": "0.10000000",
+    "volume": "8913.30000000",
+    "quoteVolume": "15.30000000",
+    "openTime": 1499783499040,
+    "closeTime": 1499869899040,
+    "firstId": 28385,
+    "lastId": 28460,
+    "count": 76,
+}
+
+
+def fake_api_payload(route, separators=(",", ":")):
+    fake_api = FakeBinanceApi(["SYM{0}USDT".format(i) for i in range(100)])
+    fake_api.server.server_close()
+    _, body = route(fake_api)({})
+    return json.dumps(body, separators=separators).encode()
+
+
+def expected_columns(content, price_key, volume_key=None):
+    exchange_assets = json.loads(content)
+    return (
+        [exchange_asset["symbol"] for exchange_asset in exchange_assets],
+        [float(exchange_asset[price_key]) for exchange_asset in exchange_assets],
+        (
+            [float(exchange_asset[volume_key]) for exchange_asset in exchange_assets]
+            if volume_key
+            else None
+        ),
+    )
+
+
+def assert_same_as_json(content, price_key="price", volume_key=None):
+    columns = TickerDecoder(price_key, volume_key).decode(content)
+    symbols, prices, volumes = expected_columns(content, price_key, volume_key)
+
+    assert columns.symbols == symbols
+    np.testing.assert_array_equal(columns.prices, prices)
+    if volume_key:
+        np.testing.assert_array_equal(columns.volumes, volumes)
+    else:
+        assert columns.volumes is None
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_price_ticker(separators):
+    assert_same_as_json(
+        fake_api_payload(lambda fake_api: fake_api.ticker_price, separators)
+    )
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_24hr_ticker(separators):
+    assert_same_as_json(
+        fake_api_payload(lambda fake_api: fake_api.ticker_24hr, separators),
+        "lastPrice",
+        "quoteVolume",
+    )
+
+
+def test_binance_24hr_ticker():
+    tickers = [
+        dict(SPOT_24HR_TICKER, symbol=symbol, lastPrice=price)
+        for symbol, price in (("BNBBTC", "4.00000200"), ("ETHBTC", "0.03440000"))
+    ]
+    assert_same_as_json(json.dumps(tickers).encode(), "lastPrice", "quoteVolume")
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        # Futures price ticker with the time of every price
+        b'[{"symbol":"BTCUSDT","price":"6000.01","time":1589437530011},'
+        b'{"symbol":"ETHUSDT","price":"200.5","time":1589437530012}]',
+        # Empty and single entries
+        b"[]",
+        b" [ ] ",
+        b'[{"symbol":"ETHBTC","price":"0.03440000"}]',
+        # Exponents and signs
+        b'[{"symbol":"AUSDT","price":"1e-8"},{"symbol":"BUSDT","price":"2.5E+3"},'
+        b'{"symbol":"CUSDT","price":"-0.0"}]',
+        # Escaped characters
+        b'[{"symbol":"A\\"USDT","price":"1.0"},{"symbol":"BUSDT","price":"2.0"}]',
+        b'[{"symbol":"\\u0041USDT","price":"1.0"},{"symbol":"B\\/USDT","price":"2.0"}]',
+        # Keys in a different order, extra keys and unquoted values
+        b'[{"symbol":"AUSDT","price":"1.0"},{"price":"2.0","symbol":"BUSDT"}]',
+        b'[{"symbol":"AUSDT","price":"1.0","time":1},{"symbol":"BUSDT","price":"2.0"}]',
+        b'[{"symbol":"AUSDT","price":1.5},{"symbol":"BUSDT","price":"2.5"}]',
+        # Pretty printed
+        b'[\n  {\n    "symbol": "AUSDT",\n    "price": "1.0"\n  }\n]',
+    ],
+)
+def test_edge_cases(content):
+    assert_same_as_json(content)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b'{"code":-1003,"msg":"Too many requests."}',
+        b'[{"symbol":"AUSDT"}]',
+        b'[{"symbol":"AUSDT","price":"1.0"}',
+    ],
+)
+def test_unexpected_responses_raise_value_error(content):
+    # The fetcher retries a ValueError like a broken JSON response
+    with pytest.raises(ValueError):
+        TickerDecoder().decode(content)
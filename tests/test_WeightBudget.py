@@ -0,0 +1,154 @@
+import pytest
+import requests
+import time
+
+from alerter import TickerFetcher
+from alerter.WeightBudget import WeightBudget
+from stubs.FakeBinanceApi import FakeBinanceApi
+
+# Seconds the weight is counted for, the minute of Binance would make the tests slow
+WINDOW = 2
+TICKER_WEIGHT = FakeBinanceApi.WEIGHTS["price"]
+
+
+@pytest.fixture(autouse=True)
+def short_window(monkeypatch):
+    monkeypatch.setattr(WeightBudget, "WINDOW", WINDOW)
+    monkeypatch.setattr(WeightBudget, "PACE_AHEAD", WINDOW / 4)
+
+
+@pytest.fixture
+def create_api():
+    fake_apis = []
+
+    def create_api(weight_limit):
+        fake_api = FakeBinanceApi(
+            ["AAAUSDT", "BBBUSDT"], weight_limit=weight_limit, window=WINDOW
+        ).start()
+        fake_apis.append(fake_api)
+        return fake_api
+
+    yield create_api
+    for fake_api in fake_apis:
+        fake_api.stop()
+
+
+def create_fetcher(fake_api, weight_limit):
+    fetcher = TickerFetcher(retry_interval=0.01, max_retries=1)
+    fetcher.add_weight_budget(fake_api.url, weight_limit)
+    return fetcher
+
+
+def ticker_url(fake_api):
+    return fake_api.url + "/api/v3/ticker/price"
+
+
+def wait_for_new_window():
+    # Starts a test early in a window, so its requests are counted in the same one
+    time.sleep(WINDOW - time.time() % WINDOW + 0.01)
+    return time.time() - time.time() % WINDOW
+
+
+def test_budget_tracks_used_weight_header(create_api):
+    fake_api = create_api(weight_limit=1000)
+    fetcher = create_fetcher(fake_api, 1000)
+    budget = fetcher.get_weight_budget(ticker_url(fake_api))
+    wait_for_new_window()
+
+    assert fetcher.fetch(ticker_url(fake_api), weight=TICKER_WEIGHT) is not None
+    assert budget.get_statistics()["weight_used"] == TICKER_WEIGHT
+
+    # Weight used by other instances behind the same IP is taken from the header
+    fake_api.add_weight(300)
+    fetcher.fetch(ticker_url(fake_api), weight=TICKER_WEIGHT)
+    assert budget.get_statistics() == {
+        "weight_limit": 1000,
+        "weight_used": 300 + 2 * TICKER_WEIGHT,
+        "ban_seconds": 0,
+    }
+
+    # The count starts over with the next window
+    time.sleep(WINDOW - time.time() % WINDOW + 0.01)
+    assert budget.get_statistics()["weight_used"] == 0
+
+
+def test_paced_requests_stay_below_the_limit(create_api):
+    fake_api = create_api(weight_limit=100)
+    fetcher = create_fetcher(fake_api, 100)
+    window_start = wait_for_new_window()
+
+    served = 0
+    skipped = 0
+    end = window_start + 2 * WINDOW - 0.05
+    while time.time() < end:
+        assets = fetcher.fetch(ticker_url(fake_api), weight=TICKER_WEIGHT, paced=True)
+        if assets is None:
+            skipped += 1
+        else:
+            served += 1
+        time.sleep(0.01)
+
+    # Never rejected, the ticks slow down before the limit and pick up again in the next window
+    assert fake_api.banned_until == 0
+    assert skipped > 0
+    assert served == pytest.approx(2 * int(100 * 0.9 / TICKER_WEIGHT), abs=1)
+
+
+def test_paced_requests_spread_over_the_window(create_api):
+    fake_api = create_api(weight_limit=100)
+    fetcher = create_fetcher(fake_api, 100)
+    wait_for_new_window()
+
+    served = 0
+    while time.time() % WINDOW < WINDOW / 4:
+        if fetcher.fetch(ticker_url(fake_api), weight=TICKER_WEIGHT, paced=True):
+            served += 1
+
+    # Only the pace ahead and the first quarter of the budget are available in the first quarter
+    assert served * TICKER_WEIGHT <= 100 * 0.9 / 2
+
+
+def test_rejected_request_waits_for_retry_after(create_api):
+    fake_api = create_api(weight_limit=100)
+    fetcher = create_fetcher(fake_api, 100)
+    budget = fetcher.get_weight_budget(ticker_url(fake_api))
+    wait_for_new_window()
+
+    # Other instances used up the weight, the first request gets a 429
+    fake_api.add_weight(100)
+    start = time.time()
+    assets = fetcher.fetch(ticker_url(fake_api), weight=TICKER_WEIGHT)
+    retry_after = WINDOW - start % WINDOW
+
+    # The retry waited for the Retry-After of the 429 and was served, no 418 for a request during the ban
+    assert assets is not None
+    assert time.time() - start >= retry_after
+    assert fake_api.requests == 2
+    assert budget.get_statistics()["ban_seconds"] == 0
+
+
+def test_no_requests_during_a_ban(create_api):
+    fake_api = create_api(weight_limit=100)
+    fetcher = create_fetcher(fake_api, 100)
+    budget = fetcher.get_weight_budget(ticker_url(fake_api))
+    wait_for_new_window()
+
+    # Another instance ignored the 429 and got the IP banned, every request now gets a 418
+    fake_api.add_weight(100)
+    assert requests.get(ticker_url(fake_api)).status_code == 429
+    assert requests.get(ticker_url(fake_api)).status_code == 418
+
+    fetcher.max_retries = 0
+    assert fetcher.fetch(ticker_url(fake_api), paced=True) is None
+    sent_requests = fake_api.requests
+    ban_seconds = budget.get_statistics()["ban_seconds"]
+    assert ban_seconds > WINDOW
+
+    # Paced requests are skipped and nothing is sent until the Retry-After of the 418 has passed
+    for _ in range(10):
+        assert fetcher.fetch(ticker_url(fake_api), paced=True) is None
+    assert fake_api.requests == sent_requests
+
+    time.sleep(ban_seconds)
+    assert fetcher.fetch(ticker_url(fake_api), paced=True) is not None
+    assert fake_api.requests == sent_requests + 1
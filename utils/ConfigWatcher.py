@@ -0,0 +1,56 @@
+import logging
+import os
+import signal
+import threading
+
+
+# Reloads the config when its file changes or on SIGHUP, e.g. `docker kill -s HUP`.
+# The file is polled, editors replace it rather than writing in place and containers rarely support inotify.
+# A failed reload keeps the current config, the next change is tried again.
+class ConfigWatcher:
+    def __init__(self, path, reload, interval=5):
+        self.path = path
+        self.reload = reload
+        self.interval = interval
+
+        self.last_modified = self.modified_time()
+        self.reload_requested = threading.Event()
+
+        self.logger = logging.getLogger("config-watcher")
+
+    def modified_time(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def start(self):
+        # Signal handlers can only be installed from the main thread
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.handle_signal)
+
+        threading.Thread(target=self.run, name="config-watcher", daemon=True).start()
+        self.logger.info("Watching %s for changes.", self.path)
+
+    def handle_signal(self, signum, frame):
+        self.reload_requested.set()
+
+    def run(self):
+        while True:
+            requested = self.reload_requested.wait(self.interval)
+            self.reload_requested.clear()
+
+            modified = self.modified_time()
+            if not requested and modified == self.last_modified:
+                continue
+            self.last_modified = modified
+
+            self.logger.info("Reloading %s.", self.path)
+            try:
+                self.reload()
+            except Exception as e:
+                self.logger.error(
+                    "Reloading %s failed, keeping the current config: %s",
+                    self.path,
+                    e,
+                )
@@ -8,5 +8,7 @@ class ConversionUtils:
             unit = 60
         elif unit == "h":
             unit = 3600
+        elif unit == "d":
+            unit = 86400
 
         return int(duration[:-1]) * unit
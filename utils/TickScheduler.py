@@ -0,0 +1,38 @@
+import time
+
+
+# Drift-free tick clock on the monotonic clock, ticks are due at fixed offsets from the start.
+# A slow tick does not shift the following ones. Ticks already over when the previous one finishes
+# are skipped and reported as missed, the next tick starts right away in the latest slot due.
+class TickScheduler:
+    def __init__(self, interval):
+        self.interval = interval
+        self.start_monotonic = time.monotonic()
+        # Wall clock time of the first tick, tick times are derived from it and never jump
+        self.start_time = time.time()
+        self.tick = 0
+
+    @property
+    def tick_time(self):
+        # Wall clock time of the slot of the current tick
+        return self.start_time + self.tick * self.interval
+
+    def elapsed(self):
+        # Seconds since the slot of the current tick started
+        return time.monotonic() - self.start_monotonic - self.tick * self.interval
+
+    def wait_for_next_tick(self):
+        # Returns the number of ticks missed since the current one
+        now = time.monotonic() - self.start_monotonic
+        due_tick = int(now // self.interval)
+
+        if due_tick <= self.tick:
+            next_tick = self.tick + 1
+            time.sleep(max(0, next_tick * self.interval - now))
+            missed_ticks = 0
+        else:
+            next_tick = due_tick
+            missed_ticks = due_tick - self.tick - 1
+
+        self.tick = next_tick
+        return missed_ticks
@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+# Thread safe token bucket, refills at rate tokens per second up to capacity.
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.last_refill) * self.rate
+        )
+        self.last_refill = now
+
+    def try_acquire(self, tokens=1):
+        # Returns 0 if the tokens were taken, otherwise the seconds until they are available
+        with self.lock:
+            self.refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        wait_time = self.try_acquire(tokens)
+        while wait_time > 0:
+            time.sleep(wait_time)
+            wait_time = self.try_acquire(tokens)
+
+    def drain(self, seconds):
+        # Empty the bucket so no tokens are available for the given seconds, e.g. after a flood error
+        with self.lock:
+            self.refill()
+            self.tokens = -seconds * self.rate
+
+    def available(self):
+        with self.lock:
+            self.refill()
+            return self.tokens
@@ -1 +1,4 @@
+from .ConfigWatcher import ConfigWatcher
 from .ConversionUtils import ConversionUtils
+from .TickScheduler import TickScheduler
+from .TokenBucket import TokenBucket